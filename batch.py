@@ -0,0 +1,296 @@
+# batch.py
+# Headless batch processing for TrussSim
+
+import argparse
+import functools
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import functions  # type: ignore
+import profiling  # type: ignore
+import stability  # type: ignore
+
+STATUS_OK = "ok"
+STATUS_NOT_DETERMINED = "not statically determined"
+STATUS_UNSTABLE = "unstable"
+STATUS_ERROR = "error"
+
+def expand_inputs(patterns):
+    """
+    Expand file names, glob patterns and directories to a sorted list of JSON files.
+
+    Parameters:
+        patterns (list): File names, glob patterns or directories.
+
+    Returns:
+        list: Paths of the input files.
+    """
+    file_paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            file_paths.extend(glob.glob(os.path.join(pattern, '*.json')))
+        elif glob.has_magic(pattern):
+            file_paths.extend(glob.glob(pattern, recursive=True))
+        else:
+            file_paths.append(pattern)
+    return sorted(set(file_paths))
+
+def solve_file(file_path, profile=False):
+    """
+    Import and solve one truss file.
+
+    Parameters:
+        file_path (str): Path to the JSON file containing truss data.
+        profile (bool): Time the stages and add them to the result as 'timings'.
+
+    Returns:
+        dict: Machine-readable result with file, status, member forces and reaction forces.
+              Unstable trusses get a 'mechanism' entry with the nodes and members that can move.
+              Statically determined trusses get the 'condition_estimate' of their equilibrium matrix.
+    """
+    if profile:
+        with profiling.Profiler() as profiler:
+            result = solve_file(file_path)
+        result["timings"] = {entry["path"]: entry["seconds"] for entry in profiler.report()["spans"]}
+        return result
+
+    # Any failure is recorded per file; it must not abort the whole batch
+    try:
+        model = functions.import_json(file_path, as_model=True)
+        check_model(model)
+    except Exception as e:
+        return _error(_new_result(file_path), e)
+    return solve_model(model, file_path)
+
+def read_data(truss_data):
+    """
+    Create a truss model from truss data that is already in memory, e.g. a request payload.
+
+    Parameters:
+        truss_data (dict): Truss data in the JSON layout read by functions.import_json.
+
+    Returns:
+        TrussModel or SpaceTrussModel: The truss model.
+
+    Raises:
+        ValueError: If the data is not a well-formed truss.
+    """
+    if not isinstance(truss_data, dict):
+        raise ValueError(f"Invalid truss data: expected a JSON object, got {type(truss_data).__name__}")
+    try:
+        model = functions.model_from_dict(truss_data)
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid truss data: {type(e).__name__}: {e}") from e
+    check_model(model)
+    return model
+
+def check_model(model):
+    """
+    Check that the node indices and coordinates of a truss model are valid.
+
+    Parameters:
+        model (TrussModel or SpaceTrussModel): The truss model.
+
+    Raises:
+        ValueError: If a member, support or load refers to a missing node, or a coordinate is not finite.
+    """
+    for label, indices in (("connections", model.members), ("supports", model.support_nodes), ("loads", model.load_nodes)):
+        if len(indices) and (indices.min() < 0 or indices.max() >= model.num_nodes):
+            raise ValueError(f"Invalid truss data: {label} refer to nodes outside 0..{model.num_nodes - 1}")
+    if not np.isfinite(model.coordinates).all():
+        raise ValueError("Invalid truss data: node coordinates must be finite")
+
+def solve_data(truss_data, name=None):
+    """
+    Solve truss data that is already in memory, e.g. a request payload.
+
+    Parameters:
+        truss_data (dict): Truss data in the JSON layout read by functions.import_json.
+        name (str): Name reported as the 'file' of the result.
+
+    Returns:
+        dict: Machine-readable result as returned by solve_file.
+    """
+    try:
+        model = read_data(truss_data)
+    except ValueError as e:
+        return _error(_new_result(name), e)
+    return solve_model(model, name)
+
+def solve_model(model, name=None):
+    """
+    Solve a truss model and return its result.
+
+    Parameters:
+        model (TrussModel or SpaceTrussModel): The truss model.
+        name (str): Name reported as the 'file' of the result.
+
+    Returns:
+        dict: Machine-readable result as returned by solve_file.
+    """
+    result = _new_result(name)
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    num_unknowns = model.num_members + len(reaction_nodes)
+
+    # Too few unknowns, checked here to keep the workers quiet; redundant trusses use the stiffness method
+    if model.dimensions * model.num_nodes > num_unknowns:
+        result["status"] = STATUS_NOT_DETERMINED
+        return result
+
+    try:
+        if model.dimensions * model.num_nodes == num_unknowns:
+            # Near-mechanisms solve to huge forces, so the solve checks the geometry and the condition number
+            variables, report = stability.solve_checked(model)
+            result["condition_estimate"] = report.condition_estimate
+            if not report.stable:
+                return _unstable(result, report)
+            forces, reactions = variables[:model.num_members], variables[model.num_members:]
+        else:
+            forces, reactions = functions.calculate_forces(model)
+    except np.linalg.LinAlgError as e:
+        # Singular: the pebble game and the numeric check of plane trusses locate the mechanism
+        if model.dimensions == 2:
+            return _unstable(result, stability.check_model(model))
+        result["status"] = STATUS_UNSTABLE
+        result["error"] = f"Truss is unstable ({e})"
+        return result
+    except Exception as e:
+        return _error(result, e)
+    result["member_forces"] = forces.tolist()
+    result["reactions"] = [{"node": node, "direction": "xyz"[direction], "magnitude": magnitude}
+                           for node, direction, magnitude in zip(reaction_nodes.tolist(), reaction_directions.tolist(), reactions.tolist())]
+    return result
+
+def _new_result(file_path):
+    """Empty result of a truss."""
+    return {"file": file_path, "status": STATUS_OK, "member_forces": None, "reactions": None, "error": None, "mechanism": None,
+            "condition_estimate": None}
+
+def _error(result, error):
+    """Fill in the result of a truss that could not be read or solved."""
+    result["status"] = STATUS_ERROR
+    result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+def _unstable(result, report):
+    """Fill in the result of an unstable truss from its stability report."""
+    result["status"] = STATUS_UNSTABLE
+    result["error"] = report.message
+    result["mechanism"] = {"nodes": report.mechanism_nodes.tolist(), "members": report.mechanism_members.tolist()}
+    return result
+
+def result_path(file_path, output_dir, base_dir=None):
+    """
+    Path of the result file for an input file.
+
+    Parameters:
+        file_path (str): Path of the input file.
+        output_dir (str): Directory for the result files.
+        base_dir (str): Directory the input paths are mirrored from, so inputs with the same
+                        name in different directories get different result files.
+                        Defaults to the directory of the input file.
+
+    Returns:
+        str: Path of the result file.
+    """
+    if base_dir is None:
+        base_dir = os.path.dirname(os.path.abspath(file_path))
+    name = os.path.splitext(os.path.relpath(os.path.abspath(file_path), base_dir))[0] + ".result.json"
+    return os.path.join(output_dir, name)
+
+def common_directory(file_paths):
+    """Deepest directory containing all input files."""
+    return os.path.commonpath([os.path.dirname(os.path.abspath(file_path)) for file_path in file_paths])
+
+def run_batch(file_paths, output_dir=None, workers=None, chunksize=8, profile=False):
+    """
+    Solve many truss files in parallel.
+
+    Parameters:
+        file_paths (list): Paths of the input files.
+        output_dir (str): Directory for the per-file result files, or None to not write them.
+                          The directories of the inputs below their common directory are mirrored.
+        workers (int): Number of worker processes, defaults to the number of CPUs.
+        chunksize (int): Number of files sent to a worker at once.
+        profile (bool): Time the stages of every file; the summary gets the totals as 'timings'.
+
+    Returns:
+        tuple: List of results in input order and a summary dictionary.
+    """
+    start = time.perf_counter()
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        base_dir = common_directory(file_paths) if file_paths else None
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(functools.partial(solve_file, profile=profile), file_paths, chunksize=max(1, chunksize)):
+            if output_dir:
+                path = result_path(result["file"], output_dir, base_dir)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as file:
+                    json.dump(result, file)
+            results.append(result)
+
+    summary = {
+        "files": len(results),
+        "ok": sum(result["status"] == STATUS_OK for result in results),
+        "not_statically_determined": sum(result["status"] == STATUS_NOT_DETERMINED for result in results),
+        "unstable": sum(result["status"] == STATUS_UNSTABLE for result in results),
+        "errors": sum(result["status"] == STATUS_ERROR for result in results),
+        "elapsed_seconds": time.perf_counter() - start,
+        "failed_files": [result["file"] for result in results if result["status"] != STATUS_OK],
+    }
+    if profile:
+        timings = {}
+        for result in results:
+            for path, seconds in result["timings"].items():
+                timings[path] = timings.get(path, 0.0) + seconds
+        summary["timings"] = timings
+    return results, summary
+
+def main(argv=None):
+    """
+    Command-line entry point.
+
+    Parameters:
+        argv (list): Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code, 0 if all files were solved, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Solve truss JSON files without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="input files, glob patterns or directories")
+    parser.add_argument("-o", "--output-dir", help="directory for the per-file result files")
+    parser.add_argument("-s", "--summary", help="path of the summary JSON file")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("-c", "--chunksize", type=int, default=8, help="number of files sent to a worker at once")
+    parser.add_argument("-p", "--profile", action="store_true", help="time the import, assembly, solve and write-back stages")
+    args = parser.parse_args(argv)
+
+    file_paths = expand_inputs(args.inputs)
+    if not file_paths:
+        print("No input files found.", file=sys.stderr)
+        return 1
+
+    results, summary = run_batch(file_paths, args.output_dir, args.workers, args.chunksize, args.profile)
+
+    if args.summary:
+        with open(args.summary, 'w') as file:
+            json.dump(summary, file, indent=2)
+
+    for result in results:
+        if result["status"] != STATUS_OK:
+            print(f"{result['file']}: {result['status']}" + (f" ({result['error']})" if result["error"] else ""))
+    print(f"Solved {summary['ok']} of {summary['files']} files in {summary['elapsed_seconds']:.2f} s "
+          f"({summary['not_statically_determined']} not statically determined, {summary['unstable']} unstable, {summary['errors']} errors)")
+    if args.profile:
+        print("Stage timings (summed over all files): " + " | ".join(f"{path} {seconds:.3f} s" for path, seconds in summary["timings"].items()))
+    return 0 if summary["ok"] == summary["files"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
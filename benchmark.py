@@ -0,0 +1,304 @@
+# benchmark.py
+# Benchmark suite for the TrussSim pipeline stages
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import functions  # type: ignore
+import generators  # type: ignore
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+DEFAULT_TOLERANCE = 0.25
+# Stages faster than this are too noisy to flag as regressions
+MIN_SECONDS = 0.005
+
+# Modules of the solver core, which must import quickly and without the modules in DEFERRED_MODULES
+CORE_MODULES = ['classes', 'solver', 'stiffness', 'space', 'functions']
+DEFERRED_MODULES = ['scipy', 'matplotlib', 'tkinter']
+# Import time of the core modules on top of NumPy, in seconds
+IMPORT_BUDGET_SECONDS = 0.1
+
+# Run in a fresh interpreter, so nothing is imported yet
+_IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import numpy
+numpy_seconds = time.perf_counter() - start
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+seconds = time.perf_counter() - start
+print(json.dumps({"numpy_seconds": numpy_seconds, "seconds": seconds, "modules": sorted({name.split('.')[0] for name in sys.modules})}))
+"""
+
+def _import_json(state):
+    state['objects'] = functions.import_json(state['json_path'])
+
+def _calculate_forces(state):
+    nodes, connections, supports, loads = state['objects']
+    state['reaction_forces'] = functions.calculate_forces(nodes, connections, supports, loads)[1]
+
+def _plot_truss_structure(state):
+    nodes, connections, supports, loads = state['objects']
+    functions.plot_truss_structure(connections, supports, nodes, loads, state['reaction_forces'], output_path=state['png_path'])
+
+def _print_all(state):
+    nodes, connections, supports, loads = state['objects']
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        functions.print_all(nodes, connections, supports, loads, state['reaction_forces'])
+
+def _import_json_model(state):
+    state['model'] = functions.import_json(state['json_path'], as_model=True)
+
+def _calculate_forces_model(state):
+    functions.calculate_forces(state['model'])
+
+# Stages in pipeline order
+STAGES = {
+    'import_json': _import_json,
+    'calculate_forces': _calculate_forces,
+    'plot_truss_structure': _plot_truss_structure,
+    'print_all': _print_all,
+    'import_json_model': _import_json_model,
+    'calculate_forces_model': _calculate_forces_model,
+}
+
+# Stage whose state each stage needs
+REQUIRES = {
+    'calculate_forces': 'import_json',
+    'plot_truss_structure': 'calculate_forces',
+    'print_all': 'calculate_forces',
+    'calculate_forces_model': 'import_json_model',
+}
+
+def _requirements(stage_name):
+    """The stage and all stages it depends on."""
+    requirements = [stage_name]
+    while requirements[-1] in REQUIRES:
+        requirements.append(REQUIRES[requirements[-1]])
+    return requirements
+
+def time_stage(stage, state, repeat=1, memory=True):
+    """
+    Time one stage.
+
+    Parameters:
+        stage (callable): The stage function.
+        state (dict): The pipeline state passed to the stage.
+        repeat (int): Number of timed runs; the fastest one counts.
+        memory (bool): Run the stage once more under tracemalloc to record its peak memory.
+
+    Returns:
+        tuple: Seconds of the fastest run and peak memory in bytes (None without memory).
+    """
+    seconds = float('inf')
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        stage(state)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    peak_bytes = None
+    if memory:
+        # Separate run, because tracing slows down the stage
+        tracemalloc.start()
+        try:
+            stage(state)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak_bytes
+
+def run_benchmark(generator_names, sizes, stages=None, repeat=1, memory=True, max_seconds=None):
+    """
+    Benchmark the pipeline stages on generated trusses of increasing size.
+
+    Parameters:
+        generator_names (list): Names of the generators in generators.GENERATORS.
+        sizes (list): Approximate numbers of members.
+        stages (list): Names of the stages in STAGES, defaults to all of them.
+        repeat (int): Number of timed runs per stage.
+        memory (bool): Record the peak memory of every stage.
+        max_seconds (float): Skip a stage for the larger sizes once it took longer than this.
+
+    Returns:
+        list: One result dictionary per generator, size and stage.
+    """
+    stages = list(STAGES) if stages is None else stages
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in generator_names:
+            too_slow = set()
+            for size in sorted(sizes):
+                panels = generators.panels_for_members(name, size)
+                model = generators.generate(name, panels, **({'seed': 0} if name == 'lattice' else {}))
+                state = {'json_path': os.path.join(work_dir, 'truss.json'), 'png_path': os.path.join(work_dir, 'truss.png')}
+                with open(state['json_path'], 'w') as file:
+                    json.dump(model.to_dict(), file)
+
+                # Time the active stages and run the stages they depend on untimed
+                active = [stage_name for stage_name in stages if not too_slow & set(_requirements(stage_name))]
+                if not active:
+                    break
+                needed = set().union(*(_requirements(stage_name) for stage_name in active))
+                for stage_name, stage in STAGES.items():
+                    if stage_name not in needed:
+                        continue
+                    if stage_name not in active:
+                        stage(state)
+                        continue
+                    seconds, peak_bytes = time_stage(stage, state, repeat, memory)
+                    results.append({
+                        "generator": name,
+                        "size": size,
+                        "panels": panels,
+                        "nodes": model.num_nodes,
+                        "members": model.num_members,
+                        "stage": stage_name,
+                        "seconds": seconds,
+                        "peak_bytes": peak_bytes,
+                    })
+                    if max_seconds is not None and seconds > max_seconds:
+                        too_slow.add(stage_name)
+    return results
+
+def measure_import(modules=None, repeat=5):
+    """
+    Measure the import time of modules in fresh interpreters.
+
+    Parameters:
+        modules (list): Names of the modules, defaults to CORE_MODULES.
+        repeat (int): Number of interpreters started; the fastest run counts.
+
+    Returns:
+        dict: 'seconds' to import the modules after NumPy, 'numpy_seconds' to import NumPy,
+              and 'deferred' (the modules of DEFERRED_MODULES that were imported as well).
+    """
+    modules = CORE_MODULES if modules is None else modules
+    runs = []
+    for _ in range(max(1, repeat)):
+        output = subprocess.run([sys.executable, "-c", _IMPORT_SCRIPT, *modules], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        runs.append(json.loads(output))
+    return {
+        "seconds": min(run["seconds"] for run in runs),
+        "numpy_seconds": min(run["numpy_seconds"] for run in runs),
+        "deferred": sorted(set(DEFERRED_MODULES).intersection(*(run["modules"] for run in runs))),
+    }
+
+def check_import_budget(budget=IMPORT_BUDGET_SECONDS, repeat=5):
+    """
+    Check that the solver core imports within the budget and without the deferred modules.
+
+    Parameters:
+        budget (float): Allowed import time of the core modules on top of NumPy, in seconds.
+        repeat (int): Number of interpreters started; the fastest run counts.
+
+    Returns:
+        tuple: The measurement of measure_import and a list of violations as text.
+    """
+    measurement = measure_import(CORE_MODULES, repeat)
+    violations = []
+    if measurement["seconds"] > budget:
+        violations.append(f"core import took {measurement['seconds']:.3f} s, budget {budget:.3f} s")
+    violations.extend(f"core import loaded {module}" for module in measurement["deferred"])
+    return measurement, violations
+
+def compare_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE, min_seconds=MIN_SECONDS):
+    """
+    Compare results with a baseline run.
+
+    Parameters:
+        results (list): Results of run_benchmark.
+        baseline (list): Results of an earlier run.
+        tolerance (float): Allowed relative slowdown.
+        min_seconds (float): Stages faster than this in both runs are not compared.
+
+    Returns:
+        list: One dictionary per regression, with the baseline and current seconds and the ratio.
+    """
+    baseline_seconds = {(result["generator"], result["size"], result["stage"]): result["seconds"] for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_seconds.get((result["generator"], result["size"], result["stage"]))
+        if previous is None or max(previous, result["seconds"]) < min_seconds:
+            continue
+        ratio = result["seconds"] / max(previous, 1e-12)
+        if ratio > 1 + tolerance:
+            regressions.append({"generator": result["generator"], "size": result["size"], "stage": result["stage"],
+                                "baseline_seconds": previous, "seconds": result["seconds"], "ratio": ratio})
+    return regressions
+
+def environment():
+    """Description of the machine and library versions the benchmark ran on."""
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+def main(argv=None):
+    """
+    Command-line entry point.
+
+    Parameters:
+        argv (list): Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code, 1 if a regression against the baseline was found or the import budget
+             was exceeded, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the TrussSim pipeline stages on generated trusses.")
+    parser.add_argument("-g", "--generators", nargs="+", default=['warren'], choices=sorted(generators.GENERATORS), help="truss generators")
+    parser.add_argument("-n", "--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="approximate numbers of members")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=None, help="stages to time (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="timed runs per stage; the fastest counts")
+    parser.add_argument("--no-memory", action="store_true", help="do not record peak memory")
+    parser.add_argument("--max-seconds", type=float, default=None, help="skip a stage for larger sizes once it took longer than this")
+    parser.add_argument("-o", "--output", help="path of the results JSON file")
+    parser.add_argument("-b", "--baseline", help="results JSON file of an earlier run to compare with")
+    parser.add_argument("-t", "--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown against the baseline")
+    parser.add_argument("--imports", action="store_true", help="only check the import time of the solver core against its budget")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_SECONDS, help="allowed import time of the solver core on top of NumPy")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        measurement, violations = check_import_budget(args.import_budget, max(args.repeat, 5))
+        print(f"numpy {measurement['numpy_seconds']:.3f} s, core ({', '.join(CORE_MODULES)}) {measurement['seconds']:.3f} s "
+              f"(budget {args.import_budget:.3f} s)")
+        for violation in violations:
+            print(f"Import budget exceeded: {violation}")
+        return 1 if violations else 0
+
+    results = run_benchmark(args.generators, args.sizes, args.stages, args.repeat, not args.no_memory, args.max_seconds)
+
+    for result in results:
+        memory = f"{result['peak_bytes'] / 2**20:10.1f} MiB" if result["peak_bytes"] is not None else ""
+        print(f"{result['generator']:8} {result['members']:>9} members  {result['stage']:24} {result['seconds']:10.4f} s {memory}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"environment": environment(), "results": results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression['generator']} {regression['size']} {regression['stage']} "
+                  f"{regression['baseline_seconds']:.4f} s -> {regression['seconds']:.4f} s ({regression['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+# cache.py
+# Content-addressed factorization and result cache for TrussSim
+
+import collections
+import hashlib
+import os
+import numpy as np
+import functions  # type: ignore
+import solver  # type: ignore
+
+# Default bounds of the cache
+MAX_FACTORIZATIONS = 16
+MAX_DISK_BYTES = 256 * 1024 * 1024
+
+def _digest(*arrays):
+    """SHA-256 of the dtype, shape and contents of the arrays."""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode('utf-8'))
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def geometry_key(model):
+    """
+    Hash of everything that defines the coefficient matrix of a model.
+
+    Two models with the same nodes, members and supports share a key, whatever
+    their loads. For redundant trusses the elastic moduli and areas are included,
+    because they change the solution.
+
+    Parameters:
+        model (TrussModel or SpaceTrussModel): The truss model.
+
+    Returns:
+        str: Hexadecimal key.
+    """
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    arrays = [model.coordinates.astype(float), model.members.astype(np.int64),
+              reaction_nodes.astype(np.int64), reaction_directions.astype(np.int64)]
+    if model.num_members + len(reaction_nodes) > model.dimensions * model.num_nodes:
+        arrays += [model.elastic_moduli.astype(float), model.areas.astype(float)]
+    return _digest(*arrays)
+
+def load_key(model):
+    """
+    Hash of the loads of a model.
+
+    Parameters:
+        model (TrussModel or SpaceTrussModel): The truss model.
+
+    Returns:
+        str: Hexadecimal key.
+    """
+    if model.dimensions == 3:
+        return _digest(model.load_nodes.astype(np.int64), model.load_vectors.astype(float))
+    return _digest(model.load_nodes.astype(np.int64), model.load_magnitudes.astype(float), model.load_angles.astype(float))
+
+class SolveCache:
+    """
+    Cache around calculate_forces for repeated solves of the same geometry.
+
+    Factorizations of the equilibrium matrix are kept in memory, keyed by geometry_key,
+    so for statically determined trusses a geometry hit skips assembly and factorization
+    and only back-substitutes the new loads. Redundant trusses are not factorized by the
+    cache; they only benefit from result hits. Solved results are stored on disk, keyed by the geometry and the loads, so
+    they are shared between processes and runs. Both levels are bounded and evict the
+    least recently used entries.
+
+    Attributes:
+        max_factorizations (int): Maximum number of factorizations kept in memory.
+        cache_dir (str): Directory of the result files, or None to not cache results.
+        max_disk_bytes (int): Maximum total size of the result files.
+        stats (collections.Counter): Hit, miss and eviction counters.
+    """
+    def __init__(self, max_factorizations=MAX_FACTORIZATIONS, cache_dir=None, max_disk_bytes=MAX_DISK_BYTES):
+        """
+        Initialize the cache.
+
+        Parameters:
+            max_factorizations (int): Maximum number of factorizations kept in memory.
+            cache_dir (str): Directory of the result files, or None to not cache results.
+            max_disk_bytes (int): Maximum total size of the result files.
+        """
+        self.max_factorizations = max_factorizations
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = collections.Counter()
+        self._factorizations = collections.OrderedDict()
+        self._disk_bytes = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._result_files())
+
+    def _result_files(self):
+        """Result files as (modification time, path, size), oldest first."""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                try:
+                    status = entry.stat()
+                except FileNotFoundError:  # Evicted by another process
+                    continue
+                files.append((status.st_mtime, entry.path, status.st_size))
+        return sorted(files)
+
+    def _result_path(self, geometry, loads):
+        """Path of the result file of a geometry and loads."""
+        return os.path.join(self.cache_dir, f"{geometry}-{loads}.npz")
+
+    def _read_result(self, path):
+        """Read a result file, or return None if it does not exist."""
+        try:
+            with np.load(path) as data:
+                result = data['forces'], data['reactions']
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return None
+        os.utime(path)  # Mark as recently used
+        return result
+
+    def _write_result(self, path, forces, reactions):
+        """Write a result file atomically and evict old files if the cache is too large."""
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as file:
+            np.savez(file, forces=forces, reactions=reactions)
+        os.replace(temporary_path, path)
+        self._disk_bytes += os.path.getsize(path)
+        if self._disk_bytes > self.max_disk_bytes:
+            files = self._result_files()
+            self._disk_bytes = sum(size for _, _, size in files)
+            for _, old_path, size in files:
+                if self._disk_bytes <= self.max_disk_bytes:
+                    break
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+                self._disk_bytes -= size
+                self.stats['result_evictions'] += 1
+
+    def factorization(self, model, sparse=None, key=None):
+        """
+        Return the factorized equilibrium matrix of a statically determined model.
+
+        Parameters:
+            model (TrussModel or SpaceTrussModel): The truss model.
+            sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+            key (str): The geometry key of the model, computed if None.
+
+        Returns:
+            solver.Factorization: The cached or new factorization.
+        """
+        key = key or geometry_key(model)
+        factorization = self._factorizations.get(key)
+        if factorization is not None:
+            self._factorizations.move_to_end(key)
+            self.stats['factorization_hits'] += 1
+            return factorization
+
+        self.stats['factorization_misses'] += 1
+        reaction_nodes, reaction_directions = model.reaction_arrays()
+        sparse = solver.use_sparse(model.num_members + len(reaction_nodes), sparse)
+        coefficient_matrix = solver.equilibrium_matrix(model.coordinates, model.members, reaction_nodes, reaction_directions, sparse, model.dimensions)
+        factorization = solver.factorize(coefficient_matrix)
+        self._factorizations[key] = factorization
+        while len(self._factorizations) > self.max_factorizations:
+            self._factorizations.popitem(last=False)
+            self.stats['factorization_evictions'] += 1
+        return factorization
+
+    def calculate_forces(self, model, sparse=None):
+        """
+        Calculate the member and reaction forces of a model, using the cache.
+
+        Redundant trusses are solved with the stiffness method as in
+        functions.calculate_forces; only their results are cached.
+
+        Parameters:
+            model (TrussModel or SpaceTrussModel): The truss model.
+            sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+
+        Returns:
+            tuple: Arrays of member forces and reaction forces, also stored in
+                   model.forces and model.reactions.
+                   Returns (None, None) if the truss has fewer unknowns than equations.
+        """
+        geometry = geometry_key(model)
+        path = None
+        if self.cache_dir:
+            path = self._result_path(geometry, load_key(model))
+            result = self._read_result(path)
+            if result is not None:
+                self.stats['result_hits'] += 1
+                model.forces, model.reactions = result
+                return model.forces, model.reactions
+            self.stats['result_misses'] += 1
+
+        reaction_nodes, _ = model.reaction_arrays()
+        num_unknowns = model.num_members + len(reaction_nodes)
+        if num_unknowns == model.dimensions * model.num_nodes:
+            constant_matrix = solver.component_load_vector(model.num_nodes, model.load_nodes, model.load_components())
+            variables = self.factorization(model, sparse, geometry).solve(constant_matrix)
+            model.forces = variables[:model.num_members]
+            model.reactions = variables[model.num_members:]
+        elif functions.calculate_forces(model, sparse)[0] is None:
+            return None, None
+
+        if path:
+            self._write_result(path, model.forces, model.reactions)
+        return model.forces, model.reactions
+
+    def invalidate(self, model=None):
+        """
+        Remove cached factorizations and results.
+
+        Parameters:
+            model (TrussModel or SpaceTrussModel): Remove only the entries of this model's geometry,
+                                or everything if None.
+        """
+        geometry = geometry_key(model) if model is not None else None
+        if geometry is None:
+            self._factorizations.clear()
+        else:
+            self._factorizations.pop(geometry, None)
+
+        if self.cache_dir:
+            for _, path, size in self._result_files():
+                if geometry is None or os.path.basename(path).startswith(geometry + '-'):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    self._disk_bytes -= size
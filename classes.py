@@ -2,10 +2,16 @@
 # Classes for TrussSim
 
 import math
+import numpy as np
+
+# Restrained axes of the support types of space trusses; any other type is read as the axes it names, e.g. 'xz'
+SPACE_SUPPORT_AXES = {'pin': 'xyz', 'roller': 'z'}
 
 
 class Node:
     """Class representing a node in the truss structure."""
+    __slots__ = ('name', 'x', 'y')
+
     def __init__(self, name, x, y):
         """
         Initialize a Node object.
@@ -24,25 +30,41 @@ class Node:
 
 class Connection:
     """Class representing a connection (edge) between two nodes in the truss structure."""
-    def __init__(self, node1, node2):
+    __slots__ = ('node1', 'node2', 'name', 'elastic_modulus', 'area', 'force')
+
+    def __init__(self, node1, node2, elastic_modulus=1.0, area=1.0):
         """
         Initialize a Connection object.
 
         Parameters:
             node1 (Node): First node connected by the connection.
             node2 (Node): Second node connected by the connection.
+            elastic_modulus (float): Modulus of elasticity E, only needed for statically indeterminate trusses.
+            area (float): Cross-section area A, only needed for statically indeterminate trusses.
         """
         self.node1 = node1
         self.node2 = node2
+        self.elastic_modulus = elastic_modulus
+        self.area = area
         self.name = node1.name + node2.name  # Generate name based on connected nodes
-        self.length = math.sqrt((node2.x - node1.x)**2 + (node2.y - node1.y)**2)  # Calculate length
-        self.angle_degrees = math.degrees(math.atan2(node2.y - node1.y, node2.x - node1.x))  # Calculate angle in degrees
+
+    @property
+    def length(self):
+        """Length of the connection, calculated on access."""
+        return math.sqrt((self.node2.x - self.node1.x)**2 + (self.node2.y - self.node1.y)**2)
+
+    @property
+    def angle_degrees(self):
+        """Angle of the connection in degrees, calculated on access."""
+        return math.degrees(math.atan2(self.node2.y - self.node1.y, self.node2.x - self.node1.x))
 
     def __str__(self):
         return f"Connection {self.name} between {self.node1.name} and {self.node2.name} with length {self.length} and angle {self.angle_degrees} degrees"
     
 class Support:
     """Class representing a support node in the truss structure."""
+    __slots__ = ('node', 'support_type')
+
     def __init__(self, node, support_type):
         """
         Initialize a Support object.
@@ -68,6 +90,8 @@ class Support:
 
 class Force:
     """Class representing a force applied to a node in the truss structure."""
+    __slots__ = ('node', 'magnitude', 'angle_radians')
+
     def __init__(self, node, magnitude, angle_degrees):
         """
         Initialize a Force object.
@@ -86,6 +110,8 @@ class Force:
 
 class Load(Force):
     """Class representing a load applied to a node in the truss structure."""
+    __slots__ = ('angle_degrees',)
+
     def __init__(self, node, magnitude, angle_degrees):
         """
         Initialize a Load object.
@@ -100,6 +126,8 @@ class Load(Force):
 
 class Reaction(Force):
     """Class representing a reaction force at a support node in the truss structure."""
+    __slots__ = ()
+
     def __init__(self, node, magnitude, angle_degrees):
         """
         Initialize a Reaction object.
@@ -113,6 +141,8 @@ class Reaction(Force):
 
 class ReactionX(Reaction):
     """Class representing a reaction force in the x-direction at a support node."""
+    __slots__ = ()
+
     def __init__(self, node, magnitude):
         """
         Initialize a ReactionX object.
@@ -128,6 +158,8 @@ class ReactionX(Reaction):
 
 class ReactionY(Reaction):
     """Class representing a reaction force in the y-direction at a support node."""
+    __slots__ = ()
+
     def __init__(self, node, magnitude):
         """
         Initialize a ReactionY object.
@@ -139,4 +171,434 @@ class ReactionY(Reaction):
         super().__init__(node, magnitude, 90)  # Angle is 90 degrees for reaction in y-direction
 
     def __str__(self):
-        return f"Reaction force in the y-direction at node {self.node.name}, magnitude: {self.magnitude}"
\ No newline at end of file
+        return f"Reaction force in the y-direction at node {self.node.name}, magnitude: {self.magnitude}"
+
+class TrussModel:
+    """
+    Compact struct-of-arrays representation of a truss structure.
+
+    Instead of one Python object per node, member, support and load the model
+    keeps everything in NumPy arrays. Node, Connection, Support and Load objects
+    are only created on demand through the view methods.
+
+    Attributes:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, 2).
+        members (numpy.ndarray): Node indices of every member, int32, shape (members, 2).
+        support_nodes (numpy.ndarray): Node index of every support, int32.
+        support_types (numpy.ndarray): Type of every support ('pin' or 'roller').
+        load_nodes (numpy.ndarray): Node index of every load, int32.
+        load_magnitudes (numpy.ndarray): Magnitude of every load.
+        load_angles (numpy.ndarray): Angle of every load in degrees.
+        load_cases (dict): Named load cases, each an array of [node_index, magnitude, angle_degrees] rows.
+        combinations (dict): Named load combinations, each a dictionary of load case name -> factor.
+        elastic_moduli (numpy.ndarray): Modulus of elasticity E of every member.
+        areas (numpy.ndarray): Cross-section area A of every member.
+        forces (numpy.ndarray): Calculated member forces, None until solved.
+        reactions (numpy.ndarray): Calculated reaction forces, None until solved.
+        displacements (numpy.ndarray): Calculated nodal displacements, shape (nodes, 2),
+                                       None until solved with the stiffness method.
+    """
+    dimensions = 2
+
+    def __init__(self, coordinates, members, support_nodes=(), support_types=(), load_nodes=(), load_magnitudes=(), load_angles=(), load_cases=None,
+                 elastic_moduli=1.0, areas=1.0, combinations=None):
+        """
+        Initialize a TrussModel object.
+
+        Parameters:
+            coordinates (array_like): Node coordinates, shape (nodes, 2).
+            members (array_like): Node indices of every member, shape (members, 2).
+            support_nodes (array_like): Node index of every support.
+            support_types (array_like): Type of every support ('pin' or 'roller').
+            load_nodes (array_like): Node index of every load.
+            load_magnitudes (array_like): Magnitude of every load.
+            load_angles (array_like): Angle of every load in degrees.
+            load_cases (dict): Named load cases, each a list of [node_index, magnitude, angle_degrees] rows.
+            elastic_moduli (float or array_like): Modulus of elasticity E, for all members or per member.
+            areas (float or array_like): Cross-section area A, for all members or per member.
+            combinations (dict): Named load combinations, each a dictionary of load case name -> factor,
+                                 e.g. {'ULS1': {'dead': 1.2, 'live': 1.6}}.
+        """
+        self.coordinates = np.ascontiguousarray(coordinates, dtype=float).reshape(-1, 2)
+        self.members = np.ascontiguousarray(members, dtype=np.int32).reshape(-1, 2)
+        self.support_nodes = np.asarray(support_nodes, dtype=np.int32)
+        self.support_types = np.asarray(support_types, dtype=str)
+        self.load_nodes = np.asarray(load_nodes, dtype=np.int32)
+        self.load_magnitudes = np.asarray(load_magnitudes, dtype=float)
+        self.load_angles = np.asarray(load_angles, dtype=float)
+        self.load_cases = {str(name): np.asarray(case_loads, dtype=float).reshape(-1, 3) for name, case_loads in (load_cases or {}).items()}
+        self.elastic_moduli = np.ascontiguousarray(np.broadcast_to(np.asarray(elastic_moduli, dtype=float), (len(self.members),)))
+        self.areas = np.ascontiguousarray(np.broadcast_to(np.asarray(areas, dtype=float), (len(self.members),)))
+        self.combinations = {str(name): {str(case): float(factor) for case, factor in factors.items()} for name, factors in (combinations or {}).items()}
+        self.forces = None
+        self.reactions = None
+        self.displacements = None
+        self._lengths = None
+        self._angles_degrees = None
+
+    def __str__(self):
+        return f"TrussModel with {self.num_nodes} nodes, {self.num_members} members, {len(self.support_nodes)} supports and {len(self.load_nodes)} loads"
+
+    @property
+    def num_nodes(self):
+        """Number of nodes."""
+        return len(self.coordinates)
+
+    @property
+    def num_members(self):
+        """Number of members."""
+        return len(self.members)
+
+    @property
+    def lengths(self):
+        """Member lengths, calculated on first access."""
+        if self._lengths is None:
+            delta = self.coordinates[self.members[:, 1]] - self.coordinates[self.members[:, 0]]
+            self._lengths = np.hypot(delta[:, 0], delta[:, 1])
+        return self._lengths
+
+    @property
+    def angles_degrees(self):
+        """Member angles in degrees, calculated on first access."""
+        if self._angles_degrees is None:
+            delta = self.coordinates[self.members[:, 1]] - self.coordinates[self.members[:, 0]]
+            self._angles_degrees = np.degrees(np.arctan2(delta[:, 1], delta[:, 0]))
+        return self._angles_degrees
+
+    def load_case_arrays(self, load_cases=None):
+        """
+        Flatten load cases into index arrays.
+
+        Parameters:
+            load_cases (dict): Named load cases, defaults to the load cases of the model.
+
+        Returns:
+            tuple: Case names, and load case index, node index, magnitude and angle in degrees of every load.
+        """
+        load_cases = self.load_cases if load_cases is None else load_cases
+        names = list(load_cases)
+        case_loads = [np.asarray(load_cases[name], dtype=float).reshape(-1, 3) for name in names]
+        counts = [len(loads) for loads in case_loads]
+        stacked = np.concatenate(case_loads) if case_loads else np.zeros((0, 3))
+        load_case_index = np.repeat(np.arange(len(names)), counts)
+        return names, load_case_index, stacked[:, 0].astype(np.int32), stacked[:, 1], stacked[:, 2]
+
+    def load_components(self):
+        """Components (fx, fy) of every load, shape (loads, 2)."""
+        angles = np.radians(self.load_angles)
+        return self.load_magnitudes[:, None] * np.column_stack([np.cos(angles), np.sin(angles)])
+
+    def invalidate(self):
+        """Discard cached lengths, angles and results after the arrays were modified in place."""
+        self._lengths = None
+        self._angles_degrees = None
+        self.forces = None
+        self.reactions = None
+        self.displacements = None
+
+    def reaction_arrays(self):
+        """
+        Get the reaction forces implied by the supports.
+
+        The order matches functions.calculate_reaction_forces: a pin support gives
+        an x and a y reaction, a roller support a y reaction.
+
+        Returns:
+            tuple: Node index and direction (0 for x, 1 for y) of every reaction force.
+        """
+        pin = self.support_types == 'pin'
+        roller = self.support_types == 'roller'
+        counts = pin * 2 + roller
+        reaction_nodes = np.repeat(self.support_nodes, counts)
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        # Pins contribute (x, y), rollers only y
+        reaction_directions = np.arange(len(reaction_nodes)) - first + np.repeat(roller, counts)
+        return reaction_nodes.astype(np.int32), reaction_directions.astype(np.int32)
+
+    @staticmethod
+    def node_name(index):
+        """
+        Name of the node with the given index, matching functions.import_json.
+
+        Nodes are named like spreadsheet columns: A to Z, then AA, AB, ..., so the
+        names stay printable for any number of nodes.
+        """
+        name = ""
+        index += 1
+        while index > 0:
+            index, letter = divmod(index - 1, 26)
+            name = chr(65 + letter) + name
+        return name
+
+    def node(self, index):
+        """Create a Node view of the node with the given index."""
+        x, y = self.coordinates[index]
+        return Node(self.node_name(index), float(x), float(y))
+
+    def to_objects(self):
+        """
+        Create Node, Connection, Support and Load objects from the model.
+
+        If the model has been solved, the member forces are attached to the
+        connections as Force objects, like functions.calculate_forces does.
+
+        Returns:
+            tuple: A tuple containing lists of nodes, connections, supports, and loads.
+        """
+        nodes = [Node(self.node_name(i), x, y) for i, (x, y) in enumerate(self.coordinates.tolist())]
+        connections = [Connection(nodes[i], nodes[j], elastic_modulus, area)
+                       for (i, j), elastic_modulus, area in zip(self.members.tolist(), self.elastic_moduli.tolist(), self.areas.tolist())]
+        if self.forces is not None:
+            for connection, force_magnitude in zip(connections, self.forces.tolist()):
+                connection.force = Force(connection.node1, force_magnitude, connection.angle_degrees)
+        supports = [Support(nodes[i], str(support_type)) for i, support_type in zip(self.support_nodes.tolist(), self.support_types)]
+        loads = [Load(nodes[i], magnitude, angle) for i, magnitude, angle in zip(self.load_nodes.tolist(), self.load_magnitudes.tolist(), self.load_angles.tolist())]
+        return nodes, connections, supports, loads
+
+    def reaction_objects(self, nodes):
+        """
+        Create ReactionX and ReactionY objects for the supports.
+
+        Parameters:
+            nodes (list): Node objects as returned by to_objects.
+
+        Returns:
+            list: List of Reaction objects, with calculated magnitudes if the model has been solved.
+        """
+        reaction_nodes, reaction_directions = self.reaction_arrays()
+        magnitudes = self.reactions.tolist() if self.reactions is not None else [0] * len(reaction_nodes)
+        return [ReactionX(nodes[i], magnitude) if direction == 0 else ReactionY(nodes[i], magnitude)
+                for i, direction, magnitude in zip(reaction_nodes.tolist(), reaction_directions.tolist(), magnitudes)]
+
+    @classmethod
+    def from_dict(cls, truss_data):
+        """
+        Create a TrussModel from truss data in the JSON layout.
+
+        Parameters:
+            truss_data (dict): Dictionary with 'nodes', 'connections', 'supports', 'loads'
+                               and optionally 'load_cases', 'combinations', 'elastic_modulus'
+                               and 'area' (a single value or one value per connection).
+
+        Returns:
+            TrussModel: The truss model.
+        """
+        supports_data = truss_data.get('supports', {})
+        loads_data = np.asarray(truss_data.get('loads', []), dtype=float).reshape(-1, 3)
+        return cls(
+            truss_data.get('nodes', []),
+            truss_data.get('connections', []),
+            [int(node_index) for node_index in supports_data.keys()],
+            list(supports_data.values()),
+            loads_data[:, 0],
+            loads_data[:, 1],
+            loads_data[:, 2],
+            truss_data.get('load_cases'),
+            truss_data.get('elastic_modulus', 1.0),
+            truss_data.get('area', 1.0),
+            truss_data.get('combinations'),
+        )
+
+    def to_dict(self):
+        """
+        Convert the model to truss data in the JSON layout.
+
+        Returns:
+            dict: Dictionary with 'nodes', 'connections', 'supports', 'loads' and, if defined,
+                  'load_cases', 'combinations', 'elastic_modulus' and 'area'.
+        """
+        truss_data = {
+            'nodes': self.coordinates.tolist(),
+            'connections': self.members.tolist(),
+            'supports': {str(i): str(support_type) for i, support_type in zip(self.support_nodes.tolist(), self.support_types)},
+            'loads': [[i, magnitude, angle] for i, magnitude, angle in zip(self.load_nodes.tolist(), self.load_magnitudes.tolist(), self.load_angles.tolist())],
+        }
+        for key, values in (('elastic_modulus', self.elastic_moduli), ('area', self.areas)):
+            if np.any(values != 1.0):
+                truss_data[key] = values[0].item() if np.all(values == values[0]) else values.tolist()
+        if self.load_cases:
+            truss_data['load_cases'] = {name: [[int(i), magnitude, angle] for i, magnitude, angle in case_loads.tolist()] for name, case_loads in self.load_cases.items()}
+        if self.combinations:
+            truss_data['combinations'] = {name: dict(factors) for name, factors in self.combinations.items()}
+        return truss_data
+
+    @classmethod
+    def from_objects(cls, nodes, connections, supports, loads):
+        """
+        Create a TrussModel from Node, Connection, Support and Load objects.
+
+        Parameters:
+            nodes (list): List of Node objects.
+            connections (list): List of Connection objects.
+            supports (list): List of Support objects.
+            loads (list): List of Load objects.
+
+        Returns:
+            TrussModel: The truss model.
+        """
+        node_index = {id(node): index for index, node in enumerate(nodes)}
+        return cls(
+            [(node.x, node.y) for node in nodes],
+            [(node_index[id(connection.node1)], node_index[id(connection.node2)]) for connection in connections],
+            [node_index[id(support.node)] for support in supports],
+            [support.support_type for support in supports],
+            [node_index[id(load.node)] for load in loads],
+            [load.magnitude for load in loads],
+            [math.degrees(load.angle_radians) for load in loads],
+            elastic_moduli=[connection.elastic_modulus for connection in connections],
+            areas=[connection.area for connection in connections],
+        )
+
+class SpaceTrussModel:
+    """
+    Struct-of-arrays representation of a space (3D) truss.
+
+    The counterpart of TrussModel with three coordinates and three degrees of freedom
+    per node. Loads are vectors (fx, fy, fz) instead of a magnitude and an in-plane
+    angle, and a support restrains the axes named by its type: 'pin' restrains x, y
+    and z, 'roller' only z, and any other type the axes it lists, such as 'xz'.
+
+    Attributes:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, 3).
+        members (numpy.ndarray): Node indices of every member, int32, shape (members, 2).
+        support_nodes (numpy.ndarray): Node index of every support, int32.
+        support_types (numpy.ndarray): Type of every support ('pin', 'roller' or restrained axes such as 'xy').
+        load_nodes (numpy.ndarray): Node index of every load, int32.
+        load_vectors (numpy.ndarray): Components of every load, shape (loads, 3).
+        elastic_moduli (numpy.ndarray): Modulus of elasticity E of every member.
+        areas (numpy.ndarray): Cross-section area A of every member.
+        forces (numpy.ndarray): Calculated member forces, None until solved.
+        reactions (numpy.ndarray): Calculated reaction forces, None until solved.
+        displacements (numpy.ndarray): Calculated nodal displacements, shape (nodes, 3),
+                                       None until solved with the stiffness method.
+    """
+    dimensions = 3
+
+    def __init__(self, coordinates, members, support_nodes=(), support_types=(), load_nodes=(), load_vectors=(), elastic_moduli=1.0, areas=1.0):
+        """
+        Initialize a SpaceTrussModel object.
+
+        Parameters:
+            coordinates (array_like): Node coordinates, shape (nodes, 3).
+            members (array_like): Node indices of every member, shape (members, 2).
+            support_nodes (array_like): Node index of every support.
+            support_types (array_like): Type of every support.
+            load_nodes (array_like): Node index of every load.
+            load_vectors (array_like): Components (fx, fy, fz) of every load, shape (loads, 3).
+            elastic_moduli (float or array_like): Modulus of elasticity E, for all members or per member.
+            areas (float or array_like): Cross-section area A, for all members or per member.
+        """
+        self.coordinates = np.ascontiguousarray(coordinates, dtype=float).reshape(-1, 3)
+        self.members = np.ascontiguousarray(members, dtype=np.int32).reshape(-1, 2)
+        self.support_nodes = np.asarray(support_nodes, dtype=np.int32)
+        self.support_types = np.asarray(support_types, dtype=str)
+        self.load_nodes = np.asarray(load_nodes, dtype=np.int32)
+        self.load_vectors = np.ascontiguousarray(load_vectors, dtype=float).reshape(-1, 3)
+        self.elastic_moduli = np.ascontiguousarray(np.broadcast_to(np.asarray(elastic_moduli, dtype=float), (len(self.members),)))
+        self.areas = np.ascontiguousarray(np.broadcast_to(np.asarray(areas, dtype=float), (len(self.members),)))
+        self.forces = None
+        self.reactions = None
+        self.displacements = None
+        self._lengths = None
+
+    def __str__(self):
+        return f"SpaceTrussModel with {self.num_nodes} nodes, {self.num_members} members, {len(self.support_nodes)} supports and {len(self.load_nodes)} loads"
+
+    @property
+    def num_nodes(self):
+        """Number of nodes."""
+        return len(self.coordinates)
+
+    @property
+    def num_members(self):
+        """Number of members."""
+        return len(self.members)
+
+    @property
+    def lengths(self):
+        """Member lengths, calculated on first access."""
+        if self._lengths is None:
+            delta = self.coordinates[self.members[:, 1]] - self.coordinates[self.members[:, 0]]
+            self._lengths = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+        return self._lengths
+
+    def load_components(self):
+        """Components (fx, fy, fz) of every load, shape (loads, 3)."""
+        return self.load_vectors
+
+    def invalidate(self):
+        """Discard cached lengths and results after the arrays were modified in place."""
+        self._lengths = None
+        self.forces = None
+        self.reactions = None
+        self.displacements = None
+
+    def reaction_arrays(self):
+        """
+        Get the reaction forces implied by the supports.
+
+        Every support gives one reaction per restrained axis, in x, y, z order.
+
+        Returns:
+            tuple: Node index and direction (0 for x, 1 for y, 2 for z) of every reaction force.
+
+        Raises:
+            ValueError: If a support type names no axis or an unknown one.
+        """
+        restrained = np.zeros((len(self.support_types), 3), dtype=bool)
+        # Few distinct types even for large models, so parse each type once
+        types, inverse = np.unique(self.support_types, return_inverse=True)
+        for index, support_type in enumerate(types):
+            axes = SPACE_SUPPORT_AXES.get(support_type, support_type)
+            if not axes or set(axes) - set('xyz'):
+                raise ValueError(f"Unknown support type '{support_type}'")
+            restrained[inverse == index] = ['x' in axes, 'y' in axes, 'z' in axes]
+        support_index, reaction_directions = np.nonzero(restrained)
+        return self.support_nodes[support_index].astype(np.int32), reaction_directions.astype(np.int32)
+
+    @classmethod
+    def from_dict(cls, truss_data):
+        """
+        Create a SpaceTrussModel from truss data in the JSON layout.
+
+        The layout is the one of TrussModel with [x, y, z] nodes and [node_index, fx, fy, fz] loads.
+
+        Parameters:
+            truss_data (dict): Dictionary with 'nodes', 'connections', 'supports', 'loads'
+                               and optionally 'elastic_modulus' and 'area'
+                               (a single value or one value per connection).
+
+        Returns:
+            SpaceTrussModel: The truss model.
+        """
+        supports_data = truss_data.get('supports', {})
+        loads_data = np.asarray(truss_data.get('loads', []), dtype=float).reshape(-1, 4)
+        return cls(
+            truss_data.get('nodes', []),
+            truss_data.get('connections', []),
+            [int(node_index) for node_index in supports_data.keys()],
+            list(supports_data.values()),
+            loads_data[:, 0],
+            loads_data[:, 1:],
+            truss_data.get('elastic_modulus', 1.0),
+            truss_data.get('area', 1.0),
+        )
+
+    def to_dict(self):
+        """
+        Convert the model to truss data in the JSON layout.
+
+        Returns:
+            dict: Dictionary with 'nodes', 'connections', 'supports', 'loads' and, if defined,
+                  'elastic_modulus' and 'area'.
+        """
+        truss_data = {
+            'nodes': self.coordinates.tolist(),
+            'connections': self.members.tolist(),
+            'supports': {str(i): str(support_type) for i, support_type in zip(self.support_nodes.tolist(), self.support_types)},
+            'loads': [[i, *vector] for i, vector in zip(self.load_nodes.tolist(), self.load_vectors.tolist())],
+        }
+        for key, values in (('elastic_modulus', self.elastic_moduli), ('area', self.areas)):
+            if np.any(values != 1.0):
+                truss_data[key] = values[0].item() if np.all(values == values[0]) else values.tolist()
+        return truss_data
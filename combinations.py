@@ -0,0 +1,225 @@
+# combinations.py
+# Load combinations and envelopes for TrussSim
+
+import numpy as np
+import functions  # type: ignore
+
+# Memory bound of one chunk of combined results, used when no chunk size is given
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+
+def combination_matrix(combinations, case_names):
+    """
+    Build the factor matrix of load combinations.
+
+    Parameters:
+        combinations (dict): Named load combinations, each a dictionary of load case name -> factor.
+        case_names (list): Names of the load cases, in the order of the load case results.
+
+    Returns:
+        numpy.ndarray: Factors with shape (combinations, cases).
+
+    Raises:
+        ValueError: If a combination refers to an unknown load case.
+    """
+    case_index = {name: index for index, name in enumerate(case_names)}
+    factors = np.zeros((len(combinations), len(case_names)))
+    for row, (name, case_factors) in enumerate(combinations.items()):
+        for case, factor in case_factors.items():
+            if case not in case_index:
+                raise ValueError(f"Combination '{name}' refers to unknown load case '{case}'")
+            factors[row, case_index[case]] += factor
+    return factors
+
+class Envelope:
+    """
+    Running maximum and minimum of results over combinations, with the governing combinations.
+
+    Attributes:
+        maximum (numpy.ndarray): Largest value of every member or reaction.
+        maximum_combination (numpy.ndarray): Index of the combination giving the largest value,
+                                             -1 while there is none (no combinations or NaN results).
+        minimum (numpy.ndarray): Smallest value of every member or reaction.
+        minimum_combination (numpy.ndarray): Index of the combination giving the smallest value.
+    """
+    def __init__(self, size):
+        """
+        Initialize an Envelope object.
+
+        Parameters:
+            size (int): Number of members or reactions.
+        """
+        self.maximum = np.full(size, -np.inf)
+        self.maximum_combination = np.full(size, -1, dtype=np.int32)
+        self.minimum = np.full(size, np.inf)
+        self.minimum_combination = np.full(size, -1, dtype=np.int32)
+
+    def update(self, start, values):
+        """
+        Add the results of consecutive combinations.
+
+        Parameters:
+            start (int): Index of the first combination.
+            values (numpy.ndarray): Results with shape (combinations, size).
+        """
+        if len(values) == 0:
+            return
+        columns = np.arange(values.shape[1])
+        rows = values.argmax(axis=0)
+        larger = values[rows, columns] > self.maximum
+        self.maximum[larger] = values[rows, columns][larger]
+        self.maximum_combination[larger] = start + rows[larger]
+        rows = values.argmin(axis=0)
+        smaller = values[rows, columns] < self.minimum
+        self.minimum[smaller] = values[rows, columns][smaller]
+        self.minimum_combination[smaller] = start + rows[smaller]
+
+class CombinationResults:
+    """
+    Member and reaction forces of load combinations.
+
+    The truss is linear, so the result of a combination is the factored sum of the
+    load case results: forces = factors @ case_forces. The load cases are solved
+    once and the combinations are formed by matrix products on demand, in chunks
+    of combinations if all of them would not fit in MAX_CHUNK_BYTES.
+
+    Attributes:
+        names (list): Names of the combinations.
+        case_names (list): Names of the load cases.
+        factors (numpy.ndarray): Factors with shape (combinations, cases).
+        case_forces (numpy.ndarray): Member forces of the load cases, shape (cases, members).
+        case_reactions (numpy.ndarray): Reaction forces of the load cases, shape (cases, reactions).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y, 2 for z).
+    """
+    def __init__(self, names, case_names, factors, case_forces, case_reactions, reaction_nodes, reaction_directions):
+        """
+        Initialize a CombinationResults object.
+
+        Parameters:
+            names (list): Names of the combinations.
+            case_names (list): Names of the load cases.
+            factors (array_like): Factors with shape (combinations, cases).
+            case_forces (array_like): Member forces of the load cases, shape (cases, members).
+            case_reactions (array_like): Reaction forces of the load cases, shape (cases, reactions).
+            reaction_nodes (array_like): Node index of every reaction force.
+            reaction_directions (array_like): Direction of every reaction force.
+        """
+        self.names = list(names)
+        self.case_names = list(case_names)
+        self.factors = np.asarray(factors, dtype=float).reshape(len(self.names), len(self.case_names))
+        self.case_forces = np.asarray(case_forces, dtype=float)
+        self.case_reactions = np.asarray(case_reactions, dtype=float)
+        self.reaction_nodes = np.asarray(reaction_nodes)
+        self.reaction_directions = np.asarray(reaction_directions)
+
+    @property
+    def num_combinations(self):
+        """Number of combinations."""
+        return len(self.names)
+
+    @property
+    def num_members(self):
+        """Number of members."""
+        return self.case_forces.shape[1]
+
+    @property
+    def num_reactions(self):
+        """Number of reaction forces."""
+        return self.case_reactions.shape[1]
+
+    def chunk_size(self):
+        """Number of combinations whose member and reaction forces fit in MAX_CHUNK_BYTES."""
+        return max(1, MAX_CHUNK_BYTES // (8 * max(self.num_members + self.num_reactions, 1)))
+
+    def forces(self, start=0, stop=None):
+        """
+        Member forces of a range of combinations.
+
+        Parameters:
+            start (int): Index of the first combination.
+            stop (int): Index after the last combination, defaults to all.
+
+        Returns:
+            numpy.ndarray: Member forces with shape (combinations, members).
+        """
+        return self.factors[start:stop] @ self.case_forces
+
+    def reactions(self, start=0, stop=None):
+        """
+        Reaction forces of a range of combinations.
+
+        Parameters:
+            start (int): Index of the first combination.
+            stop (int): Index after the last combination, defaults to all.
+
+        Returns:
+            numpy.ndarray: Reaction forces with shape (combinations, reactions).
+        """
+        return self.factors[start:stop] @ self.case_reactions
+
+    def chunks(self, chunk_size=None):
+        """
+        Iterate over the combinations in chunks.
+
+        Parameters:
+            chunk_size (int): Number of combinations per chunk, by default as many as fit in MAX_CHUNK_BYTES.
+
+        Yields:
+            tuple: Index of the first combination, member forces with shape (chunk, members)
+                   and reaction forces with shape (chunk, reactions).
+        """
+        chunk_size = self.chunk_size() if chunk_size is None else max(1, chunk_size)
+        for start in range(0, self.num_combinations, chunk_size):
+            stop = min(start + chunk_size, self.num_combinations)
+            yield start, self.forces(start, stop), self.reactions(start, stop)
+
+    def envelopes(self, chunk_size=None):
+        """
+        Envelopes of the member and reaction forces over all combinations.
+
+        Parameters:
+            chunk_size (int): Number of combinations per chunk, by default as many as fit in MAX_CHUNK_BYTES.
+
+        Returns:
+            tuple: Envelope of the member forces and Envelope of the reaction forces.
+        """
+        member_envelope = Envelope(self.num_members)
+        reaction_envelope = Envelope(self.num_reactions)
+        for start, forces, reactions in self.chunks(chunk_size):
+            member_envelope.update(start, forces)
+            reaction_envelope.update(start, reactions)
+        return member_envelope, reaction_envelope
+
+def calculate_combinations(model, combinations=None, sparse=None):
+    """
+    Solve the load cases of a truss once and combine them.
+
+    Redundant trusses are solved with the direct stiffness method. A model without
+    named load cases, such as a space truss, has its loads as the single load case
+    functions.BASE_LOAD_CASE.
+
+    Parameters:
+        model (TrussModel or SpaceTrussModel): The truss model.
+        combinations (dict): Named load combinations, each a dictionary of load case name -> factor.
+                             Defaults to model.combinations; without any, every load case is a
+                             combination of its own with factor 1.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+
+    Returns:
+        CombinationResults: The results of the combinations.
+                            Returns None if the truss has fewer unknowns than equations.
+
+    Raises:
+        ValueError: If a combination refers to an unknown load case.
+        numpy.linalg.LinAlgError: If the truss is unstable.
+    """
+    combinations = getattr(model, 'combinations', None) if combinations is None else combinations
+    case_names, case_forces, case_reactions = functions.calculate_load_cases(model, sparse=sparse)
+    if case_names is None:
+        return None
+    if combinations:
+        names, factors = list(combinations), combination_matrix(combinations, case_names)
+    else:
+        names, factors = case_names, np.eye(len(case_names))
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    return CombinationResults(names, case_names, factors, case_forces, case_reactions, reaction_nodes, reaction_directions)
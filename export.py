@@ -0,0 +1,183 @@
+# export.py
+# Streaming result export for TrussSim
+
+import argparse
+import os
+import sys
+import numpy as np
+import combinations  # type: ignore
+import functions  # type: ignore
+import storage  # type: ignore
+
+# Rows formatted and written to a CSV file at once
+CSV_CHUNK_ROWS = 65536
+DIRECTIONS = 'xyz'
+
+def _csv_field(text):
+    """Quote a CSV field if needed."""
+    text = str(text)
+    if any(character in text for character in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+def _write_rows(file, prefixes, values):
+    """Write CSV rows made of a text prefix and a float value, in blocks of CSV_CHUNK_ROWS."""
+    for start in range(0, len(values), CSV_CHUNK_ROWS):
+        # repr is the shortest text that reads back as the same float
+        file.write(''.join([f"{prefix}{value!r}\n" for prefix, value in zip(prefixes[start:start + CSV_CHUNK_ROWS], values[start:start + CSV_CHUNK_ROWS].tolist())]))
+
+def write_csv(results, output_dir, prefix='results', chunk_size=None):
+    """
+    Write the results of load combinations to CSV files, one combination chunk at a time.
+
+    Three files are written:
+    '<prefix>_member_forces.csv' (combination, member, force),
+    '<prefix>_reactions.csv' (combination, node, direction, magnitude) and
+    '<prefix>_envelope.csv' (member, max_force, max_combination, min_force, min_combination).
+
+    Parameters:
+        results (CombinationResults): The results, e.g. from combinations.calculate_combinations.
+        output_dir (str): Directory of the CSV files.
+        prefix (str): Start of the file names.
+        chunk_size (int): Number of combinations combined at once, see CombinationResults.chunks.
+
+    Returns:
+        dict: Path of every written file, by table name.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {table: os.path.join(output_dir, f"{prefix}_{table}.csv") for table in ('member_forces', 'reactions', 'envelope')}
+    names = [_csv_field(name) for name in results.names]
+    member_prefixes = [f"{member}," for member in range(results.num_members)]
+    reaction_prefixes = [f"{node},{DIRECTIONS[direction]},"
+                         for node, direction in zip(results.reaction_nodes.tolist(), results.reaction_directions.tolist())]
+    envelope = combinations.Envelope(results.num_members)
+    # A member without a governing combination (-1) gets an empty name
+    envelope_names = names + ['']
+
+    with open(paths['member_forces'], 'w', newline='') as forces_file, open(paths['reactions'], 'w', newline='') as reactions_file:
+        forces_file.write("combination,member,force\n")
+        reactions_file.write("combination,node,direction,magnitude\n")
+        for start, forces, reactions in results.chunks(chunk_size):
+            envelope.update(start, forces)
+            for offset in range(len(forces)):
+                name = names[start + offset]
+                _write_rows(forces_file, [f"{name},{member_prefix}" for member_prefix in member_prefixes], forces[offset])
+                _write_rows(reactions_file, [f"{name},{reaction_prefix}" for reaction_prefix in reaction_prefixes], reactions[offset])
+
+    with open(paths['envelope'], 'w', newline='') as file:
+        file.write("member,max_force,max_combination,min_force,min_combination\n")
+        for member, maximum, maximum_combination, minimum, minimum_combination in zip(
+                range(results.num_members), envelope.maximum.tolist(), envelope.maximum_combination.tolist(),
+                envelope.minimum.tolist(), envelope.minimum_combination.tolist()):
+            file.write(f"{member},{maximum!r},{envelope_names[maximum_combination]},{minimum!r},{envelope_names[minimum_combination]}\n")
+    return paths
+
+def write_columnar(results, file_path, chunk_size=None):
+    """
+    Write the results of load combinations to a columnar binary file, one combination chunk at a time.
+
+    The file has the layout of storage.save_binary: every column is one contiguous array
+    that load_arrays memory-maps. Member forces and reactions are long tables with one row
+    per combination and member (or reaction), ordered by combination; the envelope has
+    one row per member. The combination names are in the header.
+
+    Columns:
+        member_forces/combination, member_forces/member, member_forces/force,
+        reactions/combination, reactions/node, reactions/direction (0 for x, 1 for y, 2 for z), reactions/magnitude,
+        envelope/max_force, envelope/max_combination, envelope/min_force, envelope/min_combination
+        (-1 for a member without a governing combination).
+
+    Parameters:
+        results (CombinationResults): The results, e.g. from combinations.calculate_combinations.
+        file_path (str): Path of the binary file.
+        chunk_size (int): Number of combinations combined at once, see CombinationResults.chunks.
+    """
+    num_combinations, num_members, num_reactions = results.num_combinations, results.num_members, results.num_reactions
+    force_rows, reaction_rows = num_combinations * num_members, num_combinations * num_reactions
+    specs = {
+        'member_forces/combination': ('<i4', (force_rows,)),
+        'member_forces/member': ('<i4', (force_rows,)),
+        'member_forces/force': ('<f8', (force_rows,)),
+        'reactions/combination': ('<i4', (reaction_rows,)),
+        'reactions/node': ('<i4', (reaction_rows,)),
+        'reactions/direction': ('|i1', (reaction_rows,)),
+        'reactions/magnitude': ('<f8', (reaction_rows,)),
+        'envelope/max_force': ('<f8', (num_members,)),
+        'envelope/max_combination': ('<i4', (num_members,)),
+        'envelope/min_force': ('<f8', (num_members,)),
+        'envelope/min_combination': ('<i4', (num_members,)),
+    }
+    envelope = combinations.Envelope(num_members)
+    with storage.ArrayWriter(file_path, specs, {'combination_names': results.names, 'case_names': results.case_names}) as writer:
+        for start, forces, reactions in results.chunks(chunk_size):
+            envelope.update(start, forces)
+            count = len(forces)
+            writer.write('member_forces/combination', start * num_members, np.repeat(np.arange(start, start + count), num_members))
+            writer.write('member_forces/member', start * num_members, np.tile(np.arange(num_members), count))
+            writer.write('member_forces/force', start * num_members, forces.ravel())
+            writer.write('reactions/combination', start * num_reactions, np.repeat(np.arange(start, start + count), num_reactions))
+            writer.write('reactions/node', start * num_reactions, np.tile(results.reaction_nodes, count))
+            writer.write('reactions/direction', start * num_reactions, np.tile(results.reaction_directions, count))
+            writer.write('reactions/magnitude', start * num_reactions, reactions.ravel())
+        writer.write('envelope/max_force', 0, envelope.maximum)
+        writer.write('envelope/max_combination', 0, envelope.maximum_combination)
+        writer.write('envelope/min_force', 0, envelope.minimum)
+        writer.write('envelope/min_combination', 0, envelope.minimum_combination)
+
+def read_columnar(file_path, mmap=True):
+    """
+    Open a columnar result file written by write_columnar.
+
+    Parameters:
+        file_path (str): Path of the binary file.
+        mmap (bool): Memory-map the columns instead of reading them.
+
+    Returns:
+        tuple: Tables as a dictionary of table name -> column name -> array, and the combination names.
+    """
+    arrays, header = storage.load_arrays(file_path, mmap)
+    tables = {}
+    for name, array in arrays.items():
+        table, column = name.split('/', 1)
+        tables.setdefault(table, {})[column] = array
+    return tables, header['combination_names']
+
+def main(argv=None):
+    """
+    Command-line entry point that solves the load combinations of a truss file and exports them.
+
+    Parameters:
+        argv (list): Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code, 1 if the truss could not be solved.
+    """
+    parser = argparse.ArgumentParser(description="Solve the load combinations of a truss and export forces, reactions and envelopes.")
+    parser.add_argument("input", help="truss JSON file, optionally with load cases and combinations")
+    parser.add_argument("-o", "--output-dir", default=".", help="directory of the exported files")
+    parser.add_argument("-f", "--format", nargs="+", choices=["csv", "columnar"], default=["csv"], help="export formats")
+    parser.add_argument("-c", "--chunk-size", type=int, default=None, help="combinations combined and written at once")
+    args = parser.parse_args(argv)
+
+    model = functions.import_json(args.input, as_model=True)
+    try:
+        results = combinations.calculate_combinations(model)
+    except (ValueError, np.linalg.LinAlgError) as e:
+        print(f"Cannot solve {args.input}: {e}", file=sys.stderr)
+        return 1
+    if results is None:
+        return 1
+
+    prefix = os.path.splitext(os.path.basename(args.input))[0]
+    if "csv" in args.format:
+        for path in write_csv(results, args.output_dir, prefix, args.chunk_size).values():
+            print(f"Wrote {path}")
+    if "columnar" in args.format:
+        os.makedirs(args.output_dir, exist_ok=True)
+        path = os.path.join(args.output_dir, prefix + ".results.bin")
+        write_columnar(results, path, args.chunk_size)
+        print(f"Wrote {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,114 +2,106 @@
 # Functions for TrussSim
 
 import numpy as np
-import math
-import matplotlib.pyplot as plt
 import classes  # type: ignore
+import profiling  # type: ignore
+import solver  # type: ignore
+import space  # type: ignore
+import stiffness  # type: ignore
 import json
 
-def plot_truss_structure(connections, supports, nodes, loads, reaction_forces):
+# Name of the load case made of the loads of a model without named load cases
+BASE_LOAD_CASE = 'loads'
+
+def plot_truss_structure(connections, supports=None, nodes=None, loads=None, reaction_forces=None, ax=None, output_path=None, show=None):
     """
     Plot the truss structure.
 
+    The truss is drawn with a few collection artists (see plotting.TrussPlot), so
+    large trusses render quickly. Text labels are only drawn while few enough are in view.
+
     Parameters:
-        connections (list): List of Connection objects representing connections between nodes.
+        connections (list): List of Connection objects representing connections between nodes,
+                            or a TrussModel, in which case the other truss arguments are not needed.
         supports (list): List of Support objects representing support nodes.
         nodes (list): List of Node objects representing nodes in the truss structure.
         loads (list): List of Load objects representing loads applied to nodes.
         reaction_forces (list): List of Reaction objects representing reaction forces.
+        ax (matplotlib.axes.Axes): Axes to draw on, defaults to the current axes.
+        output_path (str): Render straight to this file (e.g. PNG or SVG) without showing a window.
+        show (bool): Call plt.show() at the end. Defaults to True unless output_path is given.
+
+    Returns:
+        plotting.TrussPlot: The plot.
     """
-    # Plot nodes
-    for node in nodes:
-        plt.plot(node.x, node.y, 'ko')  # Black dot at node coordinates
-        plt.text(node.x + 0.1, node.y + 0.1, node.name, fontsize=12)  # Name of node
-
-    # Plot truss with colored forces
-    for connection in connections:
-        node1 = connection.node1
-        node2 = connection.node2
-        if hasattr(connection, 'force'):  # Check if connection has a force attribute
-            force = connection.force
-            if isinstance(force, classes.Force):
-                if force.magnitude > 0:
-                    color = 'b'  # Blue for positive forces
-                else:
-                    color = 'r'  # Red for negative forces
-                plt.plot([node1.x, node2.x], [node1.y, node2.y], color=color)  # Color coded connection line
-                plt.text((node1.x + node2.x) / 2, (node1.y + node2.y) / 2, f"{force.magnitude:.2f}", fontsize=10, color=color)  # Display force magnitude
-        else:
-            plt.plot([node1.x, node2.x], [node1.y, node2.y], 'k-')  # Default black connection line
-
-    # Plot supports
-    for support in supports:
-        node = support.node  # Access the node attribute
-        if support.support_type == 'roller':
-            plt.plot(node.x, node.y, marker='o', markersize=10, markerfacecolor='none', markeredgewidth=2, markeredgecolor='r', label='Roller Support')
-        elif support.support_type == 'pin':
-            plt.plot(node.x, node.y, marker='o', markersize=10, markerfacecolor='none', markeredgewidth=2, markeredgecolor='b', label='Pin Support')
-
-    # Plot loads with fixed arrow length
-    arrow_length = 1.0  # Set the fixed arrow length
-    for load in loads:
-        node = load.node  # Access the node attribute
-        angle_radians = math.radians(load.angle_degrees)  # Convert angle to radians
-        dx = arrow_length * math.cos(angle_radians)  # Calculate change in x
-        dy = arrow_length * math.sin(angle_radians)  # Calculate change in y
-        plt.arrow(node.x, node.y, dx, dy, linewidth=4, head_width=0.1, head_length=0.1, fc='r', ec='r', label='Load')
-        plt.text(node.x + dx / 2, node.y + dy / 2, f"{load.magnitude:.2f}", fontsize=10, color='r')  # Display load magnitude
-
-    # Plot reaction forces with fixed arrow length
-    for force in reaction_forces:
-        node = force.node  # Access the node attribute
-        angle_radians = force.angle_radians  # Angle in radians
-        dx = arrow_length * math.cos(angle_radians)  # Calculate change in x
-        dy = arrow_length * math.sin(angle_radians)  # Calculate change in y
-        plt.arrow(node.x, node.y, dx, dy, linewidth=4, head_width=0.1, head_length=0.1, fc='g', ec='g', label='Reaction Force')
-        plt.text(node.x + dx / 2, node.y + dy / 2, f"{force.magnitude:.2f}", fontsize=10, color='g')  # Display reaction force magnitude
-
-    plt.xlabel('X-Axis')
-    plt.ylabel('Y-Axis')
-    plt.title('Truss Structure')
-    plt.grid(True)
-    plt.gca().set_aspect('equal', adjustable='box')
-    plt.show()
-    
-def import_json(file_path):
+    # Imported on first use, so solving without plotting does not load matplotlib
+    import plotting  # type: ignore
+    return plotting.plot_truss_structure(connections, supports, nodes, loads, reaction_forces, ax=ax, output_path=output_path, show=show)
+
+def import_json(file_path, as_model=False):
     """
     Import truss data from JSON.
 
     Args:
         file_path (str): Path to the JSON file containing truss data.
+        as_model (bool): Return an array-backed TrussModel instead of object lists.
 
     Returns:
         tuple: A tuple containing lists of nodes, connections, supports, and loads.
-    """
-    with open(file_path) as file:
-        truss_data = json.load(file)
+               A TrussModel if as_model is True, or a SpaceTrussModel if the nodes have
+               x, y and z coordinates.
 
-    # Extract truss data from JSON
-    nodes_data = truss_data.get('nodes', [])
-    connections_data = truss_data.get('connections', [])
-    supports_data = truss_data.get('supports', {})
-    loads_data = truss_data.get('loads', [])
-
-    # Create Node instances with names A, B, C...
-    nodes = [classes.Node(chr(65 + i), x, y) for i, (x, y) in enumerate(nodes_data)]
-
-    # Create Connection instances
-    connections = [classes.Connection(nodes[i], nodes[j]) for i, j in connections_data]
-
-    # Create Support instances
-    supports = [classes.Support(nodes[int(node_index)], support_type) for node_index, support_type in supports_data.items()]
+    Raises:
+        ValueError: If a space truss is imported without as_model.
+    """
+    with profiling.span("import"):
+        with open(file_path) as file:
+            truss_data = json.load(file)
+
+        if as_model:
+            return model_from_dict(truss_data)
+        if space.is_space_data(truss_data):
+            raise ValueError("Space trusses can only be imported as a model (as_model=True)")
+
+        # Extract truss data from JSON
+        nodes_data = truss_data.get('nodes', [])
+        connections_data = truss_data.get('connections', [])
+        supports_data = truss_data.get('supports', {})
+        loads_data = truss_data.get('loads', [])
+
+        # Create Node instances with names A, B, C, ..., Z, AA, AB, ...
+        nodes = [classes.Node(classes.TrussModel.node_name(i), x, y) for i, (x, y) in enumerate(nodes_data)]
+
+        # Create Connection instances, with the optional elastic modulus and area (one value or one per connection)
+        elastic_moduli = np.broadcast_to(np.asarray(truss_data.get('elastic_modulus', 1.0), dtype=float), (len(connections_data),)).tolist()
+        areas = np.broadcast_to(np.asarray(truss_data.get('area', 1.0), dtype=float), (len(connections_data),)).tolist()
+        connections = [classes.Connection(nodes[i], nodes[j], elastic_modulus, area) for (i, j), elastic_modulus, area in zip(connections_data, elastic_moduli, areas)]
+
+        # Create Support instances
+        supports = [classes.Support(nodes[int(node_index)], support_type) for node_index, support_type in supports_data.items()]
+
+        # Create Load instances
+        loads = []
+        for load_data in loads_data:
+            node_index, magnitude, angle_degrees = load_data
+            node = nodes[node_index]
+            load = classes.Load(node, magnitude, angle_degrees)
+            loads.append(load)
+
+        return nodes, connections, supports, loads
+
+def model_from_dict(truss_data):
+    """
+    Create a truss model from truss data in the JSON layout.
 
-    # Create Load instances
-    loads = []
-    for load_data in loads_data:
-        node_index, magnitude, angle_degrees = load_data
-        node = nodes[node_index]
-        load = classes.Load(node, magnitude, angle_degrees)
-        loads.append(load)
+    Parameters:
+        truss_data (dict): Dictionary with 'nodes', 'connections', 'supports' and 'loads', as read by import_json.
 
-    return nodes, connections, supports, loads
+    Returns:
+        TrussModel or SpaceTrussModel: A SpaceTrussModel if the nodes have x, y and z coordinates.
+    """
+    if space.is_space_data(truss_data):
+        return classes.SpaceTrussModel.from_dict(truss_data)
+    return classes.TrussModel.from_dict(truss_data)
 
 def print_all(nodes, connections, supports, loads, reaction_forces):
     """
@@ -122,43 +114,45 @@ def print_all(nodes, connections, supports, loads, reaction_forces):
         loads (list): List of Load objects representing loads applied to nodes.
         reaction_forces (list): List of Reaction objects representing reaction forces.
     """
-    print("Nodes:")
-    for node in nodes:
-        print(node)
-    print("\n")
-
-    print("Connections:")
-    for connection in connections:
-        length_rounded = round(connection.length, 2)
-        angle_degrees_rounded = round(connection.angle_degrees, 2)
-        if hasattr(connection, 'force'):  # Check if connection has a force attribute
-            force = connection.force
-            if isinstance(force, classes.Force):
-                force_magnitude_rounded = round(force.magnitude, 2)
-                print(f"Connection {connection.node1.name}{connection.node2.name} between {connection.node1.name} and {connection.node2.name} with length {length_rounded} and angle {angle_degrees_rounded} degrees Force: {force_magnitude_rounded}")
-        else:
-            print(f"Connection {connection.node1.name}{connection.node2.name} between {connection.node1.name} and {connection.node2.name} with length {length_rounded} and angle {angle_degrees_rounded} degrees")
-    print("\n")
-
-    print("Supports:")
-    for support in supports:
-        print(support)
-    print("\n")
-
-    print("Loads:")
-    for load in loads:
-        print(load)
-    print("\n")
-
-    print("Reaction forces:")
-    for force in reaction_forces:
-        force_magnitude_rounded = round(force.magnitude, 2)
-        if isinstance(force, classes.ReactionX):
-            print(f"Reaction force in the x-direction at node {force.node.name}, magnitude: {force_magnitude_rounded}")
-        elif isinstance(force, classes.ReactionY):
-            print(f"Reaction force in the y-direction at node {force.node.name}, magnitude: {force_magnitude_rounded}")
-    print("\n")
+    with profiling.span("print"):
+        print("Nodes:")
+        for node in nodes:
+            print(node)
+        print("\n")
+
+        print("Connections:")
+        for connection in connections:
+            length_rounded = round(connection.length, 2)
+            angle_degrees_rounded = round(connection.angle_degrees, 2)
+            if hasattr(connection, 'force'):  # Check if connection has a force attribute
+                force = connection.force
+                if isinstance(force, classes.Force):
+                    force_magnitude_rounded = round(force.magnitude, 2)
+                    print(f"Connection {connection.node1.name}{connection.node2.name} between {connection.node1.name} and {connection.node2.name} with length {length_rounded} and angle {angle_degrees_rounded} degrees Force: {force_magnitude_rounded}")
+            else:
+                print(f"Connection {connection.node1.name}{connection.node2.name} between {connection.node1.name} and {connection.node2.name} with length {length_rounded} and angle {angle_degrees_rounded} degrees")
+        print("\n")
+
+        print("Supports:")
+        for support in supports:
+            print(support)
+        print("\n")
+
+        print("Loads:")
+        for load in loads:
+            print(load)
+        print("\n")
+
+        print("Reaction forces:")
+        for force in reaction_forces:
+            force_magnitude_rounded = round(force.magnitude, 2)
+            if isinstance(force, classes.ReactionX):
+                print(f"Reaction force in the x-direction at node {force.node.name}, magnitude: {force_magnitude_rounded}")
+            elif isinstance(force, classes.ReactionY):
+                print(f"Reaction force in the y-direction at node {force.node.name}, magnitude: {force_magnitude_rounded}")
+        print("\n")
     
+
 def calculate_reaction_forces(supports):
     """
     Calculate reaction forces for the supports.
@@ -184,81 +178,214 @@ def calculate_reaction_forces(supports):
 
     return reaction_forces
 
-def calculate_forces(nodes, connections, supports, loads):
+def truss_arrays(nodes, connections, reaction_forces, loads):
     """
-    Calculate forces in the truss structure.
+    Convert truss objects to the index arrays used by the solver.
 
     Parameters:
         nodes (list): List of Node objects representing nodes in the truss structure.
         connections (list): List of Connection objects representing connections between nodes.
+        reaction_forces (list): List of Reaction objects representing reaction forces.
+        loads (list): List of Load objects representing loads applied to nodes.
+
+    Returns:
+        tuple: Node coordinates, member node indices, reaction node indices, reaction
+               directions (0 for x, 1 for y), load node indices, load magnitudes and
+               load angles in radians.
+    """
+    # Node -> row index, built once instead of calling nodes.index() per object
+    node_index = {id(node): index for index, node in enumerate(nodes)}
+
+    coordinates = np.array([(node.x, node.y) for node in nodes], dtype=float).reshape(-1, 2)
+    members = np.array([(node_index[id(connection.node1)], node_index[id(connection.node2)]) for connection in connections], dtype=np.intp).reshape(-1, 2)
+    reaction_nodes = np.array([node_index[id(force.node)] for force in reaction_forces], dtype=np.intp)
+    reaction_directions = np.array([0 if isinstance(force, classes.ReactionX) else 1 for force in reaction_forces], dtype=np.intp)
+    load_nodes = np.array([node_index[id(load.node)] for load in loads], dtype=np.intp)
+    load_magnitudes = np.array([load.magnitude for load in loads], dtype=float)
+    load_angles = np.array([load.angle_radians for load in loads], dtype=float)
+
+    return coordinates, members, reaction_nodes, reaction_directions, load_nodes, load_magnitudes, load_angles
+
+def calculate_forces(nodes, connections=None, supports=None, loads=None, sparse=None, reorder=False):
+    """
+    Calculate forces in the truss structure.
+
+    Parameters:
+        nodes (list): List of Node objects representing nodes in the truss structure,
+                      or a TrussModel or SpaceTrussModel, in which case the other lists are not needed.
+        connections (list): List of Connection objects representing connections between nodes.
         supports (list): List of Support objects representing support nodes.
         loads (list): List of Load objects representing loads applied to nodes.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically
+                       when the number of unknowns exceeds solver.SPARSE_THRESHOLD.
+        reorder (bool): Renumber the nodes with reverse Cuthill-McKee and use the banded
+                        solver if the resulting bandwidth is small.
+
+    Statically indeterminate (redundant) trusses are solved with the direct stiffness
+    method, using the elastic modulus and area of the connections. Space trusses
+    are solved by space.calculate_forces.
 
     Returns:
         tuple: A tuple containing updated lists of connections and reaction forces.
-               Returns None if the truss is not statically determined.
+               For a TrussModel, arrays of member forces and reaction forces, which
+               are also stored in model.forces and model.reactions.
+               Returns None if the truss has fewer unknowns than equations
+               and therefore is not statically determined.
     """
+    if isinstance(nodes, classes.SpaceTrussModel):
+        return space.calculate_forces(nodes, sparse)
+
+    if isinstance(nodes, classes.TrussModel):
+        model = nodes
+        reaction_nodes, reaction_directions = model.reaction_arrays()
+        if model.num_members + len(reaction_nodes) > 2 * model.num_nodes:
+            stiffness.calculate_displacements(model, sparse)
+            return model.forces, model.reactions
+        variables = solve_arrays(model.coordinates, model.members, reaction_nodes, reaction_directions,
+                                 model.load_nodes, model.load_magnitudes, np.radians(model.load_angles), sparse, reorder=reorder)
+        if variables is None:
+            return None, None
+        with profiling.span("write_back"):
+            model.forces = variables[:model.num_members]
+            model.reactions = variables[model.num_members:]
+        return model.forces, model.reactions
+
     # Calculate reaction forces
     reaction_forces = calculate_reaction_forces(supports)
 
-    # Statically determined check
-    if 2 * len(nodes) != len(reaction_forces) + len(connections):
-        print("Truss is not statically determined!")
+    # Map the objects to index arrays once
+    elastic_moduli = [connection.elastic_modulus for connection in connections]
+    areas = [connection.area for connection in connections]
+    variables = solve_arrays(*truss_arrays(nodes, connections, reaction_forces, loads), sparse=sparse, elastic_moduli=elastic_moduli, areas=areas, reorder=reorder)
+    if variables is None:
         return None, None  # Return None if truss is not statically determined
 
-    # Initialize the coefficient matrix with zeros
-    coefficient_matrix_rows = 2 * len(nodes)
-    coefficient_matrix_columns = len(connections) + len(reaction_forces)
-    coefficient_matrix = np.zeros((coefficient_matrix_rows, coefficient_matrix_columns))
-
-    # Initialize the constant matrix
-    constant_matrix = np.zeros(coefficient_matrix_rows)
-
-    # Populate the coefficient matrix based on connections and supports
-    for connection_index, connection in enumerate(connections):
-        node1_index = nodes.index(connection.node1)
-        node2_index = nodes.index(connection.node2)
-        L = connection.length
-        cos_theta = (connection.node2.x - connection.node1.x) / L
-        sin_theta = (connection.node2.y - connection.node1.y) / L
-
-        # Equilibrium at node1
-        coefficient_matrix[2 * node1_index][connection_index] = cos_theta
-        coefficient_matrix[2 * node1_index + 1][connection_index] = sin_theta
-
-        # Equilibrium at node2
-        coefficient_matrix[2 * node2_index][connection_index] = -cos_theta
-        coefficient_matrix[2 * node2_index + 1][connection_index] = -sin_theta
-
-    # Add reaction forces to the coefficient matrix
-    reaction_force_index = len(connections)
-    for reaction_force in reaction_forces:
-        node_index = nodes.index(reaction_force.node)
-        if isinstance(reaction_force, classes.ReactionX):
-            coefficient_matrix[2 * node_index][reaction_force_index] = 1
-        elif isinstance(reaction_force, classes.ReactionY):
-            coefficient_matrix[2 * node_index + 1][reaction_force_index] = 1
-        reaction_force_index += 1
+    with profiling.span("write_back"):
+        # Assign calculated forces to the connections as Force objects
+        for connection_index, connection in enumerate(connections):
+            force_magnitude = variables[connection_index]
+            angle_degrees = connection.angle_degrees
+            force = classes.Force(connection.node1, force_magnitude, angle_degrees)
+            connection.force = force
+
+        # Update reaction forces with calculated values
+        for reaction_force_index, reaction_force in enumerate(reaction_forces):
+            reaction_force.magnitude = variables[len(connections) + reaction_force_index]
+
+    return connections, reaction_forces
+
+def solve_arrays(coordinates, members, reaction_nodes, reaction_directions, load_nodes, load_magnitudes, load_angles, sparse=None, elastic_moduli=1.0, areas=1.0, reorder=False):
+    """
+    Solve the equilibrium equations of a truss given as index arrays.
+
+    Statically indeterminate trusses are solved with the direct stiffness method.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, 2).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y).
+        load_nodes (numpy.ndarray): Node index of every load.
+        load_magnitudes (numpy.ndarray): Magnitude of every load.
+        load_angles (numpy.ndarray): Angle of every load in radians.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+        elastic_moduli (float or array_like): Modulus of elasticity E, used for indeterminate trusses.
+        areas (float or array_like): Cross-section area A, used for indeterminate trusses.
+        reorder (bool): Renumber the nodes with reverse Cuthill-McKee and use the banded
+                        solver if the resulting bandwidth is small.
+
+    Returns:
+        numpy.ndarray: Member forces followed by reaction forces.
+                       Returns None if the truss is not statically determined.
+    """
+    num_nodes = len(coordinates)
+    num_unknowns = len(members) + len(reaction_nodes)
+
+    # Redundant trusses need the stiffness method
+    if num_unknowns > 2 * num_nodes:
+        _, forces, reactions = stiffness.solve_stiffness(coordinates, members, elastic_moduli, areas, reaction_nodes, reaction_directions,
+                                                         load_nodes, load_magnitudes, load_angles, sparse)
+        return np.concatenate([forces, reactions])
+
+    # Statically determined check
+    if 2 * num_nodes != num_unknowns:
+        print("Truss is not statically determined!")
+        return None
 
     # Add loads to the constant matrix
-    for load in loads:
-        node_index = nodes.index(load.node)
-        constant_matrix[2 * node_index] -= load.magnitude * np.cos(load.angle_radians)
-        constant_matrix[2 * node_index + 1] -= load.magnitude * np.sin(load.angle_radians)
+    constant_matrix = solver.load_vector(num_nodes, load_nodes, load_magnitudes, load_angles)
+
+    if reorder:
+        with profiling.span("solve"):
+            return solver.solve_reordered(coordinates, members, reaction_nodes, reaction_directions, constant_matrix, sparse)
+
+    # Assemble the coefficient matrix, dense for small trusses and CSC for large ones
+    with profiling.span("assembly"):
+        sparse = solver.use_sparse(num_unknowns, sparse)
+        coefficient_matrix = solver.equilibrium_matrix(coordinates, members, reaction_nodes, reaction_directions, sparse)
+    solver.record_matrix(coefficient_matrix)
 
     # Solve for the variables
-    variables = np.linalg.solve(coefficient_matrix, constant_matrix)
+    with profiling.span("solve"):
+        return solver.solve(coefficient_matrix, constant_matrix)
 
-    # Assign calculated forces to the connections as Force objects
-    for connection_index, connection in enumerate(connections):
-        force_magnitude = variables[connection_index]
-        angle_degrees = connection.angle_degrees
-        force = classes.Force(connection.node1, force_magnitude, angle_degrees)
-        connection.force = force
+def calculate_load_cases(model, load_cases=None, sparse=None):
+    """
+    Calculate forces in the truss structure for several load cases at once.
 
-    # Update reaction forces with calculated values
-    for reaction_force in reaction_forces:
-        node_index = nodes.index(reaction_force.node)
-        reaction_force.magnitude = variables[len(connections) + reaction_forces.index(reaction_force)]
+    The coefficient matrix is assembled and factorized once and all load cases
+    are solved as the columns of one right-hand side matrix. Statically
+    indeterminate (redundant) trusses are solved with the direct stiffness
+    method in the same way.
 
-    return connections, reaction_forces
+    Parameters:
+        model (TrussModel or SpaceTrussModel): The truss model.
+        load_cases (dict): Named load cases, each a list of [node_index, magnitude, angle_degrees]
+                           rows (plane trusses only). Defaults to model.load_cases; without any,
+                           the loads of the model are one load case named BASE_LOAD_CASE.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+
+    Returns:
+        tuple: Load case names, member forces with shape (cases, members) and reaction
+               forces with shape (cases, reactions).
+               Returns None if the truss has fewer unknowns than equations.
+
+    Raises:
+        ValueError: If named load cases are given for a space truss.
+        numpy.linalg.LinAlgError: If the truss is unstable.
+    """
+    dimensions = model.dimensions
+    load_cases = getattr(model, 'load_cases', None) if load_cases is None else load_cases
+    if load_cases:
+        if dimensions != 2:
+            raise ValueError("Named load cases are only supported for plane trusses")
+        names, load_case_index, load_nodes, load_magnitudes, load_angles = model.load_case_arrays(load_cases)
+        constant_matrix = solver.load_matrix(model.num_nodes, len(names), load_case_index, load_nodes, load_magnitudes, np.radians(load_angles))
+    else:
+        names = [BASE_LOAD_CASE]
+        constant_matrix = solver.component_load_vector(model.num_nodes, model.load_nodes, model.load_components())[:, None]
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    num_unknowns = model.num_members + len(reaction_nodes)
+
+    # Statically determined check
+    if dimensions * model.num_nodes > num_unknowns:
+        print("Truss is not statically determined!")
+        return None, None, None
+
+    if dimensions * model.num_nodes < num_unknowns:
+        # Redundant: one stiffness factorization for all load cases; the constant matrix holds -F
+        _, forces, reactions = stiffness.solve_nodal_forces(model.coordinates, model.members, model.elastic_moduli, model.areas,
+                                                            reaction_nodes, reaction_directions, -constant_matrix, sparse, dimensions)
+        return names, forces.T, reactions.T
+
+    # One factorization for all load cases
+    with profiling.span("assembly"):
+        sparse = solver.use_sparse(num_unknowns, sparse)
+        coefficient_matrix = solver.equilibrium_matrix(model.coordinates, model.members, reaction_nodes, reaction_directions, sparse, dimensions)
+    solver.record_matrix(coefficient_matrix)
+
+    # One column per load case, solved in a single batched call
+    with profiling.span("solve"):
+        variables = solver.factorize(coefficient_matrix).solve(constant_matrix)
+
+    return names, variables[:model.num_members].T, variables[model.num_members:].T
@@ -0,0 +1,283 @@
+# generators.py
+# Parametric truss generators for TrussSim
+
+import argparse
+import json
+import sys
+import numpy as np
+import classes  # type: ignore
+
+def _chain(nodes):
+    """Members connecting consecutive nodes of a sequence."""
+    nodes = np.asarray(nodes)
+    return np.column_stack([nodes[:-1], nodes[1:]])
+
+def _simply_supported(coordinates, members, first, last, load_nodes, load):
+    """Model with a pin at the first and a roller at the last node and downward loads."""
+    load_nodes = np.asarray(load_nodes)
+    return classes.TrussModel(coordinates, members, [first, last], ['pin', 'roller'],
+                              load_nodes, np.full(len(load_nodes), float(load)), np.full(len(load_nodes), 270.0))
+
+def warren(panels, panel_length=4.0, height=3.0, load=100.0):
+    """
+    Generate a Warren truss: a zigzag of diagonals between two parallel chords.
+
+    Parameters:
+        panels (int): Number of bottom chord panels (at least 1).
+        panel_length (float): Length of a panel.
+        height (float): Height of the truss.
+        load (float): Downward load at every top chord node.
+
+    Returns:
+        TrussModel: Statically determined truss with 2*panels+1 nodes and 4*panels-1 members.
+    """
+    # Bottom chord nodes are the even, top chord nodes the odd node indices
+    x = np.arange(2 * panels + 1) * panel_length / 2
+    y = np.where(np.arange(2 * panels + 1) % 2, height, 0.0)
+    bottom = np.arange(0, 2 * panels + 1, 2)
+    top = np.arange(1, 2 * panels, 2)
+    members = np.concatenate([_chain(np.arange(2 * panels + 1)), _chain(bottom), _chain(top)])
+    return _simply_supported(np.column_stack([x, y]), members, 0, 2 * panels, top, load)
+
+def _vertical_truss(panels, panel_length, height, load, howe):
+    """Pratt or Howe truss; they only differ in the direction of the diagonals."""
+    if panels < 2:
+        raise ValueError("A Pratt or Howe truss needs at least 2 panels")
+    # Bottom chord nodes 0..panels, top chord nodes above the interior bottom nodes
+    bottom = np.arange(panels + 1)
+    top = np.arange(panels + 1, 2 * panels)
+    coordinates = np.concatenate([np.column_stack([bottom * panel_length, np.zeros(panels + 1)]),
+                                  np.column_stack([np.arange(1, panels) * panel_length, np.full(panels - 1, height)])])
+    top_of = np.full(panels + 1, -1)
+    top_of[1:panels] = top
+
+    # Interior panels i..i+1 for i = 1..panels-2; diagonals fall towards the middle for Pratt
+    i = np.arange(1, panels - 1)
+    left_half = i + 1 <= panels / 2
+    falls_right = left_half != howe
+    diagonals = np.where(falls_right[:, None], np.column_stack([top_of[i], i + 1]), np.column_stack([i, top_of[i + 1]]))
+
+    members = np.concatenate([
+        _chain(bottom),
+        _chain(top),
+        np.column_stack([bottom[1:panels], top]),
+        [[0, top[0]], [top[-1], panels]],
+        diagonals.reshape(-1, 2),
+    ])
+    return _simply_supported(coordinates, members, 0, panels, bottom[1:panels], load)
+
+def pratt(panels, panel_length=4.0, height=3.0, load=100.0):
+    """
+    Generate a Pratt truss: verticals with diagonals falling towards the middle (in tension).
+
+    Parameters:
+        panels (int): Number of bottom chord panels (at least 2).
+        panel_length (float): Length of a panel.
+        height (float): Height of the truss.
+        load (float): Downward load at every interior bottom chord node.
+
+    Returns:
+        TrussModel: Statically determined truss with 2*panels nodes and 4*panels-3 members.
+    """
+    return _vertical_truss(panels, panel_length, height, load, howe=False)
+
+def howe(panels, panel_length=4.0, height=3.0, load=100.0):
+    """
+    Generate a Howe truss: verticals with diagonals rising towards the middle (in compression).
+
+    Parameters:
+        panels (int): Number of bottom chord panels (at least 2).
+        panel_length (float): Length of a panel.
+        height (float): Height of the truss.
+        load (float): Downward load at every interior bottom chord node.
+
+    Returns:
+        TrussModel: Statically determined truss with 2*panels nodes and 4*panels-3 members.
+    """
+    return _vertical_truss(panels, panel_length, height, load, howe=True)
+
+def fink(panels, span=6.0, height=2.0, load=200.0):
+    """
+    Generate a Fink roof truss: a pitched top chord with a W pattern of webs.
+
+    With 3 panels this is the truss of examples/Fink.json.
+
+    Parameters:
+        panels (int): Number of bottom chord panels (at least 1).
+        span (float): Distance between the supports.
+        height (float): Height of the apex.
+        load (float): Downward load at every top chord node.
+
+    Returns:
+        TrussModel: Statically determined truss with 2*panels+1 nodes and 4*panels-1 members.
+    """
+    # Same topology as a Warren truss, with the top nodes on the roof line
+    x = np.empty(2 * panels + 1)
+    x[0::2] = np.arange(panels + 1) * span / panels
+    x[1::2] = np.arange(1, panels + 1) * span / (panels + 1)
+    y = np.zeros(2 * panels + 1)
+    y[1::2] = height * (1 - np.abs(2 * x[1::2] / span - 1))
+    model = warren(panels, load=load)
+    model.coordinates = np.column_stack([x, y])
+    return model
+
+def random_lattice(panels, rows=2, panel_length=1.0, jitter=0.2, load=100.0, seed=None):
+    """
+    Generate a random planar lattice: a jittered grid with randomly oriented diagonals.
+
+    With more than one row the lattice is statically indeterminate and is solved
+    with the stiffness method.
+
+    Parameters:
+        panels (int): Number of columns of cells.
+        rows (int): Number of rows of cells.
+        panel_length (float): Grid spacing.
+        jitter (float): Maximum random node offset as a fraction of the grid spacing.
+        load (float): Maximum downward load at every top row node; the loads are random.
+        seed (int): Seed of the random number generator.
+
+    Returns:
+        TrussModel: Truss with (panels+1)*(rows+1) nodes and 3*panels*rows+panels+rows members.
+    """
+    rng = np.random.default_rng(seed)
+    grid = np.arange((panels + 1) * (rows + 1)).reshape(rows + 1, panels + 1)
+    gx, gy = np.meshgrid(np.arange(panels + 1), np.arange(rows + 1))
+    coordinates = np.column_stack([gx.ravel(), gy.ravel()]) * panel_length
+    coordinates += rng.uniform(-jitter, jitter, coordinates.shape) * panel_length
+
+    # One diagonal per cell, in a random direction
+    lower_left, lower_right = grid[:-1, :-1].ravel(), grid[:-1, 1:].ravel()
+    upper_left, upper_right = grid[1:, :-1].ravel(), grid[1:, 1:].ravel()
+    rising = rng.random(panels * rows) < 0.5
+    diagonals = np.where(rising[:, None], np.column_stack([lower_left, upper_right]), np.column_stack([lower_right, upper_left]))
+
+    members = np.concatenate([
+        np.column_stack([grid[:, :-1].ravel(), grid[:, 1:].ravel()]),
+        np.column_stack([grid[:-1, :].ravel(), grid[1:, :].ravel()]),
+        diagonals,
+    ])
+    top = grid[-1]
+    model = _simply_supported(coordinates, members, grid[0, 0], grid[0, -1], top, load)
+    model.load_magnitudes = rng.uniform(0, load, len(top))
+    return model
+
+def space_grid(panels, panel_length=2.0, depth=1.5, load=10.0, panels_y=None):
+    """
+    Generate a double-layer space grid (square on square offset), as used for roofs.
+
+    The top layer is a square grid, the bottom layer a square grid shifted by half a
+    panel in both directions, and every bottom node is braced to the four top nodes
+    around it. The perimeter top nodes are supported: pins at the corners and
+    vertical rollers along the edges.
+
+    Parameters:
+        panels (int): Number of panels in x direction (at least 1).
+        panel_length (float): Length of a panel.
+        depth (float): Distance between the layers.
+        load (float): Downward load at every interior top node.
+        panels_y (int): Number of panels in y direction, defaults to panels.
+
+    Returns:
+        SpaceTrussModel: Statically indeterminate space truss with (panels+1)*(panels_y+1)
+                         + panels*panels_y nodes.
+    """
+    panels_y = panels if panels_y is None else panels_y
+    # Top nodes first, row by row, then the bottom nodes
+    top = np.arange((panels + 1) * (panels_y + 1)).reshape(panels_y + 1, panels + 1)
+    bottom = top.size + np.arange(panels * panels_y).reshape(panels_y, panels)
+    top_x, top_y = np.meshgrid(np.arange(panels + 1) * panel_length, np.arange(panels_y + 1) * panel_length)
+    bottom_x, bottom_y = np.meshgrid((np.arange(panels) + 0.5) * panel_length, (np.arange(panels_y) + 0.5) * panel_length)
+    coordinates = np.concatenate([np.column_stack([top_x.ravel(), top_y.ravel(), np.full(top.size, depth)]),
+                                  np.column_stack([bottom_x.ravel(), bottom_y.ravel(), np.zeros(bottom.size)])])
+
+    members = np.concatenate([
+        np.column_stack([top[:, :-1].ravel(), top[:, 1:].ravel()]),
+        np.column_stack([top[:-1, :].ravel(), top[1:, :].ravel()]),
+        np.column_stack([bottom[:, :-1].ravel(), bottom[:, 1:].ravel()]),
+        np.column_stack([bottom[:-1, :].ravel(), bottom[1:, :].ravel()]),
+        np.column_stack([np.repeat(bottom.ravel(), 4),
+                         np.stack([top[:-1, :-1], top[:-1, 1:], top[1:, :-1], top[1:, 1:]], axis=-1).ravel()]),
+    ])
+
+    perimeter = np.zeros(top.shape, dtype=bool)
+    perimeter[[0, -1], :] = perimeter[:, [0, -1]] = True
+    corners = np.zeros(top.shape, dtype=bool)
+    corners[[0, 0, -1, -1], [0, -1, 0, -1]] = True
+    support_nodes = top[perimeter]
+    support_types = np.where(corners[perimeter], 'pin', 'roller')
+    load_nodes = top[~perimeter]
+    load_vectors = np.zeros((len(load_nodes), 3))
+    load_vectors[:, 2] = -load
+    return classes.SpaceTrussModel(coordinates, members, support_nodes, support_types, load_nodes, load_vectors)
+
+GENERATORS = {
+    'warren': warren,
+    'pratt': pratt,
+    'howe': howe,
+    'fink': fink,
+    'lattice': random_lattice,
+}
+
+# Members per panel and constant offset of every generator, to pick the panels for a member count
+MEMBERS_PER_PANEL = {
+    'warren': (4, -1),
+    'pratt': (4, -3),
+    'howe': (4, -3),
+    'fink': (4, -1),
+    'lattice': (7, 2),  # 2 rows: 3*2*panels + panels + 2
+}
+
+def panels_for_members(name, num_members):
+    """
+    Number of panels that gives a truss of about the requested number of members.
+
+    Parameters:
+        name (str): Name of the generator.
+        num_members (int): Requested number of members.
+
+    Returns:
+        int: Number of panels.
+    """
+    per_panel, offset = MEMBERS_PER_PANEL[name]
+    return max(2, round((num_members - offset) / per_panel))
+
+def generate(name, panels, **kwargs):
+    """
+    Generate a truss by generator name.
+
+    Parameters:
+        name (str): One of the names in GENERATORS.
+        panels (int): Number of panels.
+        **kwargs: Further arguments of the generator.
+
+    Returns:
+        TrussModel: The generated truss.
+    """
+    return GENERATORS[name](panels, **kwargs)
+
+def main(argv=None):
+    """
+    Command-line entry point that writes a generated truss as JSON.
+
+    Parameters:
+        argv (list): Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Generate a truss JSON file.")
+    parser.add_argument("kind", choices=sorted(GENERATORS), help="type of truss")
+    parser.add_argument("panels", type=int, help="number of panels")
+    parser.add_argument("output", help="path of the JSON file")
+    parser.add_argument("--seed", type=int, default=None, help="random seed (lattice only)")
+    args = parser.parse_args(argv)
+
+    kwargs = {'seed': args.seed} if args.kind == 'lattice' else {}
+    model = generate(args.kind, args.panels, **kwargs)
+    with open(args.output, 'w') as file:
+        json.dump(model.to_dict(), file)
+    print(model)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
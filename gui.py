@@ -1,7 +1,198 @@
+import copy
+import queue
+import threading
+import numpy as np
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
 import functions 
 import classes
+import plotting
+import profiling
+
+# Interval in milliseconds at which the GUI checks for messages from the solve worker
+POLL_INTERVAL = 50
+# Number of rows of the result table; only this many Treeview rows ever exist
+PAGE_SIZE = 25
+# Trusses with more items than this are only summarized in the log, see the result table for details
+LOG_DETAIL_LIMIT = 500
+# Maximum number of lines kept in the log
+MAX_LOG_LINES = 5000
+
+
+class ResultTable(ttk.Frame):
+    """
+    Virtualized table of member and reaction forces.
+
+    The results are kept in NumPy arrays and only PAGE_SIZE Treeview rows exist; scrolling
+    rewrites their values from the current window of the sorted and filtered arrays, so the
+    table stays fast for trusses with many thousands of members.
+
+    Attributes:
+        tree (ttk.Treeview): Treeview showing the current page.
+        scrollbar (ttk.Scrollbar): Scrollbar over all filtered rows.
+        filter_var (tk.StringVar): Minimum absolute force of the rows shown.
+        order (numpy.ndarray): Row indices in display order after sorting and filtering.
+        offset (int): Index in order of the first row shown.
+    """
+
+    COLUMNS = (("type", "Type", 90), ("name", "Name", 80), ("length", "Length", 80), ("angle", "Angle", 80), ("force", "Force", 100))
+
+    def __init__(self, master, page_size=PAGE_SIZE):
+        """
+        Create the table.
+
+        Args:
+            master (tk.Widget): Parent widget.
+            page_size (int): Number of rows shown at once.
+        """
+        super().__init__(master)
+        self.page_size = page_size
+        self.columns = {}
+        self.order = np.zeros(0, dtype=np.intp)
+        self.offset = 0
+        self.sort_column = None
+        self.sort_descending = False
+
+        # Filter by force magnitude
+        filter_frame = ttk.Frame(self)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(filter_frame, text="Min |force|:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        filter_entry = ttk.Entry(filter_frame, textvariable=self.filter_var, width=12)
+        filter_entry.pack(side=tk.LEFT, padx=5)
+        filter_entry.bind("<Return>", lambda event: self.apply_filter())
+        ttk.Button(filter_frame, text="Filter", command=self.apply_filter).pack(side=tk.LEFT)
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side=tk.LEFT, padx=10)
+
+        self.tree = ttk.Treeview(self, columns=[column for column, _, _ in self.COLUMNS], show="headings", height=page_size, selectmode="browse")
+        for column, heading, width in self.COLUMNS:
+            self.tree.heading(column, text=heading, command=lambda column=column: self.sort_by(column))
+            self.tree.column(column, width=width, anchor=tk.E if column in ("length", "angle", "force") else tk.W)
+        self.tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.rows = [self.tree.insert("", tk.END, values=()) for _ in range(page_size)]
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.scroll)
+        self.scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(sequence, self.on_mouse_wheel)
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+        self.refresh()
+
+    def set_data(self, data):
+        """
+        Show the results of a truss.
+
+        Args:
+            data (dict): Plot data as returned by plotting.truss_plot_data.
+        """
+        coordinates = data['coordinates']
+        members = data['members']
+        names = np.array(data['names'] if data['names'] is not None else [classes.TrussModel.node_name(i) for i in range(len(coordinates))], dtype=object)
+        delta = coordinates[members[:, 1]] - coordinates[members[:, 0]]
+        num_members = len(members)
+        num_reactions = len(data['reaction_nodes'])
+
+        reaction_types = np.where(np.isclose(data['reaction_angles'], 0), "Reaction X", "Reaction Y")
+        self.columns = {
+            "type": np.concatenate([np.full(num_members, "Connection", dtype=object), reaction_types.astype(object)]),
+            "name": np.concatenate([names[members[:, 0]] + names[members[:, 1]], names[data['reaction_nodes']]]),
+            "length": np.concatenate([np.hypot(delta[:, 0], delta[:, 1]), np.full(num_reactions, np.nan)]),
+            "angle": np.concatenate([np.degrees(np.arctan2(delta[:, 1], delta[:, 0])), np.full(num_reactions, np.nan)]),
+            "force": np.concatenate([data['forces'], data['reaction_magnitudes']]),
+        }
+        self.apply_filter()
+
+    def apply_filter(self):
+        """
+        Keep only the rows whose absolute force is at least the filter value, then sort them.
+        """
+        forces = self.columns.get("force", np.zeros(0))
+        try:
+            minimum = float(self.filter_var.get()) if self.filter_var.get().strip() else None
+        except ValueError:
+            minimum = None
+        self.order = np.arange(len(forces)) if minimum is None else np.flatnonzero(np.abs(forces) >= minimum)
+        self.sort()
+
+    def sort_by(self, column):
+        """
+        Sort by a column, toggling the direction when it is already the sort column.
+
+        Args:
+            column (str): Column to sort by.
+        """
+        self.sort_descending = not self.sort_descending if column == self.sort_column else column == "force"
+        self.sort_column = column
+        self.sort()
+
+    def sort(self):
+        """
+        Sort the filtered rows by the current sort column and show the first page.
+        """
+        if self.sort_column is not None and len(self.order):
+            values = self.columns[self.sort_column][self.order]
+            if self.sort_column == "force":
+                values = np.abs(values)  # Sort by magnitude
+            order = np.argsort(values, kind="stable")
+            if self.sort_descending:
+                order = order[::-1]
+            self.order = self.order[order]
+        self.offset = 0
+        self.refresh()
+
+    def refresh(self):
+        """
+        Write the current page into the Treeview rows and update the scrollbar.
+        """
+        total = len(self.order)
+        self.offset = max(0, min(self.offset, total - self.page_size))
+        page = self.order[self.offset:self.offset + self.page_size]
+        for row, index in zip(self.rows, page.tolist()):
+            self.tree.item(row, values=tuple(self.format_value(column, self.columns[column][index]) for column, _, _ in self.COLUMNS))
+        for row in self.rows[len(page):]:
+            self.tree.item(row, values=())
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(page)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+        self.count_label.config(text=f"{total} rows")
+
+    @staticmethod
+    def format_value(column, value):
+        """Format a cell value."""
+        if column in ("length", "angle", "force"):
+            return "" if np.isnan(value) else f"{value:.2f}"
+        return str(value)
+
+    def scroll(self, action, amount, unit=None):
+        """
+        Scrollbar command: move the page window.
+
+        Args:
+            action (str): 'moveto' or 'scroll'.
+            amount (str): Fraction for 'moveto', number of units or pages for 'scroll'.
+            unit (str): 'units' or 'pages' for 'scroll'.
+        """
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.order))
+        elif action == "scroll":
+            self.offset += int(amount) * (self.page_size if unit == "pages" else 1)
+        self.refresh()
+
+    def on_mouse_wheel(self, event):
+        """Scroll three rows per mouse wheel step."""
+        if event.num == 4 or event.delta > 0:
+            self.offset -= 3
+        else:
+            self.offset += 3
+        self.refresh()
+        return "break"
+
 
 class TrussApp:
     """
@@ -17,7 +208,15 @@ class TrussApp:
         frame (ttk.Frame): Main frame of the application.
         import_button (ttk.Button): Button to import truss data.
         process_button (ttk.Button): Button to process truss data.
+        cancel_button (ttk.Button): Button to cancel a running solve.
+        progress_bar (ttk.Progressbar): Busy indicator while the solve worker runs.
+        status_label (ttk.Label): Label showing the current stage.
         output_textbox (scrolledtext.ScrolledText): Textbox to display output and logs.
+        result_table (ResultTable): Virtualized table of member and reaction forces.
+        figure (matplotlib.figure.Figure): Figure embedded in the window.
+        canvas (FigureCanvasTkAgg): Tk canvas showing the figure.
+        truss_plot (plotting.TrussPlot): Plot of the current truss, updated in place on re-solve.
+        profiler (profiling.Profiler): Stage timings of the running job, None when idle.
     """
 
     def __init__(self, root):
@@ -37,6 +236,15 @@ class TrussApp:
         self.loads = []
         self.reaction_forces = []
 
+        # Solve worker state; messages from the worker thread are passed through a queue
+        # and handled on the Tk thread, since Tk must only be used from its own thread
+        self.worker = None
+        self.worker_messages = queue.Queue()
+        self.job_id = 0
+        self.cancel_event = threading.Event()
+        self.truss_plot = None
+        self.profiler = None
+
         # Create GUI elements
         self.create_widgets()
 
@@ -48,20 +256,46 @@ class TrussApp:
         self.frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
 
         self.import_button = ttk.Button(self.frame, text="Import Data", command=self.import_data)
-        self.import_button.grid(row=0, column=0, padx=10, pady=10)
+        self.import_button.grid(row=0, column=0, padx=10, pady=10, sticky=tk.W)
 
         self.process_button = ttk.Button(self.frame, text="Process Truss", command=self.process_truss)
-        self.process_button.grid(row=1, column=0, padx=10, pady=10)
+        self.process_button.grid(row=1, column=0, padx=10, pady=10, sticky=tk.W)
+
+        self.cancel_button = ttk.Button(self.frame, text="Cancel", command=self.cancel_processing, state=tk.DISABLED)
+        self.cancel_button.grid(row=1, column=1, padx=10, pady=10, sticky=tk.W)
+
+        # Progress indicator and status line
+        self.progress_bar = ttk.Progressbar(self.frame, mode="indeterminate", length=200)
+        self.progress_bar.grid(row=0, column=1, padx=10, pady=10, sticky=tk.W)
+        self.status_label = ttk.Label(self.frame, text="Ready")
+        self.status_label.grid(row=0, column=2, padx=10, pady=10, sticky=tk.W)
+
+        # Notebook with the log and the result table
+        self.notebook = ttk.Notebook(self.frame)
+        self.notebook.grid(row=2, column=0, columnspan=2, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
 
         # Textbox for printing output
-        self.output_textbox = scrolledtext.ScrolledText(self.frame, wrap=tk.WORD, width=80, height=20)
-        self.output_textbox.grid(row=2, column=0, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.output_textbox = scrolledtext.ScrolledText(self.notebook, wrap=tk.WORD, width=80, height=20)
         self.output_textbox.tag_config("error", foreground="red")  # Configure tag for error messages
+        self.notebook.add(self.output_textbox, text="Log")
+
+        # Table for the results
+        self.result_table = ResultTable(self.notebook)
+        self.notebook.add(self.result_table, text="Results")
 
-        # Configure grid to expand the textbox when window is resized
+        # Embedded plot, drawn into by plotting.TrussPlot
+        self.plot_frame = ttk.Frame(self.frame)
+        self.plot_frame.grid(row=2, column=2, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.figure = Figure(figsize=(6, 4))
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.plot_frame)
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.plot_frame)
+        self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+
+        # Configure grid to expand the textbox and plot when window is resized
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
         self.frame.columnconfigure(0, weight=1)
+        self.frame.columnconfigure(2, weight=2)
         self.frame.rowconfigure(2, weight=1)
 
     def import_data(self):
@@ -71,7 +305,13 @@ class TrussApp:
         file_path = filedialog.askopenfilename(title="Select JSON Data File", filetypes=[("JSON Files", "*.json")])
         if file_path:
             try:
-                self.nodes, self.connections, self.supports, self.loads = functions.import_json(file_path)
+                self.cancel_processing()
+                with profiling.Profiler() as profiler:
+                    self.nodes, self.connections, self.supports, self.loads = functions.import_json(file_path)
+                self.reaction_forces = []
+                self.clear_plot()
+                if self.worker is None or not self.worker.is_alive():
+                    self.status_label.config(text=f"Ready ({profiler.summary()})")
                 self.output_textbox.insert(tk.END, f"Data imported from {file_path}\n")
                 self.output_textbox.insert(tk.END, "Nodes, connections, supports, and loads have been loaded.\n\n")
             except Exception as e:
@@ -80,62 +320,233 @@ class TrussApp:
     def process_truss(self):
         """
         Process the truss structure to calculate forces and display the results.
+
+        The forces are calculated on a background thread so the window stays responsive;
+        the results are handled by handle_results once the worker has finished. The worker
+        gets copies of the connections, so a cancelled job never writes into the shown ones.
         """
         if not self.nodes or not self.connections or not self.supports or not self.loads:
             messagebox.showwarning("Process Truss", "Please import or add data first.")
             return
+        if self.worker is not None and self.worker.is_alive():
+            return
+
+        self.job_id += 1
+        self.cancel_event = threading.Event()
+        connections = [copy.copy(connection) for connection in self.connections]
+        self.worker = threading.Thread(target=self.solve_worker, args=(self.job_id, self.cancel_event, self.nodes, connections, self.supports, self.loads), daemon=True)
+        self.output_textbox.insert(tk.END, "Truss processing started...\n")
+        self.set_busy(True, "Calculating forces...")
+        self.profiler = profiling.Profiler()
+        self.profiler.start()
+        self.worker.start()
+        self.root.after(POLL_INTERVAL, self.poll_worker)
 
+    def solve_worker(self, job_id, cancel_event, nodes, connections, supports, loads):
+        """
+        Calculate the forces on the worker thread and post the outcome to the message queue.
+
+        Args:
+            job_id (int): Number of the job, used to discard results of cancelled jobs.
+            cancel_event (threading.Event): Set when the job has been cancelled.
+            nodes (list): Nodes of the truss.
+            connections (list): Connections of the truss.
+            supports (list): Supports of the truss.
+            loads (list): Loads of the truss.
+        """
         try:
-            self.connections, self.reaction_forces = functions.calculate_forces(self.nodes, self.connections, self.supports, self.loads)
-            if self.connections is None:
-                messagebox.showwarning("Process Truss", "The truss is not statically determined!")
+            self.worker_messages.put((job_id, "progress", f"Calculating forces ({len(connections)} members, {len(nodes)} nodes)..."))
+            connections, reaction_forces = functions.calculate_forces(nodes, connections, supports, loads)
+            if cancel_event.is_set():
                 return
+            self.worker_messages.put((job_id, "done", (connections, reaction_forces)))
+        except Exception as e:
+            self.worker_messages.put((job_id, "error", e))
+
+    def poll_worker(self):
+        """
+        Handle messages from the solve worker on the Tk thread and reschedule while it runs.
+        """
+        # Checked before draining: once the worker has ended, all its messages are in the queue
+        worker_alive = self.worker is not None and self.worker.is_alive()
+        while True:
+            try:
+                job_id, kind, payload = self.worker_messages.get_nowait()
+            except queue.Empty:
+                break
+            if job_id != self.job_id or self.cancel_event.is_set():
+                continue  # Result of a cancelled job
+            if kind == "progress":
+                self.status_label.config(text=payload)
+            elif kind == "done":
+                self.set_busy(False, "Ready")
+                self.handle_results(*payload)
+            elif kind == "error":
+                self.stop_profiler()
+                self.set_busy(False, "Ready")
+                self.output_textbox.insert(tk.END, f"Error processing truss: {str(payload)}\n", "error")
 
-            self.output_textbox.insert(tk.END, "Truss processing started...\n")
-            functions.plot_truss_structure(self.connections, self.supports, self.nodes, self.loads, self.reaction_forces)
-            self.print_all()
+        if worker_alive:
+            self.root.after(POLL_INTERVAL, self.poll_worker)
+        elif self.cancel_event.is_set():
+            self.set_busy(False, "Ready")  # The cancelled worker has exited
+
+    def handle_results(self, connections, reaction_forces):
+        """
+        Show the results of a finished solve.
+
+        Args:
+            connections (list): Connections with calculated forces, or None.
+            reaction_forces (list): Calculated reaction forces, or None.
+        """
+        if connections is None:
+            self.stop_profiler()
+            messagebox.showwarning("Process Truss", "The truss is not statically determined!")
+            return
+        self.connections, self.reaction_forces = connections, reaction_forces
+
+        try:
+            self.status_label.config(text="Plotting...")
+            with profiling.span("plot"):
+                data = plotting.truss_plot_data(self.connections, self.supports, self.nodes, self.loads, self.reaction_forces)
+                self.update_plot(data)
+                self.result_table.set_data(data)
+            with profiling.span("print"):
+                self.print_all()
             self.output_textbox.insert(tk.END, "Truss processing completed.\n\n")
         except Exception as e:
             self.output_textbox.insert(tk.END, f"Error processing truss: {str(e)}\n", "error")
+        summary = self.stop_profiler()
+        self.status_label.config(text=f"Ready ({summary})" if summary else "Ready")
+
+    def stop_profiler(self):
+        """
+        Stop timing the current job.
+
+        Returns:
+            str: One-line summary of the stage timings, empty if no job was timed.
+        """
+        if self.profiler is None:
+            return ""
+        self.profiler.stop()
+        summary = self.profiler.summary()
+        self.profiler = None
+        return summary
+
+    def cancel_processing(self):
+        """
+        Cancel the running solve. Its result is discarded when the worker finishes.
+
+        The solve cannot be interrupted, so the Process button stays disabled
+        until the worker has exited; poll_worker then re-enables it.
+        """
+        self.stop_profiler()
+        if self.worker is not None and self.worker.is_alive():
+            self.cancel_event.set()
+            self.output_textbox.insert(tk.END, "Truss processing cancelled.\n\n")
+            self.set_busy(True, "Cancelling...")
+            self.cancel_button.config(state=tk.DISABLED)
+            return
+        self.set_busy(False, "Ready")
+
+    def set_busy(self, busy, status):
+        """
+        Enable or disable the controls while the solve worker runs.
+
+        Args:
+            busy (bool): Whether a solve is running.
+            status (str): Text for the status line.
+        """
+        self.process_button.config(state=tk.DISABLED if busy else tk.NORMAL)
+        self.cancel_button.config(state=tk.NORMAL if busy else tk.DISABLED)
+        if busy:
+            self.progress_bar.start()
+        else:
+            self.progress_bar.stop()
+        self.status_label.config(text=status)
+
+    def update_plot(self, data):
+        """
+        Draw the truss in the embedded figure, updating the existing artists if possible.
+
+        Args:
+            data (dict): Plot data as returned by plotting.truss_plot_data.
+        """
+        if self.truss_plot is None:
+            self.truss_plot = plotting.TrussPlot(self.figure.add_subplot(), data)
+            self.truss_plot.show_colorbar()
+        else:
+            self.truss_plot.update(data)
+        self.canvas.draw_idle()
+
+    def clear_plot(self):
+        """
+        Remove the plot, e.g. after importing a different truss.
+        """
+        self.figure.clear()
+        self.truss_plot = None
+        self.canvas.draw_idle()
 
     def print_all(self):
         """
         Print all truss data (nodes, connections, supports, loads, and reaction forces) in the output textbox.
+
+        The text is built in one string and inserted at once. Large trusses are only
+        summarized; their results are listed in the result table.
         """
-        self.output_textbox.insert(tk.END, "Nodes:\n")
-        for node in self.nodes:
-            self.output_textbox.insert(tk.END, f"{node}\n")
-        self.output_textbox.insert(tk.END, "\n")
+        num_items = len(self.nodes) + len(self.connections) + len(self.supports) + len(self.loads) + len(self.reaction_forces)
+        if num_items > LOG_DETAIL_LIMIT:
+            lines = [f"{len(self.nodes)} nodes, {len(self.connections)} connections, {len(self.supports)} supports, "
+                     f"{len(self.loads)} loads and {len(self.reaction_forces)} reaction forces. See the Results tab for details.", ""]
+            self.write_log("\n".join(lines) + "\n")
+            return
+
+        lines = ["Nodes:"]
+        lines.extend(str(node) for node in self.nodes)
+        lines.append("")
 
-        self.output_textbox.insert(tk.END, "Connections:\n")
+        lines.append("Connections:")
         for connection in self.connections:
             length_rounded = round(connection.length, 2)
             angle_degrees_rounded = round(connection.angle_degrees, 2)
             if hasattr(connection, 'force') and isinstance(connection.force, classes.Force):
                 force_magnitude_rounded = round(connection.force.magnitude, 2)
-                self.output_textbox.insert(tk.END, f"Connection {connection.node1.name} {connection.node2.name} between {connection.node1.name} and {connection.node2.name} with length {length_rounded} and angle {angle_degrees_rounded} degrees Force: {force_magnitude_rounded}\n")
+                lines.append(f"Connection {connection.node1.name} {connection.node2.name} between {connection.node1.name} and {connection.node2.name} with length {length_rounded} and angle {angle_degrees_rounded} degrees Force: {force_magnitude_rounded}")
             else:
-                self.output_textbox.insert(tk.END, f"Connection {connection.node1.name} {connection.node2.name} between {connection.node1.name} and {connection.node2.name} with length {length_rounded} and angle {angle_degrees_rounded} degrees\n")
-        self.output_textbox.insert(tk.END, "\n")
+                lines.append(f"Connection {connection.node1.name} {connection.node2.name} between {connection.node1.name} and {connection.node2.name} with length {length_rounded} and angle {angle_degrees_rounded} degrees")
+        lines.append("")
 
-        self.output_textbox.insert(tk.END, "Supports:\n")
-        for support in self.supports:
-            self.output_textbox.insert(tk.END, f"{support}\n")
-        self.output_textbox.insert(tk.END, "\n")
+        lines.append("Supports:")
+        lines.extend(str(support) for support in self.supports)
+        lines.append("")
 
-        self.output_textbox.insert(tk.END, "Loads:\n")
-        for load in self.loads:
-            self.output_textbox.insert(tk.END, f"{load}\n")
-        self.output_textbox.insert(tk.END, "\n")
+        lines.append("Loads:")
+        lines.extend(str(load) for load in self.loads)
+        lines.append("")
 
-        self.output_textbox.insert(tk.END, "Reaction forces:\n")
+        lines.append("Reaction forces:")
         for force in self.reaction_forces:
             force_magnitude_rounded = round(force.magnitude, 2)
             if isinstance(force, classes.ReactionX):
-                self.output_textbox.insert(tk.END, f"Reaction force in the x-direction at node {force.node.name}, magnitude: {force_magnitude_rounded}\n")
+                lines.append(f"Reaction force in the x-direction at node {force.node.name}, magnitude: {force_magnitude_rounded}")
             elif isinstance(force, classes.ReactionY):
-                self.output_textbox.insert(tk.END, f"Reaction force in the y-direction at node {force.node.name}, magnitude: {force_magnitude_rounded}\n")
-        self.output_textbox.insert(tk.END, "\n")
+                lines.append(f"Reaction force in the y-direction at node {force.node.name}, magnitude: {force_magnitude_rounded}")
+        lines.append("")
+
+        self.write_log("\n".join(lines) + "\n")
+
+    def write_log(self, text):
+        """
+        Append text to the log in one insert and drop the oldest lines beyond MAX_LOG_LINES.
+
+        Args:
+            text (str): Text to append.
+        """
+        self.output_textbox.insert(tk.END, text)
+        excess = int(self.output_textbox.index("end-1c").split(".")[0]) - MAX_LOG_LINES
+        if excess > 0:
+            self.output_textbox.delete("1.0", f"{excess + 1}.0")
+        self.output_textbox.see(tk.END)
 
 
 if __name__ == "__main__":
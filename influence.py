@@ -0,0 +1,122 @@
+# influence.py
+# Influence lines and moving loads for TrussSim
+
+import numpy as np
+import solver  # type: ignore
+
+def influence_lines(model, deck_nodes, members=None, angle_degrees=270, sparse=None):
+    """
+    Calculate member-force influence lines for a unit load walked across the deck nodes.
+
+    All unit-load positions are solved at once against one factorization of the
+    equilibrium matrix. If only a few members are requested, the transposed system
+    is solved instead, which gives the needed rows of the inverse directly.
+
+    Parameters:
+        model (TrussModel): The truss model.
+        deck_nodes (array_like): Indices of the nodes the load travels over.
+        members (array_like): Indices of the members of interest, or None for all members.
+        angle_degrees (float): Direction of the unit load in degrees (270 is downwards).
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+
+    Returns:
+        tuple: Deck positions (x-coordinates, sorted), member forces with shape (positions, members)
+               and reaction forces with shape (positions, reactions). Reaction forces are None
+               if only selected members were requested.
+               Returns None if the truss is not statically determined.
+    """
+    deck_nodes = np.asarray(deck_nodes, dtype=np.intp)
+    deck_nodes = deck_nodes[np.argsort(model.coordinates[deck_nodes, 0], kind='stable')]
+    positions = model.coordinates[deck_nodes, 0]
+
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    num_unknowns = model.num_members + len(reaction_nodes)
+
+    # Statically determined check
+    if 2 * model.num_nodes != num_unknowns:
+        print("Truss is not statically determined!")
+        return None, None, None
+
+    sparse = solver.use_sparse(num_unknowns, sparse)
+    coefficient_matrix = solver.equilibrium_matrix(model.coordinates, model.members, reaction_nodes, reaction_directions, sparse)
+    factorization = solver.factorize(coefficient_matrix)
+
+    # One unit load per deck node, as the columns of one constant matrix
+    num_positions = len(deck_nodes)
+    constant_matrix = solver.load_matrix(model.num_nodes, num_positions, np.arange(num_positions), deck_nodes,
+                                         np.ones(num_positions), np.full(num_positions, np.radians(angle_degrees)))
+
+    if members is not None and len(members) < num_positions:
+        # Rows of the inverse for the selected members: solve A^T y = e_j
+        members = np.asarray(members, dtype=np.intp)
+        unit_matrix = np.zeros((num_unknowns, len(members)))
+        unit_matrix[members, np.arange(len(members))] = 1
+        adjoint = factorization.solve(unit_matrix, transpose=True)
+        return positions, constant_matrix.T @ adjoint, None
+
+    variables = factorization.solve(constant_matrix)
+    member_forces = variables[:model.num_members].T
+    if members is not None:
+        member_forces = member_forces[:, members]
+    return positions, member_forces, variables[model.num_members:].T
+
+def interpolate_influence(positions, lines, query_positions):
+    """
+    Interpolate influence lines between the deck nodes.
+
+    The deck members carry a load between two nodes to both nodes in proportion to
+    the distance, so influence lines are linear between deck nodes. Outside the deck
+    the influence is zero.
+
+    Parameters:
+        positions (numpy.ndarray): Sorted deck positions, as returned by influence_lines.
+        lines (numpy.ndarray): Influence lines with shape (positions, members).
+        query_positions (array_like): Positions to evaluate.
+
+    Returns:
+        numpy.ndarray: Influence values with shape (query_positions, members).
+    """
+    positions = np.asarray(positions, dtype=float)
+    query_positions = np.asarray(query_positions, dtype=float)
+    segment = np.clip(np.searchsorted(positions, query_positions, side='right') - 1, 0, max(len(positions) - 2, 0))
+    next_segment = np.minimum(segment + 1, len(positions) - 1)
+    span = positions[next_segment] - positions[segment]
+    weight = np.divide(query_positions - positions[segment], span, out=np.zeros_like(query_positions), where=span > 0)
+    values = (1 - weight)[:, None] * lines[segment] + weight[:, None] * lines[next_segment]
+    outside = (query_positions < positions[0]) | (query_positions > positions[-1])
+    values[outside] = 0
+    return values
+
+def moving_load_envelope(positions, lines, axle_offsets, axle_loads):
+    """
+    Calculate the member-force envelope of an axle train crossing the deck.
+
+    The response to the train is the convolution of the axle loads with the influence
+    lines. Because the influence lines are piecewise linear, its extremes occur when
+    an axle stands on a deck node, so the response is evaluated for all those lead-axle
+    positions at once.
+
+    Parameters:
+        positions (numpy.ndarray): Sorted deck positions, as returned by influence_lines.
+        lines (numpy.ndarray): Influence lines with shape (positions, members).
+        axle_offsets (array_like): Distance of every axle behind the lead axle.
+        axle_loads (array_like): Load of every axle.
+
+    Returns:
+        tuple: Maximum member forces, lead-axle positions of the maxima, minimum member
+               forces and lead-axle positions of the minima.
+    """
+    axle_offsets = np.asarray(axle_offsets, dtype=float)
+    axle_loads = np.asarray(axle_loads, dtype=float)
+
+    # Lead-axle positions that put one of the axles on a deck node
+    lead_positions = np.unique((np.asarray(positions, dtype=float)[:, None] + axle_offsets[None, :]).ravel())
+
+    responses = np.zeros((len(lead_positions), lines.shape[1]))
+    for offset, load in zip(axle_offsets, axle_loads):
+        responses += load * interpolate_influence(positions, lines, lead_positions - offset)
+
+    max_index = np.argmax(responses, axis=0)
+    min_index = np.argmin(responses, axis=0)
+    columns = np.arange(lines.shape[1])
+    return responses[max_index, columns], lead_positions[max_index], responses[min_index, columns], lead_positions[min_index]
@@ -0,0 +1,242 @@
+# montecarlo.py
+# Monte Carlo load-uncertainty analysis for TrussSim
+
+import numpy as np
+import solver  # type: ignore
+
+# Memory bound of one chunk of right-hand sides and solutions, used when no chunk size is given
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+# Default number of histogram bins per member for the percentile estimates
+HISTOGRAM_BINS = 256
+# Temporary bytes per sample and member of RunningStatistics.update: a float buffer, bin indices and a mask
+CHUNK_WORK_BYTES = 8 + 8 + 1
+
+# Histogram increment, of the histogram's dtype so np.add.at takes its fast path
+_ONE = np.ones(1, dtype=np.int32)
+
+class RunningStatistics:
+    """
+    Streaming per-member statistics of force samples.
+
+    Samples are added in chunks and reduced on the fly, so memory does not grow with the
+    number of samples. Mean and variance are merged exactly (Chan's parallel algorithm),
+    minimum and maximum are exact, exceedance probabilities are exact counts, and
+    percentiles are interpolated from a per-member histogram over the range of the first
+    chunk widened on both sides. Percentile accuracy is therefore about the bin width.
+    The histogram holds members x bins int32 counts and is updated in place; a chunk
+    needs about 17 bytes per sample and member of temporary memory (CHUNK_WORK_BYTES).
+
+    Attributes:
+        count (int): Number of samples added.
+        mean (numpy.ndarray): Mean of every member.
+        minimum (numpy.ndarray): Smallest sample of every member.
+        maximum (numpy.ndarray): Largest sample of every member.
+        thresholds (numpy.ndarray): Thresholds of the exceedance probabilities, shape (thresholds, members).
+    """
+    def __init__(self, num_members, thresholds=None, bins=HISTOGRAM_BINS):
+        """
+        Initialize a RunningStatistics object.
+
+        Parameters:
+            num_members (int): Number of members.
+            thresholds (array_like): Absolute force thresholds for the exceedance probabilities,
+                                     a scalar, one per threshold (thresholds,) or one per member
+                                     and threshold (thresholds, members).
+            bins (int): Number of histogram bins per member.
+        """
+        self.num_members = num_members
+        self.count = 0
+        self.mean = np.zeros(num_members)
+        self._m2 = np.zeros(num_members)
+        self.minimum = np.full(num_members, np.inf)
+        self.maximum = np.full(num_members, -np.inf)
+        thresholds = np.zeros((0, num_members)) if thresholds is None else np.asarray(thresholds, dtype=float)
+        if thresholds.ndim < 2:
+            thresholds = thresholds.reshape(-1, 1)
+        self.thresholds = np.broadcast_to(thresholds, (len(thresholds), num_members)).copy()
+        self._exceedances = np.zeros(self.thresholds.shape, dtype=np.int64)
+        self.bins = bins
+        self._low = None
+        self._width = None
+        self._histogram = np.zeros((num_members, bins), dtype=np.int32)
+        self._offsets = np.arange(num_members, dtype=np.intp) * bins
+
+    def update(self, samples):
+        """
+        Add a chunk of samples.
+
+        Parameters:
+            samples (numpy.ndarray): Forces with shape (samples, members).
+        """
+        samples = np.asarray(samples, dtype=float)
+        count = len(samples)
+        if count == 0:
+            return
+
+        # Merge mean and sum of squared deviations of the chunk; work is the one
+        # float buffer of the chunk's size, reused by the reductions below
+        chunk_mean = samples.mean(axis=0)
+        work = np.subtract(samples, chunk_mean)
+        np.square(work, out=work)
+        chunk_m2 = work.sum(axis=0)
+        total = self.count + count
+        delta = chunk_mean - self.mean
+        self.mean += delta * count / total
+        self._m2 += chunk_m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+        np.minimum(self.minimum, samples.min(axis=0), out=self.minimum)
+        np.maximum(self.maximum, samples.max(axis=0), out=self.maximum)
+
+        if len(self.thresholds):
+            magnitudes = np.abs(samples, out=work)
+            for row, threshold in enumerate(self.thresholds):
+                self._exceedances[row] += np.count_nonzero(magnitudes > threshold, axis=0)
+
+        # Fix the histogram range on the first chunk, widened by its own span on both sides
+        if self._low is None:
+            low, high = samples.min(axis=0), samples.max(axis=0)
+            span = np.maximum(high - low, 1e-12 * np.maximum(np.abs(high), 1.0))
+            self._low = low - span
+            self._width = 3 * span / self.bins
+        scaled = np.subtract(samples, self._low, out=work)
+        scaled /= self._width
+        np.clip(scaled, 0, self.bins - 1, out=scaled)
+        flat = scaled.astype(np.intp)
+        flat += self._offsets
+        np.add.at(self._histogram.reshape(-1), flat.reshape(-1), _ONE)
+
+    @property
+    def std(self):
+        """Sample standard deviation of every member."""
+        return np.sqrt(self._m2 / max(self.count - 1, 1))
+
+    def percentiles(self, q):
+        """
+        Estimate percentiles from the histograms.
+
+        Parameters:
+            q (array_like): Percentiles between 0 and 100.
+
+        Returns:
+            numpy.ndarray: Estimates with shape (percentiles, members), NaN before the first update.
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        if self._low is None:
+            return np.full((len(q), self.num_members), np.nan)
+        estimates = np.empty((len(q), self.num_members))
+        # Cumulative counts of a block of members at a time, bounded like a chunk of samples
+        block_size = max(1, MAX_CHUNK_BYTES // (CHUNK_WORK_BYTES * self.bins))
+        for start in range(0, self.num_members, block_size):
+            block = slice(start, min(start + block_size, self.num_members))
+            histogram = self._histogram[block]
+            cumulative = np.cumsum(histogram, axis=1)
+            members = np.arange(len(histogram))
+            for i, percentile in enumerate(q):
+                target = percentile / 100 * self.count
+                bin_index = np.minimum(np.count_nonzero(cumulative < target, axis=1), self.bins - 1)
+                below = np.where(bin_index > 0, cumulative[members, bin_index - 1], 0)
+                in_bin = histogram[members, bin_index]
+                fraction = np.divide(target - below, in_bin, out=np.zeros(len(histogram)), where=in_bin > 0)
+                estimates[i, block] = self._low[block] + (bin_index + np.clip(fraction, 0, 1)) * self._width[block]
+        return np.clip(estimates, self.minimum, self.maximum)
+
+    def exceedance_probabilities(self):
+        """
+        Probability that the absolute force exceeds every threshold.
+
+        Returns:
+            numpy.ndarray: Probabilities with shape (thresholds, members).
+        """
+        return self._exceedances / max(self.count, 1)
+
+def sample_loads(model, num_samples, magnitude_cov=0.1, angle_std_degrees=0.0, rng=None):
+    """
+    Sample load magnitudes and angles around the nominal loads of a model.
+
+    Magnitudes are normally distributed with a coefficient of variation, angles
+    normally distributed around the nominal angle.
+
+    Parameters:
+        model (TrussModel): The truss model with the nominal loads.
+        num_samples (int): Number of samples.
+        magnitude_cov (float or array_like): Coefficient of variation of the magnitudes, for all loads or per load.
+        angle_std_degrees (float or array_like): Standard deviation of the angles in degrees, for all loads or per load.
+        rng (numpy.random.Generator): Random number generator, or a seed.
+
+    Returns:
+        tuple: Magnitudes and angles in radians, each with shape (samples, loads).
+    """
+    rng = np.random.default_rng(rng)
+    num_loads = len(model.load_nodes)
+    magnitudes = model.load_magnitudes * (1 + np.asarray(magnitude_cov, dtype=float) * rng.standard_normal((num_samples, num_loads)))
+    angles = np.radians(model.load_angles + np.asarray(angle_std_degrees, dtype=float) * rng.standard_normal((num_samples, num_loads)))
+    return magnitudes, angles
+
+def monte_carlo(model, num_samples, magnitude_cov=0.1, angle_std_degrees=0.0, thresholds=None, percentiles=(5, 50, 95),
+                chunk_size=None, seed=None, sparse=None, bins=HISTOGRAM_BINS):
+    """
+    Member-force statistics of a truss under uncertain loads.
+
+    The equilibrium matrix is factorized once. The samples are drawn, solved as the
+    columns of one multi-right-hand-side solve and reduced to statistics chunk by chunk,
+    so the samples are never all held in memory.
+
+    Parameters:
+        model (TrussModel): The truss model with the nominal loads.
+        num_samples (int): Number of samples.
+        magnitude_cov (float or array_like): Coefficient of variation of the load magnitudes.
+        angle_std_degrees (float or array_like): Standard deviation of the load angles in degrees.
+        thresholds (array_like): Absolute force thresholds for exceedance probabilities, see RunningStatistics.
+        percentiles (array_like): Percentiles to estimate.
+        chunk_size (int): Number of samples solved at once; by default as many as fit in MAX_CHUNK_BYTES.
+        seed (int): Seed of the random number generator.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+        bins (int): Number of histogram bins per member for the percentiles.
+
+    Returns:
+        dict: 'samples', and per member 'mean', 'std', 'min', 'max', 'percentiles'
+              (shape (percentiles, members)) and 'exceedance' (shape (thresholds, members)).
+              Returns None if the truss is not statically determined.
+
+    Raises:
+        ValueError: If num_samples is less than 1.
+    """
+    if num_samples < 1:
+        raise ValueError(f"num_samples must be at least 1, got {num_samples}")
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    num_unknowns = model.num_members + len(reaction_nodes)
+
+    # Statically determined check
+    if 2 * model.num_nodes != num_unknowns:
+        print("Truss is not statically determined!")
+        return None
+
+    sparse = solver.use_sparse(num_unknowns, sparse)
+    coefficient_matrix = solver.equilibrium_matrix(model.coordinates, model.members, reaction_nodes, reaction_directions, sparse)
+    factorization = solver.factorize(coefficient_matrix)
+
+    if chunk_size is None:
+        # Right-hand sides and solutions, both (unknowns, chunk) float64, and the reduction temporaries
+        chunk_size = max(1, MAX_CHUNK_BYTES // (2 * 8 * num_unknowns + CHUNK_WORK_BYTES * model.num_members))
+    rng = np.random.default_rng(seed)
+    statistics = RunningStatistics(model.num_members, thresholds, bins)
+    scatter = solver.load_scatter_matrix(model.num_nodes, model.load_nodes)
+
+    for start in range(0, num_samples, chunk_size):
+        count = min(chunk_size, num_samples - start)
+        magnitudes, angles = sample_loads(model, count, magnitude_cov, angle_std_degrees, rng)
+        # Rows fx_0, fy_0, fx_1, ... of the load components, one column per sample
+        components = np.stack([magnitudes * np.cos(angles), magnitudes * np.sin(angles)], axis=2).reshape(count, -1).T
+        variables = factorization.solve(scatter @ components)
+        statistics.update(variables[:model.num_members].T)
+
+    return {
+        "samples": statistics.count,
+        "mean": statistics.mean,
+        "std": statistics.std,
+        "min": statistics.minimum,
+        "max": statistics.maximum,
+        "percentiles": statistics.percentiles(percentiles),
+        "exceedance": statistics.exceedance_probabilities(),
+    }
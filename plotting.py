@@ -0,0 +1,285 @@
+# plotting.py
+# Rendering for TrussSim
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection
+from matplotlib.colors import LinearSegmentedColormap, Normalize
+from matplotlib.figure import Figure
+import classes  # type: ignore
+import profiling  # type: ignore
+
+# Maximum number of text labels drawn at once; more labels are only drawn after zooming in
+LABEL_THRESHOLD = 300
+# Fixed length of load and reaction arrows
+ARROW_LENGTH = 1.0
+# Colormap for member forces: blue for positive, red for negative and gray for zero forces
+FORCE_COLORMAP = LinearSegmentedColormap.from_list('truss_forces', ['r', 'dimgray', 'b'])
+
+def truss_plot_data(connections, supports=None, nodes=None, loads=None, reaction_forces=None):
+    """
+    Collect the arrays needed for plotting from truss objects or a TrussModel.
+
+    Parameters:
+        connections (list): List of Connection objects, or a TrussModel, in which case
+                            the other arguments are not needed.
+        supports (list): List of Support objects.
+        nodes (list): List of Node objects.
+        loads (list): List of Load objects.
+        reaction_forces (list): List of Reaction objects.
+
+    Returns:
+        dict: Node coordinates and names, member node indices and forces (NaN if not
+              calculated), support nodes and types, load and reaction nodes, magnitudes
+              and angles in radians.
+    """
+    if isinstance(connections, classes.TrussModel):
+        model = connections
+        reaction_nodes, reaction_directions = model.reaction_arrays()
+        num_reactions = len(reaction_nodes)
+        return {
+            'coordinates': model.coordinates,
+            'names': None,
+            'members': model.members,
+            'forces': np.asarray(model.forces, dtype=float) if model.forces is not None else np.full(model.num_members, np.nan),
+            'support_nodes': model.support_nodes,
+            'support_types': model.support_types,
+            'load_nodes': model.load_nodes,
+            'load_magnitudes': model.load_magnitudes,
+            'load_angles': np.radians(model.load_angles),
+            'reaction_nodes': reaction_nodes,
+            'reaction_magnitudes': np.asarray(model.reactions, dtype=float) if model.reactions is not None else np.zeros(num_reactions),
+            'reaction_angles': np.where(reaction_directions == 0, 0, np.pi / 2),
+        }
+
+    node_index = {id(node): index for index, node in enumerate(nodes)}
+    reaction_forces = reaction_forces or []
+    return {
+        'coordinates': np.array([(node.x, node.y) for node in nodes], dtype=float).reshape(-1, 2),
+        'names': [node.name for node in nodes],
+        'members': np.array([(node_index[id(connection.node1)], node_index[id(connection.node2)]) for connection in connections], dtype=np.intp).reshape(-1, 2),
+        'forces': np.array([connection.force.magnitude if isinstance(getattr(connection, 'force', None), classes.Force) else np.nan
+                            for connection in connections], dtype=float),
+        'support_nodes': np.array([node_index[id(support.node)] for support in supports], dtype=np.intp),
+        'support_types': np.array([support.support_type for support in supports], dtype=str),
+        'load_nodes': np.array([node_index[id(load.node)] for load in loads], dtype=np.intp),
+        'load_magnitudes': np.array([load.magnitude for load in loads], dtype=float),
+        'load_angles': np.array([load.angle_radians for load in loads], dtype=float),
+        'reaction_nodes': np.array([node_index[id(force.node)] for force in reaction_forces], dtype=np.intp),
+        'reaction_magnitudes': np.array([force.magnitude for force in reaction_forces], dtype=float),
+        'reaction_angles': np.array([force.angle_radians for force in reaction_forces], dtype=float),
+    }
+
+class TrussPlot:
+    """
+    Collection-based plot of a truss structure.
+
+    Members are drawn as one LineCollection colored by force, nodes and supports as
+    scatter plots and loads and reactions as quiver plots, so the number of artists
+    does not grow with the size of the truss. Text labels are only drawn while at most
+    label_threshold of them are in view; zooming in brings them back.
+
+    Attributes:
+        ax (matplotlib.axes.Axes): The axes the truss is drawn on.
+        data (dict): Plot data as returned by truss_plot_data.
+        label_threshold (int): Maximum number of labels drawn at once.
+    """
+    def __init__(self, ax, data, label_threshold=LABEL_THRESHOLD):
+        """
+        Draw the truss structure.
+
+        Parameters:
+            ax (matplotlib.axes.Axes): The axes to draw on.
+            data (dict): Plot data as returned by truss_plot_data.
+            label_threshold (int): Maximum number of labels drawn at once.
+        """
+        self.ax = ax
+        self.data = data
+        self.label_threshold = label_threshold
+        self._labels = []
+        self._label_anchors = None
+        self.colorbar = None
+
+        coordinates = data['coordinates']
+        self.norm = Normalize()
+        self.cmap = FORCE_COLORMAP
+        self.mappable = ScalarMappable(norm=self.norm, cmap=self.cmap)
+
+        # Members
+        self.member_collection = LineCollection(coordinates[data['members']], linewidths=2, zorder=1)
+        # The data limits follow from the node coordinates, much cheaper than from every segment
+        ax.add_collection(self.member_collection, autolim=False)
+        ax.update_datalim(coordinates)
+        self._color_members()
+
+        # Nodes
+        self.node_scatter = ax.scatter(coordinates[:, 0], coordinates[:, 1], c='k', s=20, zorder=3)
+
+        # Supports
+        self.support_scatters = {}
+        for support_type, color, label in (('roller', 'r', 'Roller Support'), ('pin', 'b', 'Pin Support')):
+            support_coordinates = coordinates[data['support_nodes'][data['support_types'] == support_type]]
+            self.support_scatters[support_type] = ax.scatter(support_coordinates[:, 0], support_coordinates[:, 1], s=100, facecolors='none',
+                                                             edgecolors=color, linewidths=2, zorder=4, label=label)
+
+        # Loads and reactions with fixed arrow length
+        self.load_quiver = self._arrows(data['load_nodes'], data['load_angles'], 'r', 'Load')
+        self.reaction_quiver = self._arrows(data['reaction_nodes'], data['reaction_angles'], 'g', 'Reaction Force')
+
+        ax.set_xlabel('X-Axis')
+        ax.set_ylabel('Y-Axis')
+        ax.set_title('Truss Structure')
+        ax.grid(True)
+        ax.set_aspect('equal', adjustable='datalim')
+        ax.autoscale_view()
+
+        self.update_labels()
+        ax.callbacks.connect('xlim_changed', self._on_limits_changed)
+        ax.callbacks.connect('ylim_changed', self._on_limits_changed)
+
+    def _color_members(self):
+        """Color the members by force, black while forces are not calculated."""
+        forces = self.data['forces']
+        solved = ~np.isnan(forces)
+        if solved.any():
+            limit = np.abs(forces[solved]).max() or 1.0
+            self.norm.vmin, self.norm.vmax = -limit, limit
+        colors = np.zeros((len(forces), 4))
+        colors[:, 3] = 1
+        colors[solved] = self.cmap(self.norm(forces[solved]))
+        self.member_collection.set_color(colors)
+
+    def _arrows(self, node_indices, angles, color, label, quiver=None):
+        """Draw arrows of fixed length at the given nodes, reusing the quiver if the number of arrows is unchanged."""
+        origins = self.data['coordinates'][node_indices]
+        dx = ARROW_LENGTH * np.cos(angles)
+        dy = ARROW_LENGTH * np.sin(angles)
+        if quiver is not None:
+            if quiver.N == len(origins):
+                quiver.set_offsets(origins)
+                quiver.set_UVC(dx, dy)
+                return quiver
+            quiver.remove()
+        # Quiver does not update the data limits, so include the arrow tips explicitly
+        self.ax.update_datalim(np.column_stack([origins[:, 0] + dx, origins[:, 1] + dy]))
+        return self.ax.quiver(origins[:, 0], origins[:, 1], dx, dy, angles='xy', scale_units='xy', scale=1,
+                              color=color, width=0.006, zorder=5, label=label)
+
+    def show_colorbar(self):
+        """Add a colorbar for the member forces once forces are calculated."""
+        if self.colorbar is None and not np.isnan(self.data['forces']).all():
+            self.colorbar = self.ax.figure.colorbar(self.mappable, ax=self.ax, label='Force')
+
+    def update(self, data):
+        """
+        Update the existing artists in place, e.g. after solving the truss again.
+
+        The view limits are kept, so a zoomed-in view stays where it is.
+
+        Parameters:
+            data (dict): Plot data as returned by truss_plot_data.
+        """
+        self.data = data
+        self._label_anchors = None
+        coordinates = data['coordinates']
+
+        self.member_collection.set_segments(coordinates[data['members']])
+        self._color_members()
+        self.node_scatter.set_offsets(coordinates)
+        for support_type, scatter in self.support_scatters.items():
+            scatter.set_offsets(coordinates[data['support_nodes'][data['support_types'] == support_type]].reshape(-1, 2))
+        self.load_quiver = self._arrows(data['load_nodes'], data['load_angles'], 'r', 'Load', self.load_quiver)
+        self.reaction_quiver = self._arrows(data['reaction_nodes'], data['reaction_angles'], 'g', 'Reaction Force', self.reaction_quiver)
+
+        self.mappable.changed()
+        if self.colorbar is not None:
+            self.colorbar.update_normal(self.mappable)
+        else:
+            self.show_colorbar()
+        self.update_labels()
+
+    def _anchors(self):
+        """Positions of all labels with the kind and index of the labelled item, built on first use."""
+        if self._label_anchors is None:
+            data = self.data
+            coordinates = data['coordinates']
+            solved = np.flatnonzero(~np.isnan(data['forces']))
+            midpoints = coordinates[data['members'][solved]].mean(axis=1).reshape(-1, 2)
+            load_positions = coordinates[data['load_nodes']] + ARROW_LENGTH / 2 * np.column_stack([np.cos(data['load_angles']), np.sin(data['load_angles'])])
+            reaction_positions = coordinates[data['reaction_nodes']] + ARROW_LENGTH / 2 * np.column_stack([np.cos(data['reaction_angles']), np.sin(data['reaction_angles'])])
+
+            positions = np.vstack([coordinates + 0.1, midpoints, load_positions.reshape(-1, 2), reaction_positions.reshape(-1, 2)])
+            kinds = np.repeat(np.arange(4), [len(coordinates), len(solved), len(load_positions), len(reaction_positions)])
+            items = np.concatenate([np.arange(len(coordinates)), solved, np.arange(len(load_positions)), np.arange(len(reaction_positions))])
+            self._label_anchors = (positions, kinds, items)
+        return self._label_anchors
+
+    def _label(self, kind, item):
+        """Text, color and font size of a label."""
+        data = self.data
+        if kind == 0:
+            name = data['names'][item] if data['names'] is not None else classes.TrussModel.node_name(item)
+            return name, 'k', 12
+        if kind == 1:
+            force = data['forces'][item]
+            return f"{force:.2f}", self.cmap(self.norm(force)), 10
+        if kind == 2:
+            return f"{data['load_magnitudes'][item]:.2f}", 'r', 10
+        return f"{data['reaction_magnitudes'][item]:.2f}", 'g', 10
+
+    def update_labels(self):
+        """Draw the labels in view if there are at most label_threshold of them."""
+        for label in self._labels:
+            label.remove()
+        self._labels = []
+
+        positions, kinds, items = self._anchors()
+        (x0, x1), (y0, y1) = sorted(self.ax.get_xlim()), sorted(self.ax.get_ylim())
+        visible = np.flatnonzero((positions[:, 0] >= x0) & (positions[:, 0] <= x1) & (positions[:, 1] >= y0) & (positions[:, 1] <= y1))
+        if len(visible) > self.label_threshold:
+            return
+        for index in visible.tolist():
+            text, color, size = self._label(kinds[index], items[index])
+            self._labels.append(self.ax.text(positions[index, 0], positions[index, 1], text, fontsize=size, color=color))
+
+    def _on_limits_changed(self, ax):
+        """Level of detail: redraw the labels after zooming or panning."""
+        self.update_labels()
+
+def plot_truss_structure(connections, supports=None, nodes=None, loads=None, reaction_forces=None, ax=None, output_path=None, show=None, label_threshold=LABEL_THRESHOLD):
+    """
+    Plot the truss structure.
+
+    Parameters:
+        connections (list): List of Connection objects representing connections between nodes,
+                            or a TrussModel, in which case the other truss arguments are not needed.
+        supports (list): List of Support objects representing support nodes.
+        nodes (list): List of Node objects representing nodes in the truss structure.
+        loads (list): List of Load objects representing loads applied to nodes.
+        reaction_forces (list): List of Reaction objects representing reaction forces.
+        ax (matplotlib.axes.Axes): Axes to draw on. Defaults to the current pyplot axes,
+                                   or a new off-screen figure if output_path is given.
+        output_path (str): Render straight to this file (e.g. PNG or SVG) instead of showing a window.
+        show (bool): Call plt.show() at the end. Defaults to True unless output_path is given.
+        label_threshold (int): Maximum number of text labels drawn at once.
+
+    Returns:
+        TrussPlot: The plot, giving access to the axes and artists.
+    """
+    with profiling.span("plot"):
+        data = truss_plot_data(connections, supports, nodes, loads, reaction_forces)
+
+        if ax is None and output_path is not None:
+            ax = Figure().add_subplot()  # Off-screen figure, no pyplot window or GUI backend needed
+        elif ax is None:
+            ax = plt.gca()
+
+        truss_plot = TrussPlot(ax, data, label_threshold)
+        truss_plot.show_colorbar()
+
+        if output_path is not None:
+            ax.figure.savefig(output_path)
+    if show if show is not None else output_path is None:
+        plt.show()
+    return truss_plot
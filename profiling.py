@@ -0,0 +1,315 @@
+# profiling.py
+# Stage timing and profiling instrumentation for TrussSim
+
+import contextlib
+import os
+import sys
+import threading
+import time
+
+# cProfile, pstats and tracemalloc are imported when a profiler uses them, to keep importing the solver cheap
+
+# Shared no-op span returned while no profiler is active
+_NULL_SPAN = contextlib.nullcontext()
+
+# The active profiler, None while instrumentation is disabled
+_active = None
+
+def active():
+    """
+    Return the active profiler.
+
+    Returns:
+        Profiler: The active profiler, or None if instrumentation is disabled.
+    """
+    return _active
+
+def span(name):
+    """
+    Time a stage of the pipeline.
+
+    Spans nest: a span opened inside another one is reported as its child.
+    While no profiler is active this returns a shared no-op context manager.
+
+    Parameters:
+        name (str): Name of the stage, e.g. 'assembly'.
+
+    Returns:
+        Context manager timing the enclosed block.
+    """
+    if _active is None:
+        return _NULL_SPAN
+    return _active.span(name)
+
+def count(name, value=1):
+    """
+    Add to a counter, e.g. the number of solves. Does nothing while no profiler is active.
+
+    Parameters:
+        name (str): Name of the counter.
+        value (float): Amount added to the counter.
+    """
+    if _active is not None:
+        _active.count(name, value)
+
+def maximum(name, value):
+    """
+    Record a value, e.g. the matrix size, keeping the largest one. Does nothing while no profiler is active.
+
+    Parameters:
+        name (str): Name of the counter.
+        value (float): Value of the counter.
+    """
+    if _active is not None:
+        _active.maximum(name, value)
+
+class _Span:
+    """Context manager of one timed span."""
+    __slots__ = ('profiler', 'name', 'path', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        stack.append(self.name)
+        self.path = '/'.join(stack)
+        self.profiler._open(self.path)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        self.profiler._stack().pop()
+        self.profiler._record(self.path, seconds)
+        return False
+
+class Profiler:
+    """
+    Collects stage timings and counters while it is active.
+
+    Spans from all threads are collected, each thread nesting its own spans, so a
+    solve on a worker thread and the plot on the GUI thread end up in one report.
+    cProfile only profiles the thread that started the profiler.
+
+    Attributes:
+        cprofile (bool): Capture a cProfile profile.
+        memory (bool): Capture the peak memory with tracemalloc.
+        condition (bool): Estimate the condition number of the coefficient matrix, which costs extra time.
+        spans (dict): Total seconds and number of calls of every span, by path (e.g. 'solve/assembly').
+        counters (dict): Counter values by name.
+    """
+    def __init__(self, cprofile=False, memory=False, condition=False):
+        """
+        Initialize a Profiler object.
+
+        Parameters:
+            cprofile (bool): Capture a cProfile profile.
+            memory (bool): Capture the peak memory with tracemalloc.
+            condition (bool): Estimate the condition number of the coefficient matrix.
+        """
+        self.cprofile = cprofile
+        self.memory = memory
+        self.condition = condition
+        self.spans = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profile = None
+        self._peak_bytes = None
+        self._start = None
+        self._seconds = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def start(self):
+        """
+        Activate the profiler. Only one profiler is active at a time.
+        """
+        global _active
+        self._start = time.perf_counter()
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        _active = self
+
+    def stop(self):
+        """
+        Deactivate the profiler.
+        """
+        global _active
+        if _active is self:
+            _active = None
+        if self._profile is not None:
+            self._profile.disable()
+        if self.memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                self._peak_bytes = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        if self._start is not None:
+            self._seconds = time.perf_counter() - self._start
+
+    def span(self, name):
+        """
+        Time a stage; see the module-level span().
+
+        Parameters:
+            name (str): Name of the stage.
+
+        Returns:
+            Context manager timing the enclosed block.
+        """
+        return _Span(self, name)
+
+    def count(self, name, value=1):
+        """
+        Add to a counter; see the module-level count().
+
+        Parameters:
+            name (str): Name of the counter.
+            value (float): Amount added to the counter.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def maximum(self, name, value):
+        """
+        Record a value, keeping the largest one; see the module-level maximum().
+
+        Parameters:
+            name (str): Name of the counter.
+            value (float): Value of the counter.
+        """
+        with self._lock:
+            self.counters[name] = max(self.counters.get(name, value), value)
+
+    def _stack(self):
+        """Span names currently open on this thread."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _open(self, path):
+        """Register a span when it starts, so spans are kept in the order they started."""
+        with self._lock:
+            self.spans.setdefault(path, [0.0, 0])
+
+    def _record(self, path, seconds):
+        """Add the time of a finished span."""
+        with self._lock:
+            entry = self.spans[path]
+            entry[0] += seconds
+            entry[1] += 1
+
+    def report(self, profile_lines=25):
+        """
+        Return the collected data.
+
+        Parameters:
+            profile_lines (int): Number of functions listed from the cProfile profile.
+
+        Returns:
+            dict: 'total_seconds', 'spans' (list of dictionaries with path, name, depth, seconds
+                  and calls, in the order the spans first started, parents before children),
+                  'counters', 'peak_bytes' (None without memory) and 'profile'
+                  (cProfile statistics as text, None without cprofile).
+        """
+        with self._lock:
+            spans = [{"path": path, "name": path.rsplit('/', 1)[-1], "depth": path.count('/'), "seconds": seconds, "calls": calls}
+                     for path, (seconds, calls) in self.spans.items()]
+            counters = dict(self.counters)
+
+        profile = None
+        if self._profile is not None:
+            import io
+            import pstats
+            stream = io.StringIO()
+            pstats.Stats(self._profile, stream=stream).sort_stats('cumulative').print_stats(profile_lines)
+            profile = stream.getvalue()
+        return {"total_seconds": self._seconds, "spans": spans, "counters": counters, "peak_bytes": self._peak_bytes, "profile": profile}
+
+    def summary(self):
+        """
+        Return a one-line summary of the top-level stages, for a status line.
+
+        Returns:
+            str: E.g. 'solve 0.012 s | plot 0.150 s'.
+        """
+        with self._lock:
+            top_level = [(path, seconds) for path, (seconds, _) in self.spans.items() if '/' not in path]
+        return " | ".join(f"{path} {seconds:.3f} s" for path, seconds in top_level)
+
+def format_report(report):
+    """
+    Format a report as indented text for the console.
+
+    Parameters:
+        report (dict): Report as returned by Profiler.report().
+
+    Returns:
+        str: The formatted report.
+    """
+    lines = ["Stage timings:"]
+    for entry in report["spans"]:
+        lines.append(f"  {'  ' * entry['depth']}{entry['name']:<{30 - 2 * entry['depth']}} {entry['seconds']:10.4f} s  {entry['calls']:>6} calls")
+    if report["total_seconds"] is not None:
+        lines.append(f"  {'total':<30} {report['total_seconds']:10.4f} s")
+    if report["counters"]:
+        lines.append("Counters:")
+        lines.extend(f"  {name:<30} {value:g}" for name, value in report["counters"].items())
+    if report["peak_bytes"] is not None:
+        lines.append(f"Peak memory: {report['peak_bytes'] / 2**20:.1f} MiB")
+    if report["profile"]:
+        lines.append(report["profile"])
+    return "\n".join(lines)
+
+def main(argv=None):
+    """
+    Command-line entry point that runs the whole pipeline on one file and prints the report.
+
+    Parameters:
+        argv (list): Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code, 1 if the truss could not be solved.
+    """
+    import argparse
+    # Run as a script this module is __main__; use the module the pipeline reports to
+    import functions  # type: ignore
+    import profiling  # type: ignore
+
+    parser = argparse.ArgumentParser(description="Time the import, solve, plot and print stages for a truss file.")
+    parser.add_argument("input", help="truss JSON file")
+    parser.add_argument("-o", "--plot-output", help="render the plot to this file (default: skip plotting)")
+    parser.add_argument("--cprofile", action="store_true", help="include a cProfile profile")
+    parser.add_argument("--memory", action="store_true", help="record the peak memory with tracemalloc")
+    parser.add_argument("--condition", action="store_true", help="estimate the condition number of the coefficient matrix")
+    args = parser.parse_args(argv)
+
+    with profiling.Profiler(args.cprofile, args.memory, args.condition) as profiler:
+        nodes, connections, supports, loads = functions.import_json(args.input)
+        connections, reaction_forces = functions.calculate_forces(nodes, connections, supports, loads)
+        if connections is not None:
+            if args.plot_output:
+                functions.plot_truss_structure(connections, supports, nodes, loads, reaction_forces, output_path=args.plot_output)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                functions.print_all(nodes, connections, supports, loads, reaction_forces)
+
+    print(profiling.format_report(profiler.report()))
+    return 0 if connections is not None else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
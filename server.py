@@ -0,0 +1,437 @@
+# server.py
+# Local solve service for TrussSim
+
+import argparse
+import asyncio
+import collections
+import http.client
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Requests waiting for a worker before new ones are rejected with 503
+MAX_QUEUE = 1024
+# Most requests solved in one worker task, and how long to wait for more to arrive
+BATCH_SIZE = 32
+BATCH_DELAY = 0.002
+# Trusses with more members than this are solved in a task of their own
+SMALL_REQUEST_MEMBERS = 2000
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# Number of recent requests the latency percentiles are taken from
+LATENCY_WINDOW = 1000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+# Small truss solved by every worker at start-up, so imports and first-call costs are paid before any request
+_WARM_UP_TRUSS = {"nodes": [[0, 0], [3, 2], [3, 0], [6, 0]], "connections": [[0, 1], [0, 2], [1, 2], [1, 3], [2, 3]],
+                  "supports": {"0": "pin", "3": "roller"}, "loads": [[2, 100, 270]]}
+
+def _warm_up():
+    """Worker initializer: import the solver modules and solve a small truss once."""
+    # The solver core imports SciPy on first use; a warm worker loads it up front
+    import scipy.linalg
+    import scipy.sparse.linalg
+    import batch  # type: ignore
+    batch.solve_data(_WARM_UP_TRUSS)
+
+def _solve_batch(payloads):
+    """Worker task: solve a batch of request payloads; a malformed payload gives its ValueError instead of a result."""
+    import batch  # type: ignore
+    results = []
+    for name, truss_data in payloads:
+        try:
+            model = batch.read_data(truss_data)
+        except ValueError as e:
+            results.append(e)
+            continue
+        results.append(batch.solve_model(model, name))
+    return results
+
+class _Request:
+    """A queued solve request."""
+    __slots__ = ('name', 'truss_data', 'members', 'future', 'received')
+
+    def __init__(self, name, truss_data, future):
+        self.name = name
+        self.truss_data = truss_data
+        self.members = len(truss_data.get('connections', ())) if isinstance(truss_data, dict) else 0
+        self.future = future
+        self.received = time.perf_counter()
+
+class SolveServer:
+    """
+    Persistent local solve service speaking JSON over HTTP/1.1.
+
+    Worker processes import the solver once and stay warm, so a request only pays
+    for its solve. Requests go into a bounded queue; a dispatcher drains it into
+    micro-batches of small trusses (up to batch_size requests, waiting at most
+    batch_delay seconds for more) and hands every batch to a free worker. Large
+    trusses get a task of their own. At most one batch per worker is in flight,
+    so a backlog stays in the queue, and once the queue is full new requests are
+    rejected with 503 and a Retry-After header instead of piling up.
+
+    Endpoints:
+        POST /solve: Truss data in the JSON layout of functions.import_json; returns the
+                     result of batch.solve_data (status, member forces, reactions, error),
+                     or 400 if the body is not a well-formed truss.
+        GET /health: Status, queue depth and number of workers.
+        GET /metrics: Request, batch and latency counters.
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, max_queue=MAX_QUEUE, batch_size=BATCH_SIZE,
+                 batch_delay=BATCH_DELAY, small_request_members=SMALL_REQUEST_MEMBERS):
+        """
+        Initialize a SolveServer object.
+
+        Parameters:
+            host (str): Address to listen on.
+            port (int): Port to listen on, 0 to pick a free one.
+            workers (int): Number of worker processes, defaults to the number of CPUs.
+            max_queue (int): Requests waiting for a worker before new ones are rejected.
+            batch_size (int): Most requests solved in one worker task.
+            batch_delay (float): Seconds to wait for more requests before a batch is dispatched.
+            small_request_members (int): Trusses with more members are solved in a task of their own.
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.small_request_members = small_request_members
+        self.metrics = collections.Counter()
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._queue = None
+        self._slots = None
+        self._executor = None
+        self._busy = 0
+        self._server = None
+        self._dispatcher = None
+        self._started = None
+
+    async def start(self):
+        """
+        Start the worker processes and listen for connections.
+
+        Returns once the workers are warm; self.port holds the port actually listened on.
+        """
+        loop = asyncio.get_running_loop()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+        # One no-op task per worker spawns all of them and waits for their warm-up
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _solve_batch, []) for _ in range(self.workers)))
+
+        self._queue = asyncio.Queue(self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.time()
+
+    async def serve_forever(self):
+        """Start the server if needed and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Stop listening, fail the queued requests and shut the workers down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+        while self._queue is not None and not self._queue.empty():
+            request = self._queue.get_nowait()
+            if not request.future.done():
+                request.future.set_exception(ConnectionAbortedError("Server is shutting down"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _dispatch(self):
+        """Drain the queue into micro-batches and run them on free workers."""
+        loop = asyncio.get_running_loop()
+        pending = None
+        while True:
+            # Wait for a free worker before taking requests, so the backlog stays in the bounded queue
+            await self._slots.acquire()
+            batch = [pending if pending is not None else await self._queue.get()]
+            pending = None
+            if batch[0].members <= self.small_request_members:
+                deadline = loop.time() + self.batch_delay
+                while len(batch) < self.batch_size:
+                    try:
+                        request = self._queue.get_nowait() if self._queue.qsize() else await asyncio.wait_for(self._queue.get(), deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+                    if request.members > self.small_request_members:
+                        # Large trusses go into the next task of their own
+                        pending = request
+                        break
+                    batch.append(request)
+            self._busy += 1
+            self.metrics["batches"] += 1
+            self.metrics["batched_requests"] += len(batch)
+            future = loop.run_in_executor(self._executor, _solve_batch, [(request.name, request.truss_data) for request in batch])
+            future.add_done_callback(lambda future, batch=batch: self._finish_batch(future, batch))
+
+    def _finish_batch(self, future, batch):
+        """Hand the results of a batch to the waiting requests and free the worker."""
+        self._busy -= 1
+        self._slots.release()
+        try:
+            results = future.result()
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+        for request, result in zip(batch, results):
+            if request.future.done():
+                continue
+            if isinstance(result, Exception):
+                request.future.set_exception(result)
+            else:
+                request.future.set_result(result)
+
+    async def solve(self, truss_data, name=None):
+        """
+        Queue truss data for solving and wait for the result.
+
+        Parameters:
+            truss_data (dict): Truss data in the JSON layout.
+            name (str): Name reported as the 'file' of the result.
+
+        Returns:
+            dict: The result as returned by batch.solve_data.
+
+        Raises:
+            asyncio.QueueFull: If the queue is full.
+            ValueError: If the truss data is not a well-formed truss, see batch.read_data.
+        """
+        request = _Request(name, truss_data, asyncio.get_running_loop().create_future())
+        self._queue.put_nowait(request)
+        self.metrics["queued"] += 1
+        try:
+            return await request.future
+        finally:
+            self._latencies.append(time.perf_counter() - request.received)
+
+    def health(self):
+        """Health status of the server."""
+        return {"status": "ok", "workers": self.workers, "queue_depth": self._queue.qsize(), "max_queue": self.max_queue,
+                "uptime_seconds": time.time() - self._started}
+
+    def metrics_report(self):
+        """Counters and latency percentiles of the server."""
+        report = dict(self.metrics)
+        report["queue_depth"] = self._queue.qsize()
+        report["workers_busy"] = self._busy
+        report["mean_batch_size"] = self.metrics["batched_requests"] / self.metrics["batches"] if self.metrics["batches"] else 0.0
+        if self._latencies:
+            p50, p95, p99 = np.percentile(np.fromiter(self._latencies, float), [50, 95, 99]).tolist()
+            report["latency_seconds"] = {"p50": p50, "p95": p95, "p99": p99}
+        return report
+
+    async def _handle_connection(self, reader, writer):
+        """Serve the requests of one (keep-alive) connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, *_ = request_line.decode('latin-1').split() + ['', '']
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                length = headers.get('content-length', '0') or '0'
+                if not length.isdigit():
+                    await self._respond(writer, 400, {"error": f"Invalid Content-Length {length!r}"}, close=True)
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                status, payload, extra_headers = await self._route(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, extra_headers, close=not keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        """Handle one request; returns the status code, response payload and extra headers."""
+        self.metrics["requests"] += 1
+        path = path.split('?', 1)[0]
+        if path == '/health':
+            return (200, self.health(), {}) if method == 'GET' else (405, {"error": "Use GET"}, {})
+        if path == '/metrics':
+            return (200, self.metrics_report(), {}) if method == 'GET' else (405, {"error": "Use GET"}, {})
+        if path != '/solve':
+            return 404, {"error": f"Unknown path {path}"}, {}
+        if method != 'POST':
+            return 405, {"error": "Use POST"}, {}
+
+        try:
+            truss_data = json.loads(body)
+        except ValueError as e:
+            self.metrics["invalid"] += 1
+            return 400, {"error": f"Invalid JSON: {e}"}, {}
+        try:
+            result = await self.solve(truss_data, truss_data.get('name') if isinstance(truss_data, dict) else None)
+        except asyncio.QueueFull:
+            self.metrics["rejected"] += 1
+            return 503, {"error": "Solve queue is full"}, {"Retry-After": "1"}
+        except ValueError as e:
+            # Malformed input is the client's fault; a well-formed truss that fails to solve still gets 200
+            self.metrics["invalid"] += 1
+            return 400, {"error": str(e)}, {}
+        except Exception as e:
+            self.metrics["failed"] += 1
+            return 500, {"error": f"{type(e).__name__}: {e}"}, {}
+        self.metrics[f"status_{result['status'].replace(' ', '_')}"] += 1
+        return 200, result, {}
+
+    async def _respond(self, writer, status, payload, extra_headers=None, close=False):
+        """Write a JSON response."""
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body)), "Connection": "close" if close else "keep-alive"}
+        headers.update(extra_headers or {})
+        head = f"HTTP/1.1 {status} {REASONS[status]}\r\n" + "".join(f"{key}: {value}\r\n" for key, value in headers.items()) + "\r\n"
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+def run_server(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, **kwargs):
+    """
+    Run the solve server until interrupted.
+
+    Parameters:
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+        workers (int): Number of worker processes, defaults to the number of CPUs.
+        **kwargs: Further arguments of SolveServer.
+    """
+    async def serve():
+        server = SolveServer(host, port, workers, **kwargs)
+        await server.start()
+        print(f"Solving on http://{server.host}:{server.port} with {server.workers} warm workers")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+class SolveClient:
+    """
+    Blocking client of the solve server, e.g. for tests and scripts.
+
+    The connection is kept alive between requests.
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=60.0):
+        """
+        Initialize a SolveClient object.
+
+        Parameters:
+            host (str): Address of the server.
+            port (int): Port of the server.
+            timeout (float): Timeout of a request in seconds.
+        """
+        self._connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _request(self, method, path, payload=None):
+        """Send a request and return the status code and decoded response."""
+        body = None if payload is None else json.dumps(payload)
+        self._connection.request(method, path, body, {"Content-Type": "application/json"} if body else {})
+        response = self._connection.getresponse()
+        return response.status, json.loads(response.read())
+
+    def solve(self, truss_data):
+        """
+        Solve truss data on the server.
+
+        Parameters:
+            truss_data (dict): Truss data in the JSON layout.
+
+        Returns:
+            tuple: HTTP status code and the result (or an error dictionary).
+        """
+        return self._request("POST", "/solve", truss_data)
+
+    def health(self):
+        """Health status of the server."""
+        return self._request("GET", "/health")[1]
+
+    def metrics(self):
+        """Counters and latency percentiles of the server."""
+        return self._request("GET", "/metrics")[1]
+
+    def close(self):
+        """Close the connection."""
+        self._connection.close()
+
+def main(argv=None):
+    """
+    Command-line entry point: 'serve' runs the server, 'submit' sends truss files to it.
+
+    Parameters:
+        argv (list): Command-line arguments, defaults to sys.argv[1:].
+
+    Returns:
+        int: Exit code, 1 if a submitted truss could not be solved.
+    """
+    parser = argparse.ArgumentParser(description="Persistent local solve service for truss JSON files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve = subparsers.add_parser("serve", help="run the solve server")
+    serve.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    serve.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: number of CPUs)")
+    serve.add_argument("--max-queue", type=int, default=MAX_QUEUE, help="queued requests before new ones are rejected")
+    serve.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="most requests solved in one worker task")
+    serve.add_argument("--batch-delay", type=float, default=BATCH_DELAY, help="seconds to wait for more requests per batch")
+    submit = subparsers.add_parser("submit", help="solve truss files on a running server")
+    submit.add_argument("inputs", nargs="+", help="truss JSON files")
+    submit.add_argument("--host", default=DEFAULT_HOST, help="address of the server")
+    submit.add_argument("--port", type=int, default=DEFAULT_PORT, help="port of the server")
+    submit.add_argument("--metrics", action="store_true", help="print the server metrics afterwards")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        run_server(args.host, args.port, args.workers, max_queue=args.max_queue, batch_size=args.batch_size, batch_delay=args.batch_delay)
+        return 0
+
+    client = SolveClient(args.host, args.port)
+    failed = 0
+    try:
+        for file_path in args.inputs:
+            with open(file_path) as file:
+                truss_data = json.load(file)
+            status, result = client.solve(truss_data)
+            if status != 200 or result["status"] != "ok":
+                failed += 1
+            print(f"{file_path}: {result.get('status', status)}" + (f" ({result['error']})" if result.get("error") else ""))
+        if args.metrics:
+            print(json.dumps(client.metrics(), indent=2))
+    finally:
+        client.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
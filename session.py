@@ -0,0 +1,248 @@
+# session.py
+# Incremental re-solving for TrussSim
+
+import numpy as np
+import solver  # type: ignore
+
+# Number of changed matrix columns up to which edits are handled by low-rank updates
+MAX_UPDATE_RANK = 32
+
+class SolverSession:
+    """
+    Persistent solver for a statically determined truss that is edited step by step.
+
+    The equilibrium matrix is factorized once. Load edits only change the right-hand
+    side and cost one back substitution. Geometry edits (moving a node, replacing a
+    member, moving a support) change a few columns of the matrix and are handled with
+    the Sherman-Morrison-Woodbury formula on top of the existing factorization. Edits
+    that change the number of unknowns, or more than MAX_UPDATE_RANK changed columns,
+    trigger a full refactorization.
+
+    Attributes:
+        model (TrussModel): The truss model, edited in place.
+        sparse (bool): Use the sparse engine, or None to choose automatically.
+        refactorizations (int): Number of full factorizations so far.
+        low_rank_solves (int): Number of solves that used the low-rank update.
+    """
+    def __init__(self, model, sparse=None):
+        """
+        Initialize the session and factorize the equilibrium matrix.
+
+        Parameters:
+            model (TrussModel): The truss model. It is edited in place by the session.
+            sparse (bool): Use the sparse engine, or None to choose automatically.
+        """
+        self.model = model
+        self.sparse = sparse
+        self.refactorizations = 0
+        self.low_rank_solves = 0
+        self._factorization = None
+        self.refactorize()
+
+    def refactorize(self):
+        """
+        Assemble and factorize the equilibrium matrix of the current model.
+
+        Returns:
+            bool: False if the truss is not statically determined, in which case nothing is factorized.
+        """
+        model = self.model
+        self._reaction_nodes, self._reaction_directions = model.reaction_arrays()
+        self._changed = {}  # Column index -> (difference to the factorized column, its solve)
+        self._factorization = None
+        num_unknowns = model.num_members + len(self._reaction_nodes)
+        if 2 * model.num_nodes != num_unknowns:
+            return False
+
+        sparse = solver.use_sparse(num_unknowns, self.sparse)
+        self._matrix = solver.equilibrium_matrix(model.coordinates, model.members, self._reaction_nodes, self._reaction_directions, sparse)
+        self._factorization = solver.factorize(self._matrix)
+        self.refactorizations += 1
+        return True
+
+    def _column(self, index):
+        """Current column of the equilibrium matrix for a member or reaction."""
+        model = self.model
+        column = np.zeros(2 * model.num_nodes)
+        if index < model.num_members:
+            node1, node2 = model.members[index]
+            delta = model.coordinates[node2] - model.coordinates[node1]
+            direction = delta / np.hypot(delta[0], delta[1])
+            column[2 * node1:2 * node1 + 2] += direction
+            column[2 * node2:2 * node2 + 2] -= direction
+        else:
+            reaction = index - model.num_members
+            column[2 * self._reaction_nodes[reaction] + self._reaction_directions[reaction]] = 1
+        return column
+
+    def _factorized_column(self, index):
+        """Column of the factorized equilibrium matrix."""
+        column = self._matrix[:, [index]]
+        return column.toarray().ravel() if hasattr(column, 'toarray') else np.asarray(column).ravel()
+
+    def _mark_changed(self, indices):
+        """Record changed columns; refactorize instead if there are too many."""
+        if self._factorization is None:
+            return
+        indices = set(int(index) for index in indices)
+        if len(indices | set(self._changed)) > MAX_UPDATE_RANK:
+            self.refactorize()
+            return
+        for index in indices:
+            difference = self._column(index) - self._factorized_column(index)
+            self._changed[index] = (difference, self._factorization.solve(difference))
+
+    def set_load(self, index, node=None, magnitude=None, angle_degrees=None):
+        """
+        Change a load. Only the right-hand side changes, so no refactorization is needed.
+
+        Parameters:
+            index (int): Index of the load.
+            node (int): New node index, or None to keep it.
+            magnitude (float): New magnitude, or None to keep it.
+            angle_degrees (float): New angle in degrees, or None to keep it.
+        """
+        model = self.model
+        model.load_nodes, model.load_magnitudes, model.load_angles = model.load_nodes.copy(), model.load_magnitudes.copy(), model.load_angles.copy()
+        if node is not None:
+            model.load_nodes[index] = node
+        if magnitude is not None:
+            model.load_magnitudes[index] = magnitude
+        if angle_degrees is not None:
+            model.load_angles[index] = angle_degrees
+
+    def add_load(self, node, magnitude, angle_degrees):
+        """
+        Add a load. Only the right-hand side changes.
+
+        Parameters:
+            node (int): Node index.
+            magnitude (float): Magnitude of the load.
+            angle_degrees (float): Angle of the load in degrees.
+        """
+        model = self.model
+        model.load_nodes = np.append(model.load_nodes, np.int32(node))
+        model.load_magnitudes = np.append(model.load_magnitudes, float(magnitude))
+        model.load_angles = np.append(model.load_angles, float(angle_degrees))
+
+    def remove_load(self, index):
+        """
+        Remove a load. Only the right-hand side changes.
+
+        Parameters:
+            index (int): Index of the load.
+        """
+        model = self.model
+        model.load_nodes = np.delete(model.load_nodes, index)
+        model.load_magnitudes = np.delete(model.load_magnitudes, index)
+        model.load_angles = np.delete(model.load_angles, index)
+
+    def move_node(self, node, x, y):
+        """
+        Move a node. The columns of all members at the node change.
+
+        Parameters:
+            node (int): Node index.
+            x (float): New x-coordinate.
+            y (float): New y-coordinate.
+        """
+        model = self.model
+        model.coordinates = model.coordinates.copy()
+        model.coordinates[node] = (x, y)
+        model.invalidate()
+        self._mark_changed(np.flatnonzero((model.members == node).any(axis=1)))
+
+    def replace_member(self, index, node1, node2):
+        """
+        Connect a member to other nodes. One column changes.
+
+        Parameters:
+            index (int): Index of the member.
+            node1 (int): New first node index.
+            node2 (int): New second node index.
+        """
+        model = self.model
+        model.members = model.members.copy()
+        model.members[index] = (node1, node2)
+        model.invalidate()
+        self._mark_changed([index])
+
+    def move_support(self, index, node):
+        """
+        Move a support to another node. The columns of its reactions change.
+
+        Parameters:
+            index (int): Index of the support.
+            node (int): New node index.
+        """
+        model = self.model
+        model.support_nodes = model.support_nodes.copy()
+        model.support_nodes[index] = node
+        model.invalidate()
+        counts = (model.support_types == 'pin') * 2 + (model.support_types == 'roller')
+        first = model.num_members + int(counts[:index].sum())
+        self._reaction_nodes, self._reaction_directions = model.reaction_arrays()
+        self._mark_changed(range(first, first + int(counts[index])))
+
+    def add_support(self, node, support_type):
+        """
+        Add a support. The number of unknowns changes, so the matrix is refactorized.
+
+        Parameters:
+            node (int): Node index.
+            support_type (str): Type of support ('pin' or 'roller').
+        """
+        model = self.model
+        model.support_nodes = np.append(model.support_nodes, np.int32(node))
+        model.support_types = np.append(model.support_types, support_type)
+        model.invalidate()
+        self.refactorize()
+
+    def remove_support(self, index):
+        """
+        Remove a support. The number of unknowns changes, so the matrix is refactorized.
+
+        Parameters:
+            index (int): Index of the support.
+        """
+        model = self.model
+        model.support_nodes = np.delete(model.support_nodes, index)
+        model.support_types = np.delete(model.support_types, index)
+        model.invalidate()
+        self.refactorize()
+
+    def solve(self):
+        """
+        Solve the current model.
+
+        With changed columns U (differences to the factorized matrix A) at column
+        indices J, the Sherman-Morrison-Woodbury formula gives
+        x = y - W (I + W[J])^-1 y[J] with y = A^-1 b and W = A^-1 U.
+
+        Returns:
+            tuple: Arrays of member forces and reaction forces, also stored in the model.
+                   Returns None if the truss is not statically determined.
+
+        Raises:
+            numpy.linalg.LinAlgError: If the edited truss is unstable.
+        """
+        model = self.model
+        if self._factorization is None:
+            # A previous edit made the truss not statically determined; maybe this one fixed it
+            if not self.refactorize():
+                print("Truss is not statically determined!")
+                return None, None
+
+        constant_matrix = solver.load_vector(model.num_nodes, model.load_nodes, model.load_magnitudes, np.radians(model.load_angles))
+        variables = self._factorization.solve(constant_matrix)
+
+        if self._changed:
+            indices = np.fromiter(self._changed, dtype=np.intp)
+            solved_columns = np.column_stack([self._changed[index][1] for index in indices.tolist()])
+            capacitance = np.eye(len(indices)) + solved_columns[indices]
+            variables = variables - solved_columns @ np.linalg.solve(capacitance, variables[indices])
+            self.low_rank_solves += 1
+
+        model.forces = variables[:model.num_members]
+        model.reactions = variables[model.num_members:]
+        return model.forces, model.reactions
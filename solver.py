@@ -0,0 +1,529 @@
+# solver.py
+# Linear algebra for TrussSim
+
+import sys
+import warnings
+import numpy as np
+import profiling  # type: ignore
+
+# SciPy is imported by the functions that need it, so dense solves only load NumPy
+
+# Number of unknowns above which the sparse engine is chosen automatically
+SPARSE_THRESHOLD = 1000
+
+# Largest lower plus upper bandwidth for which the banded solver is used after reordering
+MAX_BANDWIDTH = 64
+
+def use_sparse(size, sparse=None):
+    """
+    Decide whether the sparse engine should be used.
+
+    Parameters:
+        size (int): Number of unknowns of the system.
+        sparse (bool): Explicit choice, or None to decide based on SPARSE_THRESHOLD.
+
+    Returns:
+        bool: True if the sparse engine should be used.
+    """
+    if sparse is None:
+        return size > SPARSE_THRESHOLD
+    return bool(sparse)
+
+def issparse(matrix):
+    """
+    Check whether a matrix is a SciPy sparse matrix, without importing SciPy.
+
+    Parameters:
+        matrix (numpy.ndarray or scipy.sparse matrix): The matrix.
+
+    Returns:
+        bool: True for a sparse matrix.
+    """
+    # A sparse matrix can only exist once scipy.sparse has been imported
+    sparse_module = sys.modules.get('scipy.sparse')
+    return sparse_module is not None and sparse_module.issparse(matrix)
+
+def assemble_matrix(rows, columns, values, shape, sparse=False):
+    """
+    Assemble a coefficient matrix from coordinate (COO) triplets.
+
+    Duplicate entries are summed, as usual for COO assembly.
+
+    Parameters:
+        rows (array_like): Row index of every entry.
+        columns (array_like): Column index of every entry.
+        values (array_like): Value of every entry.
+        shape (tuple): Shape of the resulting matrix.
+        sparse (bool): Return a CSC matrix instead of a dense array.
+
+    Returns:
+        numpy.ndarray or scipy.sparse.csc_matrix: The assembled matrix.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    columns = np.asarray(columns, dtype=np.intp)
+    values = np.asarray(values, dtype=float)
+    if sparse:
+        import scipy.sparse
+        return scipy.sparse.coo_matrix((values, (rows, columns)), shape=shape).tocsc()
+    matrix = np.zeros(shape)
+    np.add.at(matrix, (rows, columns), values)
+    return matrix
+
+def direction_cosines(coordinates, members):
+    """
+    Compute the direction cosines and lengths of all members.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, dimensions).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+
+    Returns:
+        tuple: Direction cosines with shape (members, dimensions) and member lengths.
+    """
+    delta = coordinates[members[:, 1]] - coordinates[members[:, 0]]
+    if delta.shape[1] == 2:
+        lengths = np.hypot(delta[:, 0], delta[:, 1])
+    else:
+        lengths = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+    return delta / lengths[:, None], lengths
+
+def equilibrium_entries(coordinates, members, reaction_nodes, reaction_directions, dimensions=2):
+    """
+    Compute the nonzero entries of the equilibrium coefficient matrix.
+
+    Rows 2*i and 2*i+1 hold the x and y equilibrium of node i (rows 3*i to 3*i+2
+    in 3D), the first len(members) columns hold the member forces and the
+    remaining columns the reaction forces.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, dimensions).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y, 2 for z).
+        dimensions (int): Number of coordinates per node, 2 for plane and 3 for space trusses.
+
+    Returns:
+        tuple: Arrays of rows, columns and values of the nonzero entries.
+    """
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, dimensions)
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+    reaction_nodes = np.asarray(reaction_nodes, dtype=np.intp)
+    reaction_directions = np.asarray(reaction_directions, dtype=np.intp)
+    num_members = len(members)
+
+    # Direction cosines of all members at once
+    direction, _ = direction_cosines(coordinates, members)
+
+    # 2*dimensions entries per member: the direction cosines at node1 and their negatives at node2
+    axes = np.arange(dimensions)
+    member_rows = np.hstack([dimensions * members[:, :1] + axes, dimensions * members[:, 1:] + axes])
+    member_columns = np.repeat(np.arange(num_members), 2 * dimensions)
+    member_values = np.hstack([direction, -direction])
+
+    # One unit entry per reaction force
+    reaction_rows = dimensions * reaction_nodes + reaction_directions
+    reaction_columns = num_members + np.arange(len(reaction_nodes))
+
+    rows = np.concatenate([member_rows.ravel(), reaction_rows])
+    columns = np.concatenate([member_columns, reaction_columns])
+    values = np.concatenate([member_values.ravel(), np.ones(len(reaction_nodes))])
+    return rows, columns, values
+
+def equilibrium_matrix(coordinates, members, reaction_nodes, reaction_directions, sparse=False, dimensions=2):
+    """
+    Assemble the equilibrium coefficient matrix.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, dimensions).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y, 2 for z).
+        sparse (bool): Return a CSC matrix instead of a dense array.
+        dimensions (int): Number of coordinates per node, 2 for plane and 3 for space trusses.
+
+    Returns:
+        numpy.ndarray or scipy.sparse.csc_matrix: The coefficient matrix.
+    """
+    rows, columns, values = equilibrium_entries(coordinates, members, reaction_nodes, reaction_directions, dimensions)
+    shape = (dimensions * len(np.asarray(coordinates).reshape(-1, dimensions)), len(np.asarray(members).reshape(-1, 2)) + len(reaction_nodes))
+    return assemble_matrix(rows, columns, values, shape, sparse)
+
+def load_vector(num_nodes, load_nodes, magnitudes, angles_radians):
+    """
+    Assemble the constant matrix (right-hand side) from nodal loads.
+
+    Loads are moved to the right-hand side, so their components enter with a negative sign.
+
+    Parameters:
+        num_nodes (int): Number of nodes in the truss.
+        load_nodes (array_like): Node index of every load.
+        magnitudes (array_like): Magnitude of every load.
+        angles_radians (array_like): Angle of every load in radians.
+
+    Returns:
+        numpy.ndarray: The constant matrix, shape (2*num_nodes,).
+    """
+    load_nodes = np.asarray(load_nodes, dtype=np.intp)
+    magnitudes = np.asarray(magnitudes, dtype=float)
+    angles_radians = np.asarray(angles_radians, dtype=float)
+    constant_matrix = np.zeros(2 * num_nodes)
+    np.add.at(constant_matrix, 2 * load_nodes, -magnitudes * np.cos(angles_radians))
+    np.add.at(constant_matrix, 2 * load_nodes + 1, -magnitudes * np.sin(angles_radians))
+    return constant_matrix
+
+def load_matrix(num_nodes, num_cases, load_cases, load_nodes, magnitudes, angles_radians):
+    """
+    Assemble the constant matrices of several load cases as the columns of one matrix.
+
+    Parameters:
+        num_nodes (int): Number of nodes in the truss.
+        num_cases (int): Number of load cases.
+        load_cases (array_like): Load case index of every load.
+        load_nodes (array_like): Node index of every load.
+        magnitudes (array_like): Magnitude of every load.
+        angles_radians (array_like): Angle of every load in radians.
+
+    Returns:
+        numpy.ndarray: The constant matrices, shape (2*num_nodes, num_cases).
+    """
+    load_cases = np.asarray(load_cases, dtype=np.intp)
+    load_nodes = np.asarray(load_nodes, dtype=np.intp)
+    magnitudes = np.asarray(magnitudes, dtype=float)
+    angles_radians = np.asarray(angles_radians, dtype=float)
+    constant_matrix = np.zeros((2 * num_nodes, num_cases))
+    np.add.at(constant_matrix, (2 * load_nodes, load_cases), -magnitudes * np.cos(angles_radians))
+    np.add.at(constant_matrix, (2 * load_nodes + 1, load_cases), -magnitudes * np.sin(angles_radians))
+    return constant_matrix
+
+def component_load_vector(num_nodes, load_nodes, components):
+    """
+    Assemble the constant matrix (right-hand side) from load vectors.
+
+    Like load_vector, but the loads are given by their components, e.g. (fx, fy, fz)
+    for space trusses, and enter with a negative sign.
+
+    Parameters:
+        num_nodes (int): Number of nodes in the truss.
+        load_nodes (array_like): Node index of every load.
+        components (array_like): Components of every load, shape (loads, dimensions).
+
+    Returns:
+        numpy.ndarray: The constant matrix, shape (dimensions*num_nodes,).
+    """
+    load_nodes = np.asarray(load_nodes, dtype=np.intp)
+    components = np.asarray(components, dtype=float)
+    if components.ndim != 2:
+        components = components.reshape(len(load_nodes), -1)
+    dimensions = components.shape[1]
+    rows = dimensions * load_nodes[:, None] + np.arange(dimensions)
+    return -np.bincount(rows.ravel(), weights=components.ravel(), minlength=dimensions * num_nodes)
+
+def load_scatter_matrix(num_nodes, load_nodes):
+    """
+    Sparse matrix that maps load components to the constant matrix.
+
+    For loads at fixed nodes whose magnitudes and angles vary, the constant matrices of
+    many variants are one sparse product: scatter @ components, where the components
+    are stacked as rows [fx_0, fy_0, fx_1, fy_1, ...] with one column per variant.
+
+    Parameters:
+        num_nodes (int): Number of nodes in the truss.
+        load_nodes (array_like): Node index of every load.
+
+    Returns:
+        scipy.sparse.csr_matrix: Matrix with shape (2*num_nodes, 2*loads).
+    """
+    import scipy.sparse
+    load_nodes = np.asarray(load_nodes, dtype=np.intp)
+    rows = np.column_stack([2 * load_nodes, 2 * load_nodes + 1]).ravel()
+    return scipy.sparse.csr_matrix((np.full(len(rows), -1.0), (rows, np.arange(len(rows)))), shape=(2 * num_nodes, len(rows)))
+
+class Factorization:
+    """
+    LU factorization of a square coefficient matrix.
+
+    The matrix is factorized once; every call to solve() only performs the
+    forward and back substitution, for one or many right-hand sides.
+    """
+    def __init__(self, coefficient_matrix):
+        """
+        Factorize the coefficient matrix.
+
+        Parameters:
+            coefficient_matrix (numpy.ndarray or scipy.sparse matrix): Square coefficient matrix.
+
+        Raises:
+            numpy.linalg.LinAlgError: If the coefficient matrix is singular.
+        """
+        self.shape = coefficient_matrix.shape
+        self.sparse = issparse(coefficient_matrix)
+        if self.shape[0] != self.shape[1]:
+            raise np.linalg.LinAlgError("Coefficient matrix must be square")
+        if self.sparse:
+            import scipy.sparse.linalg
+            try:
+                self._lu = scipy.sparse.linalg.splu(scipy.sparse.csc_matrix(coefficient_matrix))
+            except RuntimeError as e:
+                raise np.linalg.LinAlgError(f"Singular matrix ({e})") from e
+        else:
+            import scipy.linalg
+            with warnings.catch_warnings():
+                # A singular matrix raises LinAlgError below; SciPy's warning about it is noise
+                warnings.simplefilter('ignore', scipy.linalg.LinAlgWarning)
+                lu, piv = scipy.linalg.lu_factor(np.asarray(coefficient_matrix, dtype=float), check_finite=False)
+            if np.any(np.diag(lu) == 0):
+                raise np.linalg.LinAlgError("Singular matrix")
+            self._lu = (lu, piv)
+
+    def solve(self, constant_matrix, transpose=False):
+        """
+        Solve the factorized system.
+
+        Parameters:
+            constant_matrix (numpy.ndarray): Right-hand side, shape (n,) or (n, k) for k right-hand sides.
+            transpose (bool): Solve the transposed system instead.
+
+        Returns:
+            numpy.ndarray: Solution with the same shape as the right-hand side.
+        """
+        constant_matrix = np.asarray(constant_matrix, dtype=float)
+        if self.sparse:
+            return self._lu.solve(constant_matrix, trans='T' if transpose else 'N')
+        import scipy.linalg
+        return scipy.linalg.lu_solve(self._lu, constant_matrix, trans=1 if transpose else 0, check_finite=False)
+
+class CholeskyFactorization:
+    """
+    Factorization of a symmetric positive-definite matrix, such as a stiffness matrix.
+
+    Dense matrices use a Cholesky factorization. SciPy has no sparse Cholesky, so
+    sparse matrices use SuperLU in symmetric mode (minimum degree ordering on A^T+A,
+    no off-diagonal pivoting), which factorizes them as a symmetric LDL^T would.
+    """
+    def __init__(self, matrix):
+        """
+        Factorize the matrix.
+
+        Parameters:
+            matrix (numpy.ndarray or scipy.sparse matrix): Symmetric positive-definite matrix.
+
+        Raises:
+            numpy.linalg.LinAlgError: If the matrix is singular or not positive definite.
+        """
+        self.shape = matrix.shape
+        self.sparse = issparse(matrix)
+        if self.sparse:
+            import scipy.sparse.linalg
+            try:
+                self._factor = scipy.sparse.linalg.splu(scipy.sparse.csc_matrix(matrix), permc_spec='MMD_AT_PLUS_A',
+                                                        diag_pivot_thresh=0, options={'SymmetricMode': True})
+            except RuntimeError as e:
+                raise np.linalg.LinAlgError(f"Singular matrix ({e})") from e
+        else:
+            import scipy.linalg
+            self._factor = scipy.linalg.cho_factor(np.asarray(matrix, dtype=float), check_finite=False)
+
+    def solve(self, constant_matrix):
+        """
+        Solve the factorized system.
+
+        Parameters:
+            constant_matrix (numpy.ndarray): Right-hand side, shape (n,) or (n, k) for k right-hand sides.
+
+        Returns:
+            numpy.ndarray: Solution with the same shape as the right-hand side.
+        """
+        constant_matrix = np.asarray(constant_matrix, dtype=float)
+        if self.sparse:
+            return self._factor.solve(constant_matrix)
+        import scipy.linalg
+        return scipy.linalg.cho_solve(self._factor, constant_matrix, check_finite=False)
+
+def factorize(coefficient_matrix):
+    """
+    Factorize a dense or sparse coefficient matrix for repeated solves.
+
+    Parameters:
+        coefficient_matrix (numpy.ndarray or scipy.sparse matrix): Square coefficient matrix.
+
+    Returns:
+        Factorization: The factorization.
+    """
+    return Factorization(coefficient_matrix)
+
+def solve(coefficient_matrix, constant_matrix):
+    """
+    Solve the linear system with a dense or sparse coefficient matrix.
+
+    Parameters:
+        coefficient_matrix (numpy.ndarray or scipy.sparse matrix): Square coefficient matrix.
+        constant_matrix (numpy.ndarray): Right-hand side.
+
+    Returns:
+        numpy.ndarray: Solution of the system.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the coefficient matrix is singular.
+    """
+    if issparse(coefficient_matrix):
+        return Factorization(coefficient_matrix).solve(constant_matrix)
+    return np.linalg.solve(coefficient_matrix, constant_matrix)
+
+def condition_estimate(coefficient_matrix, factorization=None):
+    """
+    Estimate the 1-norm condition number of a coefficient matrix.
+
+    Dense matrices without a factorization use the exact 1-norm condition number.
+    Otherwise the norm of the inverse is estimated with scipy.sparse.linalg.onenormest,
+    applying the inverse through an LU factorization;
+    passing the factorization of the solve makes this a few extra substitutions.
+
+    Parameters:
+        coefficient_matrix (numpy.ndarray or scipy.sparse matrix): Square coefficient matrix.
+        factorization (Factorization): Factorization of the coefficient matrix, to reuse.
+
+    Returns:
+        float: Condition number estimate, inf if the matrix is singular.
+    """
+    if coefficient_matrix.shape[0] == 0:
+        return 1.0
+    if factorization is None and not issparse(coefficient_matrix):
+        return float(np.linalg.cond(coefficient_matrix, 1))
+    import scipy.sparse.linalg
+    if factorization is None:
+        try:
+            factorization = Factorization(coefficient_matrix)
+        except np.linalg.LinAlgError:
+            return float('inf')
+    inverse = scipy.sparse.linalg.LinearOperator(coefficient_matrix.shape, matvec=factorization.solve,
+                                                 rmatvec=lambda x: factorization.solve(x, transpose=True), dtype=float)
+    # The 1-norm of the matrix is its largest absolute column sum; one probe vector (t=1)
+    # keeps the estimate of the inverse's norm to a few substitutions
+    return float(abs(coefficient_matrix).sum(axis=0).max() * scipy.sparse.linalg.onenormest(inverse, t=1))
+
+def record_matrix(coefficient_matrix):
+    """
+    Record the size, nonzeros and, if requested, condition estimate of a coefficient matrix
+    with the active profiler. Does nothing while profiling is disabled.
+
+    Parameters:
+        coefficient_matrix (numpy.ndarray or scipy.sparse matrix): Square coefficient matrix.
+    """
+    profiler = profiling.active()
+    if profiler is None:
+        return
+    nonzeros = coefficient_matrix.nnz if issparse(coefficient_matrix) else np.count_nonzero(coefficient_matrix)
+    profiler.maximum("unknowns", coefficient_matrix.shape[0])
+    profiler.maximum("nonzeros", int(nonzeros))
+    if profiler.condition:
+        with profiling.span("condition_estimate"):
+            profiler.maximum("condition_estimate", condition_estimate(coefficient_matrix))
+
+def node_ordering(num_nodes, members):
+    """
+    Calculate a bandwidth-reducing node order with reverse Cuthill-McKee.
+
+    Parameters:
+        num_nodes (int): Number of nodes in the truss.
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+
+    Returns:
+        numpy.ndarray: Original node indices in their new order.
+    """
+    import scipy.sparse
+    import scipy.sparse.csgraph
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+    graph = scipy.sparse.coo_matrix((np.ones(len(members)), (members[:, 0], members[:, 1])), shape=(num_nodes, num_nodes)).tocsr()
+    return scipy.sparse.csgraph.reverse_cuthill_mckee((graph + graph.T).tocsr(), symmetric_mode=True)
+
+def bandwidth(rows, columns):
+    """
+    Calculate the lower and upper bandwidth of a matrix given by its nonzero entries.
+
+    Parameters:
+        rows (numpy.ndarray): Row index of every entry.
+        columns (numpy.ndarray): Column index of every entry.
+
+    Returns:
+        tuple: Lower and upper bandwidth.
+    """
+    offsets = np.asarray(rows) - np.asarray(columns)
+    if len(offsets) == 0:
+        return 0, 0
+    return int(max(offsets.max(), 0)), int(max(-offsets.min(), 0))
+
+def solve_banded_entries(rows, columns, values, size, lower, upper, constant_matrix):
+    """
+    Solve a banded system given by its nonzero entries with LAPACK's banded LU.
+
+    Parameters:
+        rows (numpy.ndarray): Row index of every entry.
+        columns (numpy.ndarray): Column index of every entry.
+        values (numpy.ndarray): Value of every entry.
+        size (int): Size of the square matrix.
+        lower (int): Lower bandwidth.
+        upper (int): Upper bandwidth.
+        constant_matrix (numpy.ndarray): Right-hand side, shape (n,) or (n, k).
+
+    Returns:
+        numpy.ndarray: Solution of the system.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the matrix is singular.
+    """
+    # Diagonal-ordered storage: entry (r, c) goes to ab[upper + r - c, c]
+    ab = np.zeros((lower + upper + 1, size))
+    np.add.at(ab, (upper + np.asarray(rows) - np.asarray(columns), columns), values)
+    import scipy.linalg
+    return scipy.linalg.solve_banded((lower, upper), ab, constant_matrix, check_finite=False)
+
+def solve_reordered(coordinates, members, reaction_nodes, reaction_directions, constant_matrix, sparse=None):
+    """
+    Solve the equilibrium equations after renumbering the nodes with reverse Cuthill-McKee.
+
+    Rows are permuted by the new node order and columns (members and reactions) are
+    sorted by the position of their nodes, which gives a narrow band for trusses that
+    are long compared to their depth. If the band is at most MAX_BANDWIDTH wide, the
+    banded solver is used, otherwise the permuted system is solved as usual. The
+    solution is returned in the original numbering.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, 2).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y).
+        constant_matrix (numpy.ndarray): Right-hand side, shape (2*nodes,) or (2*nodes, k).
+        sparse (bool): Use the sparse engine if the banded solver is not used. If None, it is chosen automatically.
+
+    Returns:
+        numpy.ndarray: Member forces followed by reaction forces.
+    """
+    num_nodes = len(np.asarray(coordinates).reshape(-1, 2))
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+    reaction_nodes = np.asarray(reaction_nodes, dtype=np.intp)
+    size = 2 * num_nodes
+
+    # New position of every node
+    node_rank = np.empty(num_nodes, dtype=np.intp)
+    node_rank[node_ordering(num_nodes, members)] = np.arange(num_nodes)
+
+    # Columns sorted by the new position of their nodes
+    column_keys = np.concatenate([node_rank[members].mean(axis=1), node_rank[reaction_nodes]])
+    column_rank = np.empty(len(column_keys), dtype=np.intp)
+    column_rank[np.argsort(column_keys, kind='stable')] = np.arange(len(column_keys))
+
+    rows, columns, values = equilibrium_entries(coordinates, members, reaction_nodes, reaction_directions)
+    rows = 2 * node_rank[rows // 2] + rows % 2
+    columns = column_rank[columns]
+
+    row_rank = (2 * node_rank[:, None] + np.arange(2)).ravel()
+    permuted_constant = np.empty_like(np.asarray(constant_matrix, dtype=float))
+    permuted_constant[row_rank] = constant_matrix
+
+    lower, upper = bandwidth(rows, columns)
+    if lower + upper <= MAX_BANDWIDTH:
+        permuted_variables = solve_banded_entries(rows, columns, values, size, lower, upper, permuted_constant)
+    else:
+        coefficient_matrix = assemble_matrix(rows, columns, values, (size, size), use_sparse(size, sparse))
+        permuted_variables = solve(coefficient_matrix, permuted_constant)
+    return permuted_variables[column_rank]
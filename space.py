@@ -0,0 +1,104 @@
+# space.py
+# Space (3D) truss engine for TrussSim
+
+import numpy as np
+import profiling  # type: ignore
+import solver  # type: ignore
+import stiffness  # type: ignore
+
+def is_space_data(truss_data):
+    """
+    Check whether truss data in the JSON layout describes a space truss.
+
+    Parameters:
+        truss_data (dict): Dictionary with 'nodes', 'connections', 'supports' and 'loads'.
+
+    Returns:
+        bool: True if the nodes have three coordinates.
+    """
+    nodes_data = truss_data.get('nodes', [])
+    return len(nodes_data) > 0 and len(nodes_data[0]) == 3
+
+def solve_space_arrays(coordinates, members, reaction_nodes, reaction_directions, load_nodes, load_vectors, sparse=None, elastic_moduli=1.0, areas=1.0):
+    """
+    Solve the equilibrium equations of a space truss given as index arrays.
+
+    A statically determined space truss has three equations per node, one for every
+    axis, and as many unknown member and reaction forces. Statically indeterminate
+    trusses, which most space frames and roof grids are, are solved with the direct
+    stiffness method.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, 3).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y, 2 for z).
+        load_nodes (numpy.ndarray): Node index of every load.
+        load_vectors (numpy.ndarray): Components (fx, fy, fz) of every load, shape (loads, 3).
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+        elastic_moduli (float or array_like): Modulus of elasticity E, used for indeterminate trusses.
+        areas (float or array_like): Cross-section area A, used for indeterminate trusses.
+
+    Returns:
+        tuple: Member forces followed by reaction forces, and the nodal displacements with shape
+               (nodes, 3) for indeterminate trusses (None otherwise).
+               Returns (None, None) if the truss has fewer unknowns than equations.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the truss is unstable.
+    """
+    num_nodes = len(coordinates)
+    num_unknowns = len(members) + len(reaction_nodes)
+
+    # Loads moved to the right-hand side of the equilibrium equations
+    constant_matrix = solver.component_load_vector(num_nodes, load_nodes, load_vectors)
+
+    # Redundant trusses need the stiffness method
+    if num_unknowns > 3 * num_nodes:
+        displacements, forces, reactions = stiffness.solve_nodal_forces(coordinates, members, elastic_moduli, areas, reaction_nodes, reaction_directions,
+                                                                        -constant_matrix, sparse, dimensions=3)
+        return np.concatenate([forces, reactions]), displacements
+
+    # Statically determined check
+    if 3 * num_nodes != num_unknowns:
+        print("Truss is not statically determined!")
+        return None, None
+
+    # Assemble the coefficient matrix, dense for small trusses and CSC for large ones
+    with profiling.span("assembly"):
+        sparse = solver.use_sparse(num_unknowns, sparse)
+        coefficient_matrix = solver.equilibrium_matrix(coordinates, members, reaction_nodes, reaction_directions, sparse, dimensions=3)
+    solver.record_matrix(coefficient_matrix)
+
+    with profiling.span("solve"):
+        return solver.solve(coefficient_matrix, constant_matrix), None
+
+def calculate_forces(model, sparse=None):
+    """
+    Calculate forces in a space truss.
+
+    The results are also stored in model.forces, model.reactions and, for statically
+    indeterminate trusses, model.displacements.
+
+    Parameters:
+        model (SpaceTrussModel): The truss model.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically
+                       when the number of unknowns exceeds solver.SPARSE_THRESHOLD.
+
+    Returns:
+        tuple: Arrays of member forces (tension positive) and reaction forces.
+               Returns (None, None) if the truss is not statically determined.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the truss is unstable.
+    """
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    variables, displacements = solve_space_arrays(model.coordinates, model.members, reaction_nodes, reaction_directions,
+                                                  model.load_nodes, model.load_vectors, sparse, model.elastic_moduli, model.areas)
+    if variables is None:
+        return None, None
+    with profiling.span("write_back"):
+        model.forces = variables[:model.num_members]
+        model.reactions = variables[model.num_members:]
+        model.displacements = displacements
+    return model.forces, model.reactions
@@ -0,0 +1,465 @@
+# stability.py
+# Stability and mechanism pre-check for TrussSim
+
+import numpy as np
+import profiling  # type: ignore
+import solver  # type: ignore
+
+# Condition number of the equilibrium matrix above which a truss counts as unstable
+CONDITION_LIMIT = 1e12
+# Spread of the member and reaction directions at a node below which the node counts as a near-mechanism
+SPREAD_LIMIT = 1e-6
+# Number of inverse iterations for the smallest singular values
+INVERSE_ITERATIONS = 12
+
+class PebbleGame:
+    """
+    Pebble game for the generic rigidity of a planar truss with supports.
+
+    Every node starts with two pebbles, its two degrees of freedom. A member is independent
+    if four pebbles can be gathered on its two nodes; a reaction (a slider that fixes one
+    direction of a node) is independent if one pebble can be gathered on its node. Independent
+    constraints consume a pebble; the pebbles left over are the degrees of freedom of the truss.
+
+    This checks the topology only, for generic node positions; special geometry such as
+    collinear members is caught by the numerical check in check_stability.
+
+    Attributes:
+        pebbles (numpy.ndarray): Free pebbles of every node.
+        redundant_members (list): Indices of the members that were dependent.
+        redundant_reactions (list): Indices of the reactions that were dependent.
+    """
+    def __init__(self, num_nodes):
+        """
+        Initialize a PebbleGame object.
+
+        Parameters:
+            num_nodes (int): Number of nodes.
+        """
+        self.pebbles = [2] * num_nodes
+        self._out = [[] for _ in range(num_nodes)]  # Members covered by a pebble of the node, as the other node
+        self.redundant_members = []
+        self.redundant_reactions = []
+
+    def _gather(self, node, blocked):
+        """Move one free pebble to node along reversed cover edges; return False if none is reachable."""
+        # Depth-first search for a node with a free pebble, not passing the blocked nodes
+        parents = {node: None}
+        stack = [node]
+        found = None
+        while stack and found is None:
+            current = stack.pop()
+            for neighbour in self._out[current]:
+                if neighbour in parents or neighbour in blocked:
+                    continue
+                parents[neighbour] = current
+                if self.pebbles[neighbour]:
+                    found = neighbour
+                    break
+                stack.append(neighbour)
+        if found is None:
+            return False
+
+        # Reverse the path: every edge current -> neighbour becomes neighbour -> current
+        self.pebbles[found] -= 1
+        self.pebbles[node] += 1
+        neighbour = found
+        while parents[neighbour] is not None:
+            current = parents[neighbour]
+            self._out[current].remove(neighbour)
+            self._out[neighbour].append(current)
+            neighbour = current
+        return True
+
+    def add_member(self, index, node1, node2):
+        """
+        Insert a member.
+
+        Parameters:
+            index (int): Index of the member, recorded if it is redundant.
+            node1 (int): First node index.
+            node2 (int): Second node index.
+
+        Returns:
+            bool: True if the member is independent.
+        """
+        while self.pebbles[node1] < 2 and self._gather(node1, (node1, node2)):
+            pass
+        while self.pebbles[node2] < 2 and self._gather(node2, (node1, node2)):
+            pass
+        if self.pebbles[node1] + self.pebbles[node2] < 4:
+            self.redundant_members.append(index)
+            return False
+        self.pebbles[node1] -= 1
+        self._out[node1].append(node2)
+        return True
+
+    def add_reaction(self, index, node):
+        """
+        Insert a reaction (one fixed direction of a node).
+
+        Parameters:
+            index (int): Index of the reaction, recorded if it is redundant.
+            node (int): Node index.
+
+        Returns:
+            bool: True if the reaction is independent.
+        """
+        if self.pebbles[node] == 0 and not self._gather(node, (node,)):
+            self.redundant_reactions.append(index)
+            return False
+        self.pebbles[node] -= 1  # A slider is a loop; its pebble stays on it
+        return True
+
+    @property
+    def degrees_of_freedom(self):
+        """Number of free pebbles, the generic degrees of freedom of the truss."""
+        return sum(self.pebbles)
+
+    def mobile_nodes(self):
+        """
+        Nodes that can move.
+
+        A node can move if a free pebble can be gathered on it, that is if a node with a
+        free pebble is reachable along the cover edges.
+
+        Returns:
+            numpy.ndarray: Sorted indices of the mobile nodes.
+        """
+        incoming = [[] for _ in self._out]
+        for node, neighbours in enumerate(self._out):
+            for neighbour in neighbours:
+                incoming[neighbour].append(node)
+        mobile = {node for node, count in enumerate(self.pebbles) if count}
+        stack = list(mobile)
+        while stack:
+            for node in incoming[stack.pop()]:
+                if node not in mobile:
+                    mobile.add(node)
+                    stack.append(node)
+        return np.array(sorted(mobile), dtype=np.intp)
+
+def pebble_game(num_nodes, members, reaction_nodes):
+    """
+    Play the pebble game on a truss.
+
+    Parameters:
+        num_nodes (int): Number of nodes.
+        members (array_like): Node indices of every member, shape (members, 2).
+        reaction_nodes (array_like): Node index of every reaction force.
+
+    Returns:
+        PebbleGame: The finished game.
+    """
+    game = PebbleGame(num_nodes)
+    for index, (node1, node2) in enumerate(np.asarray(members).tolist()):
+        if node1 == node2:
+            game.redundant_members.append(index)
+            continue
+        game.add_member(index, node1, node2)
+    for index, node in enumerate(np.asarray(reaction_nodes).tolist()):
+        game.add_reaction(index, node)
+    return game
+
+def smallest_modes(coefficient_matrix, count=1, iterations=INVERSE_ITERATIONS, seed=0):
+    """
+    Estimate the smallest singular values of the equilibrium matrix and their displacement modes.
+
+    Uses block inverse iteration on M = A A^T, which is the stiffness matrix of the truss with
+    unit member and support stiffness. A displacement u with A^T u = 0 stretches no member and
+    moves no support: a mechanism. M is shifted slightly so it can be factorized when singular.
+
+    Parameters:
+        coefficient_matrix (numpy.ndarray or scipy.sparse matrix): Equilibrium matrix, shape (dimensions*nodes, unknowns).
+        count (int): Number of modes.
+        iterations (int): Number of inverse iterations.
+        seed (int): Seed of the random start vectors.
+
+    Returns:
+        tuple: Smallest singular values relative to the largest (ascending), and the modes
+               as the columns of an array with shape (dimensions*nodes, count).
+    """
+    import scipy.sparse
+    matrix = scipy.sparse.csc_matrix(coefficient_matrix)
+    normal = (matrix @ matrix.T).tocsc()
+    size = normal.shape[0]
+    count = max(1, min(count, size))
+
+    # Gershgorin bound of the largest eigenvalue of M
+    largest = max(float(abs(normal).sum(axis=1).max()), 1e-300)
+    shift = largest * 1e-14
+    factorization = solver.CholeskyFactorization((normal + shift * scipy.sparse.identity(size, format='csc')).tocsc())
+
+    modes = np.random.default_rng(seed).standard_normal((size, count))
+    for _ in range(iterations):
+        modes, _ = np.linalg.qr(factorization.solve(modes))
+
+    # Rayleigh-Ritz on the converged subspace; the singular values are measured as |A^T u| rather
+    # than from the eigenvalues of M, which would limit their accuracy to the square root of the precision
+    _, vectors = np.linalg.eigh(modes.T @ (normal @ modes))
+    modes = modes @ vectors
+    values = np.linalg.norm(matrix.T @ modes, axis=0) / np.sqrt(largest)
+    order = np.argsort(values)
+    return values[order], modes[:, order]
+
+class StabilityReport:
+    """
+    Result of a stability check.
+
+    Attributes:
+        stable (bool): True if the truss is neither a mechanism nor (numerically) singular.
+        degrees_of_freedom (int): Degrees of freedom of the mechanism; from the pebble game, or the
+                                  number of (near-)zero singular values found by the numerical check.
+        redundant_members (numpy.ndarray): Members that are dependent on others, None if the pebble game was skipped.
+        redundant_reactions (numpy.ndarray): Reactions that are dependent on others, None if the pebble game was skipped.
+        mechanism_nodes (numpy.ndarray): Nodes that can move without stretching a member.
+        mechanism_members (numpy.ndarray): Members with a mobile node, which move in the mechanism.
+        relative_singular_value (float): Smallest singular value of the equilibrium matrix relative
+                                         to the largest, None if the numerical check was skipped.
+        condition_estimate (float): Estimated condition number, the inverse of relative_singular_value.
+        message (str): Human-readable summary.
+    """
+    __slots__ = ('stable', 'degrees_of_freedom', 'redundant_members', 'redundant_reactions', 'mechanism_nodes',
+                 'mechanism_members', 'relative_singular_value', 'condition_estimate', 'message')
+
+    def __init__(self, **attributes):
+        for name in self.__slots__:
+            setattr(self, name, attributes.get(name))
+
+    def __str__(self):
+        return self.message
+
+def check_stability(coordinates, members, reaction_nodes, reaction_directions, numeric=True, condition_limit=CONDITION_LIMIT, modes=3,
+                    spread_limit=SPREAD_LIMIT):
+    """
+    Check a truss for mechanisms before solving it.
+
+    Trusses with no more members and reactions than degrees of freedom get the pebble game,
+    which finds mechanisms of the topology in near-linear time. Redundant trusses skip it,
+    since rejecting every redundant member would cost a search of its rigid component. Unless
+    the pebble game already found a mechanism, the numerical check follows: node_spread
+    finds nodes between (nearly) collinear members and reactions, as solve_checked does,
+    and an inverse-iteration estimate of the smallest singular values of the sparse
+    equilibrium matrix catches the remaining mechanisms caused by special geometry and
+    near-singular trusses.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, 2).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y).
+        numeric (bool): Run the numerical check.
+        condition_limit (float): Condition number above which the truss counts as unstable.
+        modes (int): Number of singular values estimated for redundant trusses, the largest
+                     number of independent mechanisms the numerical check can count.
+        spread_limit (float): Node spread below which the truss counts as unstable.
+
+    Returns:
+        StabilityReport: The result.
+    """
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+    num_nodes = len(coordinates)
+    mechanism_nodes = np.zeros(0, dtype=np.intp)
+    degrees_of_freedom = 0
+    game = None
+    relative_singular_value = None
+    spread = None
+
+    if len(members) + len(reaction_nodes) <= 2 * num_nodes:
+        game = pebble_game(num_nodes, members, reaction_nodes)
+        degrees_of_freedom = game.degrees_of_freedom
+        if degrees_of_freedom:
+            mechanism_nodes = game.mobile_nodes()
+
+    if numeric and not degrees_of_freedom and num_nodes:
+        spread = node_spread(coordinates, members, reaction_nodes, reaction_directions)
+        mechanism_nodes = np.flatnonzero(spread < spread_limit)
+        degrees_of_freedom = len(mechanism_nodes)
+
+    if numeric and not degrees_of_freedom and num_nodes:
+        coefficient_matrix = solver.equilibrium_matrix(coordinates, members, reaction_nodes, reaction_directions, sparse=True)
+        values, vectors = smallest_modes(coefficient_matrix, 1 if game is not None else modes)
+        relative_singular_value = float(values[0])
+        singular = values * condition_limit < 1
+        if singular.any():
+            mechanism_nodes = moving_nodes(vectors[:, singular])
+            degrees_of_freedom = int(singular.sum())
+
+    mechanism_members = np.flatnonzero(np.isin(members, mechanism_nodes).any(axis=1))
+    stable = len(mechanism_nodes) == 0
+    condition = None if relative_singular_value is None else (1 / relative_singular_value if relative_singular_value > 0 else float('inf'))
+
+    if stable:
+        message = "Truss is stable."
+    elif spread is not None and relative_singular_value is None:
+        message = _spread_message(spread, mechanism_nodes, mechanism_members)
+    elif relative_singular_value is None:
+        message = f"Truss is a mechanism with {degrees_of_freedom} degrees of freedom involving {len(mechanism_nodes)} nodes and {len(mechanism_members)} members."
+    else:
+        message = f"Truss is unstable (condition estimate {condition:.3g}), involving {len(mechanism_nodes)} nodes and {len(mechanism_members)} members."
+    if game is not None and (game.redundant_members or game.redundant_reactions):
+        message += f" {len(game.redundant_members)} members and {len(game.redundant_reactions)} reactions are redundant."
+
+    return StabilityReport(
+        stable=stable,
+        degrees_of_freedom=degrees_of_freedom,
+        redundant_members=None if game is None else np.array(game.redundant_members, dtype=np.intp),
+        redundant_reactions=None if game is None else np.array(game.redundant_reactions, dtype=np.intp),
+        mechanism_nodes=mechanism_nodes,
+        mechanism_members=mechanism_members,
+        relative_singular_value=relative_singular_value,
+        condition_estimate=condition,
+        message=message,
+    )
+
+def moving_nodes(modes, dimensions=2):
+    """
+    Nodes that move noticeably in any of the given mechanism modes.
+
+    Parameters:
+        modes (numpy.ndarray): Displacement modes as columns, shape (dimensions*nodes, modes).
+        dimensions (int): Number of coordinates per node.
+
+    Returns:
+        numpy.ndarray: Sorted indices of the moving nodes.
+    """
+    motion = np.linalg.norm(modes.reshape(-1, dimensions, modes.shape[1]), axis=1)
+    return np.flatnonzero((motion > 1e-3 * motion.max(axis=0)).any(axis=1))
+
+def node_spread(coordinates, members, reaction_nodes, reaction_directions):
+    """
+    Spread of the member and reaction directions meeting at every node.
+
+    A node is held only if its members and reactions point along every axis. The spread is
+    the square root of the smallest over the largest eigenvalue of the sum of the outer
+    products of these unit directions: about 1 for directions spread evenly, 0 if they all
+    lie on one line (or, in space, one plane). A node between two nearly collinear members,
+    such as a node moved a tiny distance off a straight chord, has a spread near zero and
+    carries member forces that grow with the inverse of the spread.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, dimensions).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction (axis) of every reaction force.
+
+    Returns:
+        numpy.ndarray: Spread of every node, 0 for nodes without members and reactions.
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+    num_nodes, dimensions = coordinates.shape
+    cosines, _ = solver.direction_cosines(coordinates, members)
+    outer = (cosines[:, :, None] * cosines[:, None, :]).reshape(len(members), dimensions * dimensions)
+
+    # Sum of the outer products at both ends of every member; a reaction adds a unit entry on the diagonal
+    gram = np.empty((num_nodes, dimensions * dimensions))
+    for entry in range(dimensions * dimensions):
+        gram[:, entry] = (np.bincount(members[:, 0], outer[:, entry], num_nodes) +
+                          np.bincount(members[:, 1], outer[:, entry], num_nodes))
+    reaction_entries = np.asarray(reaction_directions, dtype=np.intp) * (dimensions + 1)
+    np.add.at(gram, (np.asarray(reaction_nodes, dtype=np.intp), reaction_entries), 1.0)
+
+    values = np.linalg.eigvalsh(gram.reshape(num_nodes, dimensions, dimensions))
+    return np.sqrt(np.divide(np.maximum(values[:, 0], 0), values[:, -1], out=np.zeros(num_nodes), where=values[:, -1] > 0))
+
+def _spread_message(spread, mechanism_nodes, mechanism_members):
+    """Summary of a near-mechanism found by node_spread."""
+    return (f"Truss is nearly a mechanism: {len(mechanism_nodes)} nodes have (nearly) collinear members and reactions "
+            f"(smallest spread {spread.min():.3g}), involving {len(mechanism_members)} members.")
+
+def solve_checked(model, sparse=None, condition_limit=CONDITION_LIMIT, spread_limit=SPREAD_LIMIT):
+    """
+    Solve a statically determined truss and check that it is not nearly a mechanism.
+
+    Two checks catch near-singular trusses, which a solve happily turns into huge forces:
+    node_spread finds nodes between (nearly) collinear members in one vectorized pass before
+    the solve, and the condition number of the equilibrium matrix is estimated after it,
+    reusing the LU factorization of the solve. The pebble game is not needed here, since
+    a successful factorization already shows that the truss is not a mechanism.
+
+    Parameters:
+        model (TrussModel or SpaceTrussModel): A statically determined truss model.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+        condition_limit (float): Condition number above which the truss counts as unstable.
+        spread_limit (float): Node spread below which the truss counts as unstable.
+
+    Returns:
+        tuple: Member forces followed by reaction forces (None if unstable), and a StabilityReport.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the equilibrium matrix is singular.
+    """
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    constant_matrix = solver.component_load_vector(model.num_nodes, model.load_nodes, model.load_components())
+    return solve_checked_arrays(model.coordinates, model.members, reaction_nodes, reaction_directions, constant_matrix,
+                                sparse, condition_limit, spread_limit)
+
+def solve_checked_arrays(coordinates, members, reaction_nodes, reaction_directions, constant_matrix, sparse=None,
+                         condition_limit=CONDITION_LIMIT, spread_limit=SPREAD_LIMIT):
+    """
+    Solve a statically determined truss given as index arrays; see solve_checked.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, dimensions).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction (axis) of every reaction force.
+        constant_matrix (numpy.ndarray): The constant matrix (right-hand side), e.g. from solver.load_vector.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+        condition_limit (float): Condition number above which the truss counts as unstable.
+        spread_limit (float): Node spread below which the truss counts as unstable.
+
+    Returns:
+        tuple: Member forces followed by reaction forces (None if unstable), and a StabilityReport.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the equilibrium matrix is singular.
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+    dimensions = coordinates.shape[1]
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+
+    spread = node_spread(coordinates, members, reaction_nodes, reaction_directions)
+    mechanism_nodes = np.flatnonzero(spread < spread_limit)
+    if len(mechanism_nodes):
+        mechanism_members = np.flatnonzero(np.isin(members, mechanism_nodes).any(axis=1))
+        return None, StabilityReport(stable=False, degrees_of_freedom=len(mechanism_nodes), mechanism_nodes=mechanism_nodes,
+                                     mechanism_members=mechanism_members, message=_spread_message(spread, mechanism_nodes, mechanism_members))
+
+    with profiling.span("assembly"):
+        sparse = solver.use_sparse(len(members) + len(reaction_nodes), sparse)
+        coefficient_matrix = solver.equilibrium_matrix(coordinates, members, reaction_nodes, reaction_directions, sparse, dimensions)
+    solver.record_matrix(coefficient_matrix)
+    with profiling.span("solve"):
+        factorization = solver.factorize(coefficient_matrix)
+        variables = factorization.solve(constant_matrix)
+    with profiling.span("condition_estimate"):
+        condition = solver.condition_estimate(coefficient_matrix, factorization)
+
+    if condition > condition_limit:
+        _, modes = smallest_modes(coefficient_matrix)
+        mechanism_nodes = moving_nodes(modes, dimensions)
+        mechanism_members = np.flatnonzero(np.isin(members, mechanism_nodes).any(axis=1))
+        message = f"Truss is unstable (condition estimate {condition:.3g}), involving {len(mechanism_nodes)} nodes and {len(mechanism_members)} members."
+        return None, StabilityReport(stable=False, degrees_of_freedom=1, mechanism_nodes=mechanism_nodes, mechanism_members=mechanism_members,
+                                     relative_singular_value=1 / condition, condition_estimate=condition, message=message)
+
+    return variables, StabilityReport(stable=True, degrees_of_freedom=0, mechanism_nodes=np.zeros(0, dtype=np.intp),
+                                      mechanism_members=np.zeros(0, dtype=np.intp), relative_singular_value=1 / condition,
+                                      condition_estimate=condition, message="Truss is stable.")
+
+def check_model(model, numeric=True):
+    """
+    Check a TrussModel for mechanisms; see check_stability.
+
+    Parameters:
+        model (TrussModel): The truss model.
+        numeric (bool): Run the numerical check.
+
+    Returns:
+        StabilityReport: The result.
+    """
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    return check_stability(model.coordinates, model.members, reaction_nodes, reaction_directions, numeric)
@@ -0,0 +1,162 @@
+# stiffness.py
+# Direct stiffness method for TrussSim
+
+import numpy as np
+import profiling  # type: ignore
+import solver  # type: ignore
+
+def member_stiffness(coordinates, members, elastic_moduli, areas, dimensions=2):
+    """
+    Calculate direction cosines and axial stiffness EA/L of all members.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, dimensions).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        elastic_moduli (array_like): Modulus of elasticity E of every member.
+        areas (array_like): Cross-section area A of every member.
+        dimensions (int): Number of coordinates per node, 2 for plane and 3 for space trusses.
+
+    Returns:
+        tuple: Direction cosines with shape (members, dimensions) and axial stiffness of every member.
+    """
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, dimensions)
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+    direction, lengths = solver.direction_cosines(coordinates, members)
+    axial_stiffness = np.broadcast_to(np.asarray(elastic_moduli, dtype=float), lengths.shape) * np.broadcast_to(np.asarray(areas, dtype=float), lengths.shape) / lengths
+    return direction, axial_stiffness
+
+def stiffness_matrix(coordinates, members, elastic_moduli, areas, sparse=True, dimensions=2):
+    """
+    Assemble the global stiffness matrix.
+
+    Every member contributes EA/L * [[cc, cs, -cc, -cs], [cs, ss, -cs, -ss], ...]
+    to the rows and columns of the degrees of freedom 2*i, 2*i+1, 2*j, 2*j+1 of its nodes,
+    and the 6x6 analogue with three direction cosines in 3D.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, dimensions).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        elastic_moduli (array_like): Modulus of elasticity E of every member.
+        areas (array_like): Cross-section area A of every member.
+        sparse (bool): Return a CSC matrix instead of a dense array.
+        dimensions (int): Number of coordinates per node, 2 for plane and 3 for space trusses.
+
+    Returns:
+        numpy.ndarray or scipy.sparse.csc_matrix: Stiffness matrix, shape (dimensions*nodes, dimensions*nodes).
+    """
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+    num_dofs = dimensions * len(np.asarray(coordinates).reshape(-1, dimensions))
+    direction, axial_stiffness = member_stiffness(coordinates, members, elastic_moduli, areas, dimensions)
+
+    # Member vector b = [c, s, -c, -s]; the member stiffness matrix is EA/L * b b^T
+    b = np.hstack([direction, -direction])
+    axes = np.arange(dimensions)
+    dofs = np.hstack([dimensions * members[:, :1] + axes, dimensions * members[:, 1:] + axes])
+    values = axial_stiffness[:, None, None] * b[:, :, None] * b[:, None, :]
+    rows = np.repeat(dofs, 2 * dimensions, axis=1)
+    columns = np.tile(dofs, (1, 2 * dimensions))
+    return solver.assemble_matrix(rows.ravel(), columns.ravel(), values.ravel(), (num_dofs, num_dofs), sparse)
+
+def solve_stiffness(coordinates, members, elastic_moduli, areas, reaction_nodes, reaction_directions, load_nodes, load_magnitudes, load_angles, sparse=None):
+    """
+    Solve a truss with the direct stiffness method.
+
+    Unlike the equilibrium method this also works for statically indeterminate
+    (redundant) trusses. The degrees of freedom restrained by the reactions are
+    removed and the remaining symmetric positive-definite system is factorized.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, 2).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        elastic_moduli (array_like): Modulus of elasticity E of every member.
+        areas (array_like): Cross-section area A of every member.
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y).
+        load_nodes (numpy.ndarray): Node index of every load.
+        load_magnitudes (numpy.ndarray): Magnitude of every load.
+        load_angles (numpy.ndarray): Angle of every load in radians.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+
+    Returns:
+        tuple: Nodal displacements with shape (nodes, 2), member forces (tension positive)
+               and reaction forces.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the truss is unstable (the stiffness matrix is singular).
+    """
+    num_nodes = len(np.asarray(coordinates).reshape(-1, 2))
+    # load_vector moves loads to the right-hand side of the equilibrium equations, so flip the sign
+    nodal_forces = -solver.load_vector(num_nodes, load_nodes, load_magnitudes, load_angles)
+    return solve_nodal_forces(coordinates, members, elastic_moduli, areas, reaction_nodes, reaction_directions, nodal_forces, sparse)
+
+def solve_nodal_forces(coordinates, members, elastic_moduli, areas, reaction_nodes, reaction_directions, nodal_forces, sparse=None, dimensions=2):
+    """
+    Solve a truss with the direct stiffness method for given nodal forces.
+
+    Parameters:
+        coordinates (numpy.ndarray): Node coordinates, shape (nodes, dimensions).
+        members (numpy.ndarray): Node indices of every member, shape (members, 2).
+        elastic_moduli (array_like): Modulus of elasticity E of every member.
+        areas (array_like): Cross-section area A of every member.
+        reaction_nodes (numpy.ndarray): Node index of every reaction force.
+        reaction_directions (numpy.ndarray): Direction of every reaction force (0 for x, 1 for y, 2 for z).
+        nodal_forces (numpy.ndarray): External force at every degree of freedom, shape (dimensions*nodes,),
+                                      or (dimensions*nodes, cases) to solve several load cases with one factorization.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+        dimensions (int): Number of coordinates per node, 2 for plane and 3 for space trusses.
+
+    Returns:
+        tuple: Nodal displacements with shape (nodes, dimensions), member forces (tension positive)
+               and reaction forces. With several load cases, every result has a trailing cases axis.
+
+    Raises:
+        numpy.linalg.LinAlgError: If the truss is unstable (the stiffness matrix is singular).
+    """
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, dimensions)
+    members = np.asarray(members, dtype=np.intp).reshape(-1, 2)
+    num_dofs = dimensions * len(coordinates)
+    sparse = solver.use_sparse(num_dofs, sparse)
+
+    with profiling.span("assembly"):
+        stiffness = stiffness_matrix(coordinates, members, elastic_moduli, areas, sparse, dimensions)
+        fixed = dimensions * np.asarray(reaction_nodes, dtype=np.intp) + np.asarray(reaction_directions, dtype=np.intp)
+        free = np.setdiff1d(np.arange(num_dofs), fixed)
+        reduced = stiffness[free][:, free] if sparse else stiffness[np.ix_(free, free)]
+    solver.record_matrix(reduced)
+
+    # Reduced system K_ff u_f = F_f
+    nodal_forces = np.asarray(nodal_forces, dtype=float)
+    cases = nodal_forces.shape[1:]
+    displacements = np.zeros(nodal_forces.shape)
+    if len(free):
+        with profiling.span("solve"):
+            displacements[free] = solver.CholeskyFactorization(reduced).solve(nodal_forces[free])
+
+    # Member forces from the elongation of every member
+    direction, axial_stiffness = member_stiffness(coordinates, members, elastic_moduli, areas, dimensions)
+    nodal_displacements = displacements.reshape(-1, dimensions, *cases)
+    elongation = np.einsum('ij,ij...->i...', direction, nodal_displacements[members[:, 1]] - nodal_displacements[members[:, 0]])
+    forces = axial_stiffness.reshape(-1, *(1,) * len(cases)) * elongation
+
+    # Reactions balance the internal and external forces at the restrained degrees of freedom
+    reactions = stiffness[fixed] @ displacements - nodal_forces[fixed]
+    return nodal_displacements, forces, np.asarray(reactions).reshape(len(fixed), *cases)
+
+def calculate_displacements(model, sparse=None):
+    """
+    Solve a TrussModel with the direct stiffness method.
+
+    The results are also stored in model.displacements, model.forces and model.reactions.
+
+    Parameters:
+        model (TrussModel): The truss model.
+        sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+
+    Returns:
+        tuple: Nodal displacements with shape (nodes, 2), member forces and reaction forces.
+    """
+    reaction_nodes, reaction_directions = model.reaction_arrays()
+    model.displacements, model.forces, model.reactions = solve_stiffness(
+        model.coordinates, model.members, model.elastic_moduli, model.areas, reaction_nodes, reaction_directions,
+        model.load_nodes, model.load_magnitudes, np.radians(model.load_angles), sparse)
+    return model.displacements, model.forces, model.reactions
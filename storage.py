@@ -0,0 +1,282 @@
+# storage.py
+# Binary model and result format for TrussSim
+
+import json
+import struct
+import numpy as np
+import classes  # type: ignore
+import functions  # type: ignore
+
+# File layout:
+#   8 bytes   magic b'TRUSSBIN'
+#   4 bytes   format version (little-endian uint32)
+#   4 bytes   header length in bytes (little-endian uint32)
+#   header    UTF-8 JSON describing every array (dtype, shape, offset)
+#   data      raw little-endian arrays, each starting at a multiple of ALIGNMENT
+MAGIC = b'TRUSSBIN'
+VERSION = 1
+ALIGNMENT = 64
+SUPPORT_TYPES = ['pin', 'roller']
+
+_PREAMBLE = struct.Struct('<8sII')
+
+def _aligned(offset):
+    """Round an offset up to the next multiple of ALIGNMENT."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _model_arrays(model):
+    """Collect the arrays of a model that are written to the file."""
+    support_types = sorted(set(SUPPORT_TYPES) | set(model.support_types.tolist()), key=lambda name: (name not in SUPPORT_TYPES, name))
+    codes = {name: code for code, name in enumerate(support_types)}
+    arrays = {
+        'coordinates': model.coordinates.astype('<f8', copy=False),
+        'members': model.members.astype('<i4', copy=False),
+        'support_nodes': model.support_nodes.astype('<i4', copy=False),
+        'support_codes': np.array([codes[name] for name in model.support_types.tolist()], dtype='|i1'),
+        'load_nodes': model.load_nodes.astype('<i4', copy=False),
+    }
+    if model.dimensions == 3:
+        # Space trusses have load vectors and no load cases
+        arrays['load_vectors'] = model.load_vectors.astype('<f8', copy=False)
+    else:
+        arrays['load_magnitudes'] = model.load_magnitudes.astype('<f8', copy=False)
+        arrays['load_angles'] = model.load_angles.astype('<f8', copy=False)
+    arrays['elastic_moduli'] = model.elastic_moduli.astype('<f8', copy=False)
+    arrays['areas'] = model.areas.astype('<f8', copy=False)
+    for name, case_loads in getattr(model, 'load_cases', {}).items():
+        arrays['load_cases/' + name] = case_loads.astype('<f8', copy=False)
+    if model.forces is not None:
+        arrays['forces'] = np.asarray(model.forces, dtype='<f8')
+    if model.reactions is not None:
+        arrays['reactions'] = np.asarray(model.reactions, dtype='<f8')
+    if model.displacements is not None:
+        arrays['displacements'] = np.asarray(model.displacements, dtype='<f8')
+    return arrays, support_types
+
+def _layout(specs, metadata):
+    """
+    Lay out arrays after the header.
+
+    Parameters:
+        specs (dict): Array name -> (dtype, shape).
+        metadata (dict): Further header entries.
+
+    Returns:
+        tuple: Encoded header, header entry of every array and the end of the file.
+    """
+    # The header size depends on the offsets, so iterate until stable
+    header_length = 0
+    while True:
+        offset = _aligned(_PREAMBLE.size + header_length)
+        entries = {}
+        for name, (dtype, shape) in specs.items():
+            entries[name] = {'dtype': np.dtype(dtype).str, 'shape': list(shape), 'offset': offset}
+            offset = _aligned(offset + np.dtype(dtype).itemsize * int(np.prod(shape)))
+        header = json.dumps({'arrays': entries, **metadata}).encode('utf-8')
+        if len(header) == header_length:
+            return header, entries, offset
+        header_length = len(header)
+
+def save_binary(model, file_path):
+    """
+    Save a truss model, and its results if solved, in the binary format.
+
+    Parameters:
+        model (TrussModel or SpaceTrussModel): The truss model.
+        file_path (str): Path of the binary file.
+    """
+    arrays, support_types = _model_arrays(model)
+    metadata = {'support_types': support_types}
+    if model.dimensions == 3:
+        metadata['dimensions'] = 3
+    elif model.combinations:
+        metadata['combinations'] = model.combinations
+    header, entries, end = _layout({name: (array.dtype, array.shape) for name, array in arrays.items()}, metadata)
+
+    with open(file_path, 'wb') as file:
+        file.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(entries[name]['offset'])
+            np.ascontiguousarray(array).tofile(file)
+        file.truncate(end)
+
+class ArrayWriter:
+    """
+    Writes arrays of known shape to a binary file piece by piece.
+
+    The file has the layout of save_binary, so it can be opened with load_arrays
+    and memory-mapped, but the arrays are filled in slices of rows as they are
+    produced and never need to be in memory as a whole.
+    """
+    def __init__(self, file_path, specs, metadata=None):
+        """
+        Create the file and write its header.
+
+        Parameters:
+            file_path (str): Path of the binary file.
+            specs (dict): Array name -> (dtype, shape) of every array in the file.
+            metadata (dict): Further header entries, which must be JSON serializable.
+        """
+        header, self.entries, end = _layout(specs, metadata or {})
+        self._file = open(file_path, 'wb')
+        self._file.write(_PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        self._file.write(header)
+        self._file.truncate(end)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def write(self, name, start, values):
+        """
+        Write rows of an array.
+
+        Parameters:
+            name (str): Name of the array.
+            start (int): Index of the first row written.
+            values (array_like): The rows, with the dtype of the array.
+        """
+        entry = self.entries[name]
+        dtype = np.dtype(entry['dtype'])
+        values = np.ascontiguousarray(values, dtype=dtype)
+        row_bytes = dtype.itemsize * int(np.prod(entry['shape'][1:]))
+        self._file.seek(entry['offset'] + start * row_bytes)
+        values.tofile(self._file)
+
+    def close(self):
+        """Close the file."""
+        self._file.close()
+
+def read_header(file_path):
+    """
+    Read the header of a binary file.
+
+    Parameters:
+        file_path (str): Path of the binary file.
+
+    Returns:
+        dict: The header with the 'arrays' entry and, for models, 'support_types',
+              'combinations' and, for space trusses, 'dimensions'.
+
+    Raises:
+        ValueError: If the file is not a TrussSim binary file.
+    """
+    with open(file_path, 'rb') as file:
+        preamble = file.read(_PREAMBLE.size)
+        if len(preamble) != _PREAMBLE.size:
+            raise ValueError(f"{file_path} is not a TrussSim binary file")
+        magic, version, header_length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError(f"{file_path} is not a TrussSim binary file")
+        if version > VERSION:
+            raise ValueError(f"{file_path} has unsupported format version {version}")
+        return json.loads(file.read(header_length).decode('utf-8'))
+
+def load_arrays(file_path, mmap=True):
+    """
+    Open all arrays of a binary file.
+
+    Parameters:
+        file_path (str): Path of the binary file.
+        mmap (bool): Memory-map the arrays (zero-copy, read-only) instead of reading them.
+
+    Returns:
+        tuple: Dictionary of arrays by name and the header.
+    """
+    header = read_header(file_path)
+    arrays = {}
+    with open(file_path, 'rb') as file:
+        for name, entry in header['arrays'].items():
+            dtype = np.dtype(entry['dtype'])
+            shape = tuple(entry['shape'])
+            count = int(np.prod(shape))
+            if count == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            elif mmap:
+                arrays[name] = np.memmap(file_path, dtype=dtype, mode='r', offset=entry['offset'], shape=shape)
+            else:
+                file.seek(entry['offset'])
+                arrays[name] = np.fromfile(file, dtype=dtype, count=count).reshape(shape)
+    return arrays, header
+
+def load_binary(file_path, mmap=True):
+    """
+    Load a truss model from the binary format.
+
+    With mmap the coordinate, member and result arrays of the model are views
+    of the file, so even very large models open instantly.
+
+    Parameters:
+        file_path (str): Path of the binary file.
+        mmap (bool): Memory-map the arrays instead of reading them.
+
+    Returns:
+        TrussModel or SpaceTrussModel: The truss model, with forces, reactions and displacements if they were saved.
+    """
+    arrays, header = load_arrays(file_path, mmap)
+    support_types = np.array(header['support_types'], dtype=str)
+    support_types = support_types[arrays['support_codes']] if len(arrays['support_codes']) else []
+    if header.get('dimensions', 2) == 3:
+        model = classes.SpaceTrussModel(
+            arrays['coordinates'],
+            arrays['members'],
+            arrays['support_nodes'],
+            support_types,
+            arrays['load_nodes'],
+            arrays['load_vectors'],
+            arrays.get('elastic_moduli', 1.0),
+            arrays.get('areas', 1.0),
+        )
+        model.forces = arrays.get('forces')
+        model.reactions = arrays.get('reactions')
+        model.displacements = arrays.get('displacements')
+        return model
+
+    load_cases = {name[len('load_cases/'):]: array for name, array in arrays.items() if name.startswith('load_cases/')}
+    model = classes.TrussModel(
+        arrays['coordinates'],
+        arrays['members'],
+        arrays['support_nodes'],
+        support_types,
+        arrays['load_nodes'],
+        arrays['load_magnitudes'],
+        arrays['load_angles'],
+        load_cases,
+        arrays.get('elastic_moduli', 1.0),
+        arrays.get('areas', 1.0),
+        header.get('combinations'),
+    )
+    model.forces = arrays.get('forces')
+    model.reactions = arrays.get('reactions')
+    model.displacements = arrays.get('displacements')
+    return model
+
+def json_to_binary(json_path, binary_path):
+    """
+    Convert a truss JSON file to the binary format.
+
+    Parameters:
+        json_path (str): Path of the JSON file.
+        binary_path (str): Path of the binary file.
+    """
+    with open(json_path) as file:
+        model = functions.model_from_dict(json.load(file))
+    save_binary(model, binary_path)
+
+def binary_to_json(binary_path, json_path):
+    """
+    Convert a binary file to the truss JSON format.
+
+    Results are not part of the JSON format and are not written.
+
+    Parameters:
+        binary_path (str): Path of the binary file.
+        json_path (str): Path of the JSON file.
+    """
+    model = load_binary(binary_path)
+    with open(json_path, 'w') as file:
+        json.dump(model.to_dict(), file, indent=4)
@@ -0,0 +1,278 @@
+# sweep.py
+# Parallel geometric parameter sweeps for TrussSim
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import functions  # type: ignore
+import generators  # type: ignore
+import solver  # type: ignore
+import stability  # type: ignore
+
+STATUS_OK = "ok"
+STATUS_UNSTABLE = "unstable"
+
+# Shared arrays of the sweep in a worker process, set by _attach
+_shared = {}
+
+def height_parameter(model, heights):
+    """
+    Sweep parameter that changes the height of a truss.
+
+    Every node moves up in proportion to its height above the lowest node, so the
+    supports on the bottom chord stay in place.
+
+    Parameters:
+        model (TrussModel): The base model.
+        heights (array_like): Heights to sweep.
+
+    Returns:
+        tuple: Mode shape with shape (nodes, 2) and offsets from the base height.
+
+    Raises:
+        ValueError: If the base model is flat (has zero height).
+    """
+    y = model.coordinates[:, 1]
+    height = y.max() - y.min() if len(y) else 0.0
+    if height <= 0:
+        raise ValueError("The base model is flat; a height sweep needs a model with nonzero height")
+    mode = np.zeros_like(model.coordinates)
+    mode[:, 1] = (y - y.min()) / height
+    return mode, np.asarray(heights, dtype=float) - height
+
+def node_parameter(model, nodes, direction, offsets):
+    """
+    Sweep parameter that moves nodes together in one direction.
+
+    Parameters:
+        model (TrussModel): The base model.
+        nodes (array_like): Indices of the nodes to move.
+        direction (array_like): Direction of the movement, e.g. (0, 1) for upwards.
+        offsets (array_like): Distances to sweep.
+
+    Returns:
+        tuple: Mode shape with shape (nodes, 2) and offsets.
+    """
+    mode = np.zeros_like(model.coordinates)
+    mode[np.asarray(nodes, dtype=np.intp)] = np.asarray(direction, dtype=float)
+    return mode, np.asarray(offsets, dtype=float)
+
+def _create_shared(array):
+    """Copy an array into a new shared memory block."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+    return block
+
+def _attach(specs):
+    """Worker initializer: map the shared memory blocks of the sweep as arrays."""
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _shared[name] = (block, np.ndarray(shape, dtype, buffer=block.buf))
+
+def _solve_variants(start, stop, sparse):
+    """Worker task: solve the variants start..stop-1 and write their forces to shared memory."""
+    arrays = {name: array for name, (_, array) in _shared.items()}
+    num_members = len(arrays['members'])
+    num_nodes = arrays['coordinates'].shape[1]
+    # Statically determined variants get the near-mechanism checks of the batch runner; redundant ones the stiffness method
+    determined = 2 * num_nodes == num_members + len(arrays['reaction_nodes'])
+    if determined:
+        constant_matrix = solver.load_vector(num_nodes, arrays['load_nodes'], arrays['load_magnitudes'], arrays['load_angles'])
+    summaries = []
+    for variant in range(start, stop):
+        summary = {"variant": variant, "status": STATUS_OK, "condition_estimate": None}
+        try:
+            if determined:
+                variables, report = stability.solve_checked_arrays(arrays['coordinates'][variant], arrays['members'], arrays['reaction_nodes'],
+                                                                   arrays['reaction_directions'], constant_matrix, sparse)
+                summary["condition_estimate"] = report.condition_estimate
+            else:
+                variables = functions.solve_arrays(arrays['coordinates'][variant], arrays['members'], arrays['reaction_nodes'], arrays['reaction_directions'],
+                                                   arrays['load_nodes'], arrays['load_magnitudes'], arrays['load_angles'], sparse,
+                                                   arrays['elastic_moduli'], arrays['areas'])
+        except np.linalg.LinAlgError:
+            variables = None
+        if variables is None:
+            summary["status"] = STATUS_UNSTABLE
+            if 'forces' in arrays:
+                arrays['forces'][variant] = np.nan
+            summaries.append(summary)
+            continue
+
+        forces = variables[:num_members]
+        if 'forces' in arrays:
+            arrays['forces'][variant] = forces
+            arrays['reactions'][variant] = variables[num_members:]
+        critical = int(np.argmax(np.abs(forces)))
+        summary.update({
+            "max_force": float(abs(forces[critical])),
+            "critical_member": critical,
+            "max_tension": float(max(forces.max(), 0.0)),
+            "max_compression": float(min(forces.min(), 0.0)),
+        })
+        summaries.append(summary)
+    return summaries
+
+class ParameterSweep:
+    """
+    Sweep of the geometry of a truss over a grid of parameters.
+
+    Every parameter is a mode shape, an offset field of the node coordinates, with the
+    values to sweep. The variants are all combinations of the values, and the coordinates
+    of variant v are base + sum_k value[v, k] * mode[k], built for all variants at once.
+    The topology, supports and loads are the same for all variants.
+
+    Attributes:
+        model (TrussModel): The base model.
+        names (list): Names of the parameters.
+        modes (numpy.ndarray): Mode shapes with shape (parameters, nodes, 2).
+        values (numpy.ndarray): Parameter values of every variant, shape (variants, parameters).
+        forces (numpy.ndarray): Member forces with shape (variants, members) after run(keep_forces=True).
+        reactions (numpy.ndarray): Reaction forces with shape (variants, reactions) after run(keep_forces=True).
+    """
+    def __init__(self, model, parameters):
+        """
+        Initialize a ParameterSweep object.
+
+        Parameters:
+            model (TrussModel): The base model.
+            parameters (dict): Parameter name -> (mode shape with shape (nodes, 2), values), e.g.
+                               from height_parameter or node_parameter.
+        """
+        self.model = model
+        self.names = list(parameters)
+        self.modes = np.array([np.asarray(parameters[name][0], dtype=float).reshape(-1, 2) for name in self.names]).reshape(-1, model.num_nodes, 2)
+        grids = np.meshgrid(*[np.asarray(parameters[name][1], dtype=float) for name in self.names], indexing='ij')
+        self.values = np.column_stack([grid.ravel() for grid in grids]) if grids else np.zeros((1, 0))
+        self.forces = None
+        self.reactions = None
+
+    @property
+    def num_variants(self):
+        """Number of variants."""
+        return len(self.values)
+
+    def coordinates(self, out=None):
+        """
+        Node coordinates of all variants.
+
+        Parameters:
+            out (numpy.ndarray): Array with shape (variants, nodes, 2) to write to, e.g. in shared memory.
+
+        Returns:
+            numpy.ndarray: Coordinates with shape (variants, nodes, 2).
+        """
+        if out is None:
+            out = np.empty((self.num_variants, self.model.num_nodes, 2))
+        out[...] = self.model.coordinates
+        out += np.einsum('vk,knd->vnd', self.values, self.modes)
+        return out
+
+    def parameters(self, variant):
+        """
+        Parameter values of a variant.
+
+        Parameters:
+            variant (int): Index of the variant.
+
+        Returns:
+            dict: Parameter name -> value, as offsets from the base model.
+        """
+        return dict(zip(self.names, self.values[variant].tolist()))
+
+    def run(self, workers=None, chunksize=64, sparse=None, keep_forces=False):
+        """
+        Solve all variants across a process pool and yield their summaries as they complete.
+
+        The coordinates of the variants, the other model arrays and, with keep_forces, the
+        result arrays live in shared memory, so the workers read and write them in place
+        instead of receiving pickled copies. Only the small summaries travel back.
+
+        Parameters:
+            workers (int): Number of worker processes, defaults to the number of CPUs.
+            chunksize (int): Number of variants solved per task.
+            sparse (bool): Use the sparse engine. If None, it is chosen automatically.
+            keep_forces (bool): Collect the member and reaction forces of all variants in
+                                self.forces and self.reactions.
+
+        Yields:
+            dict: Summary of a variant: variant index, parameters, status ('ok' or 'unstable'),
+                  max_force (largest absolute member force), critical_member, max_tension and max_compression.
+                  Statically determined variants that are nearly a mechanism count as unstable, see
+                  stability.solve_checked; their summaries have the 'condition_estimate' of the truss.
+                  Summaries arrive in completion order, not in variant order.
+        """
+        model = self.model
+        reaction_nodes, reaction_directions = model.reaction_arrays()
+        if 2 * model.num_nodes > model.num_members + len(reaction_nodes):
+            print("Truss is not statically determined!")
+            return
+
+        blocks = {}
+        try:
+            # Build the variant coordinates straight into shared memory
+            coordinates_shape = (self.num_variants, model.num_nodes, 2)
+            blocks['coordinates'] = shared_memory.SharedMemory(create=True, size=max(int(np.prod(coordinates_shape)) * 8, 1))
+            self.coordinates(np.ndarray(coordinates_shape, float, buffer=blocks['coordinates'].buf))
+            specs = {'coordinates': (blocks['coordinates'].name, coordinates_shape, float)}
+
+            inputs = {
+                'members': model.members.astype(np.intp),
+                'reaction_nodes': reaction_nodes.astype(np.intp),
+                'reaction_directions': reaction_directions.astype(np.intp),
+                'load_nodes': model.load_nodes.astype(np.intp),
+                'load_magnitudes': model.load_magnitudes,
+                'load_angles': np.radians(model.load_angles),
+                'elastic_moduli': model.elastic_moduli,
+                'areas': model.areas,
+            }
+            if keep_forces:
+                inputs['forces'] = np.zeros((self.num_variants, model.num_members))
+                inputs['reactions'] = np.zeros((self.num_variants, len(reaction_nodes)))
+            for name, array in inputs.items():
+                blocks[name] = _create_shared(array)
+                specs[name] = (blocks[name].name, array.shape, array.dtype)
+
+            chunksize = max(1, chunksize)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as executor:
+                futures = [executor.submit(_solve_variants, start, min(start + chunksize, self.num_variants), sparse)
+                           for start in range(0, self.num_variants, chunksize)]
+                for future in as_completed(futures):
+                    for summary in future.result():
+                        summary["parameters"] = self.parameters(summary["variant"])
+                        yield summary
+
+            if keep_forces:
+                self.forces = np.ndarray(inputs['forces'].shape, float, buffer=blocks['forces'].buf).copy()
+                self.reactions = np.ndarray(inputs['reactions'].shape, float, buffer=blocks['reactions'].buf).copy()
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+def panel_sweep(name, panels, heights, workers=None, chunksize=64, **kwargs):
+    """
+    Sweep a generated truss over panel counts and heights.
+
+    The panel count changes the topology, so every panel count is its own height sweep.
+
+    Parameters:
+        name (str): Name of the generator in generators.GENERATORS.
+        panels (array_like): Panel counts to sweep.
+        heights (array_like): Heights to sweep.
+        workers (int): Number of worker processes, defaults to the number of CPUs.
+        chunksize (int): Number of variants solved per task.
+        **kwargs: Further arguments of the generator.
+
+    Yields:
+        dict: Summary of a variant as yielded by ParameterSweep.run, with the panel count
+              in 'panels' and the absolute height in 'height'.
+    """
+    heights = np.asarray(heights, dtype=float)
+    for panel_count in panels:
+        model = generators.generate(name, int(panel_count), **kwargs)
+        mode, offsets = height_parameter(model, heights)
+        for summary in ParameterSweep(model, {'height': (mode, offsets)}).run(workers, chunksize):
+            summary["panels"] = int(panel_count)
+            summary["height"] = float(heights[summary["variant"]])
+            yield summary